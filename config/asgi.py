@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# sync code runs in a new thread for every request under ASGI, so
+# persistent connections would pile up; set POSTGRES_POOL to reuse them
+os.environ.setdefault('POSTGRES_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
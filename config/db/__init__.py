@@ -0,0 +1,4 @@
+"""PostgreSQL database backend with optional connection pooling.
+
+Use "config.db" as a database ENGINE; see config.db.base.DatabaseWrapper.
+"""
@@ -0,0 +1,71 @@
+import threading
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from config.db.pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, dbname, options):
+    """Return the process-wide pool for a database, creating it once."""
+    with _pools_lock:
+        pool = _pools.get((alias, dbname))
+        if pool is None:
+            pool = _pools[alias, dbname] = ConnectionPool(**options)
+        return pool
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {
+        f"{alias}/{dbname}": pool.stats() for (alias, dbname), pool in pools
+    }
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend that can keep connections in a shared pool.
+
+    With OPTIONS["pool"] set (max_size, timeout, max_lifetime, check),
+    connections are checked out of a process-wide ConnectionPool when
+    Django opens one and handed back when it closes one, so CONN_MAX_AGE
+    should be 0: every request gets a warm connection for its lifetime
+    only, and threads waiting for the database are bounded by max_size.
+    Without it the backend behaves exactly like the stock one.
+    """
+
+    @property
+    def pool(self):
+        options = self.settings_dict["OPTIONS"].get("pool")
+        if not options:
+            return None
+        return get_pool(self.alias, self.settings_dict["NAME"], options)
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        connect = super().get_new_connection
+        connection = pool.getconn(lambda: connect(conn_params))
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import Counter, deque
+
+from psycopg2 import extensions
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """A bounded pool of psycopg2 connections shared by a process' threads.
+
+    getconn() hands out an idle connection, opens a new one while fewer
+    than max_size exist, or waits up to timeout seconds for one to be
+    returned. Connections older than max_lifetime, closed, or left in an
+    unknown transaction state are closed instead of reused ("recycled").
+    """
+
+    def __init__(self, max_size=10, timeout=10, max_lifetime=3600, check=False):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check = check
+
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._opened_at = {}
+        self._opening = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._counters = Counter()
+
+    def getconn(self, connect):
+        """Return a connection, opening it with connect() if needed."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connection = self._checkout(deadline)
+            if connection is None:
+                break
+            # the round trip of the check runs outside the lock
+            if not self.check or self._is_usable(connection):
+                return connection
+            with self._condition:
+                self._in_use -= 1
+                self._discard(connection)
+                self._condition.notify()
+
+        connection = None
+        try:
+            connection = connect()
+        finally:
+            with self._condition:
+                self._opening -= 1
+                if connection is None:
+                    self._condition.notify()
+                else:
+                    self._opened_at[connection] = time.monotonic()
+                    self._in_use += 1
+                    self._counters["created"] += 1
+        return connection
+
+    def putconn(self, connection):
+        """Take back a connection, resetting or closing it."""
+        reusable = self._reset(connection)
+        with self._condition:
+            self._in_use -= 1
+            if reusable and not self._expired(connection):
+                self._idle.append(connection)
+            else:
+                self._discard(connection)
+            self._condition.notify()
+
+    def closeall(self):
+        with self._condition:
+            while self._idle:
+                self._discard(self._idle.popleft())
+
+    def stats(self):
+        with self._condition:
+            return {
+                "size": len(self._opened_at),
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "max_size": self.max_size,
+                "created": self._counters["created"],
+                "recycled": self._counters["recycled"],
+                "timeouts": self._counters["timeouts"],
+            }
+
+    def _checkout(self, deadline):
+        """Check out an idle connection, or reserve a slot and return None."""
+        with self._condition:
+            while True:
+                connection = self._pop_idle()
+                if connection is not None:
+                    self._in_use += 1
+                    return connection
+
+                if len(self._opened_at) + self._opening < self.max_size:
+                    # reserve the slot; connect outside the lock
+                    self._opening += 1
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection available within "
+                        f"{self.timeout:g} s ({self.max_size} in use)"
+                    )
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+    def _pop_idle(self):
+        while self._idle:
+            # most recently used first, so surplus connections age out
+            connection = self._idle.pop()
+            if self._expired(connection):
+                self._discard(connection)
+                continue
+            return connection
+        return None
+
+    def _expired(self, connection):
+        return (
+            connection.closed
+            or time.monotonic() - self._opened_at[connection] > self.max_lifetime
+        )
+
+    @staticmethod
+    def _is_usable(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _reset(connection):
+        if connection.closed:
+            return False
+        status = connection.info.transaction_status
+        if status == extensions.TRANSACTION_STATUS_IDLE:
+            return True
+        if status in (
+            extensions.TRANSACTION_STATUS_INTRANS,
+            extensions.TRANSACTION_STATUS_INERROR,
+        ):
+            try:
+                connection.rollback()
+            except Exception:
+                return False
+            return True
+        return False
+
+    def _discard(self, connection):
+        self._opened_at.pop(connection, None)
+        self._counters["recycled"] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,79 @@
+"""
+Gunicorn config for the production server.
+
+Serve the WSGI app with threaded workers:
+
+    gunicorn -c config/gunicorn.conf.py config.wsgi
+
+or the ASGI app (async read views, seat streams) with uvicorn workers:
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker \\
+        gunicorn -c config/gunicorn.conf.py config.asgi
+
+Every setting can be overridden from the environment, see below.
+`kill -HUP <master pid>` replaces the workers gracefully after a config
+change; as the app is preloaded, deploy new code with a new container
+(or USR2 followed by QUIT to the old master).
+
+For more information on this file, see
+https://docs.gunicorn.org/en/stable/settings.html
+"""
+
+import multiprocessing
+import os
+import sys
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', 8000)}")
+
+# "gthread" for config.wsgi, "uvicorn.workers.UvicornWorker" for config.asgi
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+
+# requests mostly wait on the database, so run more workers than cores
+workers = int(
+    os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1)
+)
+# per gthread worker; keep workers * threads within the database's
+# max_connections, or set POSTGRES_POOL to share connections instead
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# load Django once in the master, workers fork from it copy-on-write
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+# seconds in-flight requests get to finish on reload and shutdown
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# recycle workers now and then, staggered so they don't restart together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+
+# set to an empty value to turn access logging off
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-") or None
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+
+LOCAL_CACHE = "django.core.cache.backends.locmem.LocMemCache"
+
+
+def when_ready(server):
+    from django.conf import settings
+    from django.db import connections
+
+    # response cache invalidations and seat holds live in the cache, and
+    # must be seen by every worker
+    if (
+        server.cfg.workers > 1
+        and settings.CACHES["default"]["BACKEND"] == LOCAL_CACHE
+        and not os.getenv("GUNICORN_ALLOW_LOCAL_CACHE")
+    ):
+        server.log.error(
+            "%d workers can't share a LocMemCache: set CACHE_BACKEND and "
+            "CACHE_LOCATION to a shared cache (e.g. Redis), or "
+            "WEB_CONCURRENCY=1",
+            server.cfg.workers,
+        )
+        sys.exit(1)
+
+    # don't let workers inherit a database socket opened while preloading
+    connections.close_all()
@@ -28,7 +28,10 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv("DEBUG")
 
-ALLOWED_HOSTS = []
+# comma separated, e.g. "api.example.com,localhost"
+ALLOWED_HOSTS = [
+    host for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host
+]
 
 # Application definition
 
@@ -39,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # third-party
     "rest_framework",
@@ -85,14 +89,35 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # django.db.backends.postgresql plus optional connection pooling
+        'ENGINE': 'config.db',
         'NAME': os.getenv('POSTGRES_DB'),
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST'),
+        'PORT': os.getenv('POSTGRES_PORT', ''),
+        # seconds a thread keeps its connection between requests
+        'CONN_MAX_AGE': int(os.getenv('POSTGRES_CONN_MAX_AGE', 60)),
+        # ping reused connections so a restarted server costs no request
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'POSTGRES_CONN_HEALTH_CHECKS', 'true'
+        ).lower() in ('1', 'true', 'yes'),
+        'OPTIONS': {},
     }
 }
 
+if os.getenv('POSTGRES_POOL'):
+    # share a bounded set of connections between the threads of a
+    # process instead of one per thread; requests return theirs when done
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'max_size': int(os.getenv('POSTGRES_POOL_MAX_SIZE', 10)),
+        # seconds to wait for a free connection before failing the request
+        'timeout': float(os.getenv('POSTGRES_POOL_TIMEOUT', 10)),
+        'max_lifetime': int(os.getenv('POSTGRES_POOL_MAX_LIFETIME', 60 * 60)),
+        'check': DATABASES['default']['CONN_HEALTH_CHECKS'],
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -137,10 +162,21 @@ AUTH_USER_MODEL = "user.User"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # builds request.user from the token claims instead of the users
+        # table; rest_framework_simplejwt.authentication.JWTAuthentication
+        # loads the row on every request
+        "user.authentication.StatelessJWTAuthentication",
     ),
 }
 
+PAGINATION = {
+    "PAGE_SIZE": int(os.getenv("PAGINATION_PAGE_SIZE", 20)),
+    "MAX_PAGE_SIZE": int(os.getenv("PAGINATION_MAX_PAGE_SIZE", 100)),
+    # "envelope" wraps results with next/previous links,
+    # "link_header" returns a bare list and puts them in a Link header
+    "RESPONSE_SHAPE": os.getenv("PAGINATION_RESPONSE_SHAPE", "envelope"),
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Planetarium API Service",
     "DESCRIPTION": "API for managing planetarium",
@@ -154,7 +190,70 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+CACHES = {
+    "default": {
+        # e.g. django.core.cache.backends.redis.RedisCache, or
+        # django.core.cache.backends.filebased.FileBasedCache, to share
+        # cached data between worker processes
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+RESPONSE_CACHE = {
+    "CACHE_ALIAS": "default",
+    "LOCAL_MAX_ENTRIES": int(os.getenv("RESPONSE_CACHE_LOCAL_MAX_ENTRIES", 256)),
+    "TIMEOUT": int(os.getenv("RESPONSE_CACHE_TIMEOUT", 60 * 60)),
+}
+
+# Seconds a show session seat map stays cached before it is rebuilt
+SEAT_MAP_CACHE_TIMEOUT = int(os.getenv("SEAT_MAP_CACHE_TIMEOUT", 60))
+
+# serve the hot read endpoints from async views (see
+# planetarium.async_views); only worth it under an ASGI server
+ASYNC_READ_VIEWS = bool(os.getenv("ASYNC_READ_VIEWS"))
+
+SEAT_EVENTS = {
+    # "postgres" fans events out to every process through LISTEN/NOTIFY,
+    # "memory" only reaches streams served by the publishing process
+    "BROKER": os.getenv("SEAT_EVENTS_BROKER", "postgres"),
+    # events a slow stream may fall behind before it is resynced
+    "QUEUE_SIZE": int(os.getenv("SEAT_EVENTS_QUEUE_SIZE", 100)),
+    "KEEPALIVE_SECONDS": int(os.getenv("SEAT_EVENTS_KEEPALIVE_SECONDS", 15)),
+    # streams are closed after this long and EventSource reconnects;
+    # the ASGI handler does not report client disconnects to them
+    "MAX_STREAM_SECONDS": int(
+        os.getenv("SEAT_EVENTS_MAX_STREAM_SECONDS", 300)
+    ),
+}
+
+SEAT_HOLDS = {
+    # minutes seats are held when the client does not ask for a duration
+    "MINUTES": int(os.getenv("SEAT_HOLDS_MINUTES", 10)),
+    "MAX_MINUTES": int(os.getenv("SEAT_HOLDS_MAX_MINUTES", 30)),
+    "MAX_SEATS": int(os.getenv("SEAT_HOLDS_MAX_SEATS", 20)),
+}
+
+SCHEDULE_IMPORT = {
+    # how long a session keeps its dome busy, for the overlap check
+    "SESSION_MINUTES": int(os.getenv("SCHEDULE_IMPORT_SESSION_MINUTES", 60)),
+    "BATCH_SIZE": int(os.getenv("SCHEDULE_IMPORT_BATCH_SIZE", 1000)),
+    # sessions one request to the bulk endpoint may carry
+    "MAX_ROWS": int(os.getenv("SCHEDULE_IMPORT_MAX_ROWS", 10000)),
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.TokenRefreshSerializer",
+}
+
+TOKEN_REVOCATION = {
+    # revocations are stored in user.models.TokenRevocation; seconds a
+    # process may keep answering from its own copy
+    "LOCAL_TTL": int(os.getenv("TOKEN_REVOCATION_LOCAL_TTL", 5)),
+    "LOCAL_MAX_ENTRIES": 10000,
 }
@@ -36,6 +36,7 @@ class ReservationAdmin(admin.ModelAdmin):
 @admin.register(ShowSession)
 class ShowSessionAdmin(admin.ModelAdmin):
     list_display = ('astronomy_show', 'planetarium_dome', 'show_time', 'tickets_available')
+    list_select_related = ('astronomy_show', 'planetarium_dome')
 
     def tickets_available(self, obj):
         return obj.tickets_available
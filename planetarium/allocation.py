@@ -0,0 +1,91 @@
+"""Best-available seat selection for a party, e.g. for quick-buy.
+
+find_best_seats() scores every free block of adjacent seats of the
+party's size: blocks closer to the middle row and to the middle of their
+row are better, and a block that would leave a single free seat next to
+it (which nobody else can use with a friend) is penalized. When no row
+has enough adjacent free seats the party is split over the best seats.
+"""
+
+# a stranded single seat costs as much as moving this far from the
+# center, in fractions of the dome's depth/width
+GAP_PENALTY = 0.1
+
+
+def find_best_seats(rows, seats_in_row, taken, party_size):
+    """Return the best (row, seat) pairs for a party and whether they are
+    adjacent, or None if fewer seats are free.
+
+    taken is a container of the (row, seat) pairs that are not free.
+    """
+    best = None
+    for row in range(1, rows + 1):
+        free_run_start = None
+        for seat in range(1, seats_in_row + 2):
+            if seat <= seats_in_row and (row, seat) not in taken:
+                if free_run_start is None:
+                    free_run_start = seat
+                continue
+            if free_run_start is not None:
+                candidate = _best_block_in_run(
+                    rows, seats_in_row, row, free_run_start, seat - 1, party_size
+                )
+                if candidate is not None and (best is None or candidate < best):
+                    best = candidate
+                free_run_start = None
+
+    if best is not None:
+        _, row, start = best
+        return [(row, seat) for seat in range(start, start + party_size)], True
+
+    free_seats = sorted(
+        (
+            _seat_score(rows, seats_in_row, row, seat),
+            row,
+            seat,
+        )
+        for row in range(1, rows + 1)
+        for seat in range(1, seats_in_row + 1)
+        if (row, seat) not in taken
+    )
+    if len(free_seats) < party_size:
+        return None
+    return sorted((row, seat) for _, row, seat in free_seats[:party_size]), False
+
+
+def _best_block_in_run(rows, seats_in_row, row, first, last, party_size):
+    """Return (score, row, start) of the best block within free seats
+    first..last of a row, or None if the run is too short."""
+    last_start = last - party_size + 1
+    if last_start < first:
+        return None
+
+    # the distance to the middle of the row only grows away from the
+    # centered start, and gaps are only left by starts next to the ends
+    # of the run, so the best start is near one of those
+    centered = round((seats_in_row + 1) / 2 - (party_size - 1) / 2)
+    starts = {first, last_start} | {
+        min(max(start, first), last_start)
+        for start in range(centered - 2, centered + 3)
+    }
+    row_cost = _row_cost(rows, row)
+    best = None
+    for start in starts:
+        end = start + party_size - 1
+        gaps = (start - first == 1) + (last - end == 1)
+        score = (
+            row_cost
+            + abs((start + end) / 2 - (seats_in_row + 1) / 2) / seats_in_row
+            + gaps * GAP_PENALTY
+        )
+        if best is None or (score, row, start) < best:
+            best = (score, row, start)
+    return best
+
+
+def _row_cost(rows, row):
+    return abs(row - (rows + 1) / 2) / rows
+
+
+def _seat_score(rows, seats_in_row, row, seat):
+    return _row_cost(rows, row) + abs(seat - (seats_in_row + 1) / 2) / seats_in_row
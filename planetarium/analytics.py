@@ -0,0 +1,218 @@
+"""Sales and occupancy reports for staff, served from a rollup table.
+
+ShowSessionRowSales holds the tickets sold per row of every show session.
+refresh_sales_rollup() adds the tickets inserted since the last refresh,
+found by id, so it never reads the whole tickets table. Tickets that
+disappear (cancelled reservations, deleted sessions) or that committed
+after a refresh had passed their id leave a session's rollup out of step
+with its tickets_sold counter; such sessions are recounted from their
+own tickets. The reports only read the rollup and the sessions.
+"""
+
+import time
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, ExtractHour, TruncDate
+from django.utils import timezone
+
+from .booking import lock_show_sessions
+from .filters import in_date_range
+from .models import RollupState, ShowSession, ShowSessionRowSales, Ticket
+
+ROLLUP_NAME = "sales"
+
+
+def _rolled_up_sold():
+    return Coalesce(
+        Subquery(
+            ShowSessionRowSales.objects.filter(show_session=OuterRef("pk"))
+            .order_by()
+            .values("show_session")
+            .annotate(total=Sum("tickets_sold"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def _count_rows(tickets):
+    return {
+        (show_session_id, row): count
+        for show_session_id, row, count in tickets.order_by()
+        .values("show_session", "row")
+        .annotate(count=Count("id"))
+        .values_list("show_session", "row", "count")
+    }
+
+
+@transaction.atomic
+def refresh_sales_rollup(full=False):
+    """Bring the rollup up to date, return what it did and how long the
+    steps took, in seconds."""
+    started = time.monotonic()
+    state, _ = RollupState.objects.get_or_create(name=ROLLUP_NAME)
+    # one refresh at a time, or both would add the same tickets
+    state = RollupState.objects.select_for_update().get(pk=state.pk)
+    if full:
+        ShowSessionRowSales.objects.all().delete()
+        state.last_ticket_id = 0
+
+    last_ticket_id = max(
+        Ticket.objects.aggregate(last=Max("id"))["last"] or 0,
+        state.last_ticket_id,
+    )
+    new_rows = _count_rows(
+        Ticket.objects.filter(
+            id__gt=state.last_ticket_id, id__lte=last_ticket_id
+        )
+    )
+    if new_rows:
+        existing = ShowSessionRowSales.objects.filter(
+            show_session_id__in={pk for pk, _ in new_rows}
+        ).values_list("show_session", "row", "tickets_sold")
+        for show_session_id, row, tickets_sold in existing:
+            if (show_session_id, row) in new_rows:
+                new_rows[show_session_id, row] += tickets_sold
+        _save_rows(new_rows)
+    added_at = time.monotonic()
+
+    drifted = list(
+        ShowSession.objects.annotate(rolled_up=_rolled_up_sold())
+        .exclude(tickets_sold=F("rolled_up"))
+        .values_list("id", flat=True)
+    )
+    if drifted:
+        # wait for bookings in flight, like reconcile_ticket_counters
+        lock_show_sessions(drifted)
+        ShowSessionRowSales.objects.filter(show_session_id__in=drifted).delete()
+        _save_rows(
+            _count_rows(
+                Ticket.objects.filter(
+                    show_session_id__in=drifted, id__lte=last_ticket_id
+                )
+            )
+        )
+    recounted_at = time.monotonic()
+
+    state.last_ticket_id = last_ticket_id
+    state.refreshed_at = timezone.now()
+    state.save()
+    return {
+        "rows_updated": len(new_rows),
+        "recounted_sessions": len(drifted),
+        "last_ticket_id": last_ticket_id,
+        "timings": {
+            "new_tickets": added_at - started,
+            "recount": recounted_at - added_at,
+            "total": time.monotonic() - started,
+        },
+    }
+
+
+def _save_rows(counts):
+    ShowSessionRowSales.objects.bulk_create(
+        [
+            ShowSessionRowSales(
+                show_session_id=show_session_id, row=row, tickets_sold=count
+            )
+            for (show_session_id, row), count in counts.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["show_session", "row"],
+        update_fields=["tickets_sold"],
+    )
+
+
+def refreshed_at():
+    return (
+        RollupState.objects.filter(name=ROLLUP_NAME)
+        .values_list("refreshed_at", flat=True)
+        .first()
+    )
+
+
+def _groupings():
+    tz = timezone.get_current_timezone()
+    return {
+        "astronomy_show": (F("astronomy_show"), F("astronomy_show__title")),
+        "show_theme": (
+            F("astronomy_show__show_theme"),
+            F("astronomy_show__show_theme__name"),
+        ),
+        "planetarium_dome": (
+            F("planetarium_dome"),
+            F("planetarium_dome__name"),
+        ),
+        # hour of the day the sessions start at
+        "hour": (ExtractHour("show_time", tzinfo=tz), None),
+        "day": (TruncDate("show_time", tzinfo=tz), None),
+    }
+
+
+GROUPINGS = tuple(_groupings())
+
+
+def sales_report(by, date_from=None, date_to=None):
+    """Return the sessions, capacity and tickets sold of the sessions
+    between two dates grouped by one of GROUPINGS, in one query.
+
+    A session counts once for each of its show's themes.
+    """
+    key, name = _groupings()[by]
+    values = {"key": key} if name is None else {"key": key, "name": name}
+    return list(
+        in_date_range(ShowSession.objects.all(), date_from, date_to)
+        .annotate(sold=_rolled_up_sold())
+        .values(**values)
+        .annotate(
+            sessions=Count("id"),
+            capacity=Sum(
+                F("planetarium_dome__rows") * F("planetarium_dome__seats_in_row")
+            ),
+            tickets_sold=Sum("sold"),
+        )
+        .order_by("key")
+    )
+
+
+def row_heatmap(planetarium_dome, date_from=None, date_to=None, astronomy_show=None):
+    """Return the tickets sold per row of a dome over its sessions
+    between two dates, with rows that sold nothing too."""
+    sessions = in_date_range(
+        ShowSession.objects.filter(planetarium_dome=planetarium_dome),
+        date_from,
+        date_to,
+    )
+    row_sales = in_date_range(
+        ShowSessionRowSales.objects.filter(
+            show_session__planetarium_dome=planetarium_dome
+        ),
+        date_from,
+        date_to,
+        field="show_session__show_time",
+    )
+    if astronomy_show is not None:
+        sessions = sessions.filter(astronomy_show=astronomy_show)
+        row_sales = row_sales.filter(show_session__astronomy_show=astronomy_show)
+
+    sold = dict(
+        row_sales.order_by()
+        .values("row")
+        .annotate(total=Sum("tickets_sold"))
+        .values_list("row", "total")
+    )
+    session_count = sessions.count()
+    capacity = session_count * planetarium_dome.seats_in_row
+    return {
+        "planetarium_dome": planetarium_dome.id,
+        "sessions": session_count,
+        "seats_in_row": planetarium_dome.seats_in_row,
+        "rows": [
+            {
+                "row": row,
+                "tickets_sold": sold.get(row, 0),
+                "fill_rate": sold.get(row, 0) / capacity if capacity else None,
+            }
+            for row in range(1, planetarium_dome.rows + 1)
+        ],
+    }
@@ -0,0 +1,107 @@
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework.response import Response
+
+
+class AsyncReadMixin:
+    """Serve list and retrieve of a viewset with the async ORM.
+
+    With settings.ASYNC_READ_VIEWS on (ASGI deployments), as_view() returns
+    a coroutine view: GET and HEAD requests for which the viewset has an
+    a<action>() method run on the event loop, everything else goes through
+    the regular synchronous dispatch in a worker thread. Responses and
+    permission checks are the same either way.
+    """
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASYNC_READ_VIEWS:
+            return view
+
+        if "get" in actions and "head" not in actions:
+            actions["head"] = actions["get"]
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            action = actions.get(request.method.lower())
+            if action is None or not hasattr(cls, f"a{action}"):
+                return await sync_view(request, *args, **kwargs)
+
+            self = cls(**initkwargs)
+            self.action_map = actions
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        # keep view.cls, view.actions, csrf_exempt... for routers and schemas,
+        # but not __wrapped__, which would make it look synchronous
+        update_wrapper(async_view, view)
+        del async_view.__wrapped__
+        return async_view
+
+    async def adispatch(self, request, *args, **kwargs):
+        """APIView.dispatch() for the async actions."""
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # authentication may load the user
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, f"a{self.action}")
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return self.response
+
+    async def aget_queryset(self):
+        """get_queryset() for viewsets that query while building it."""
+        return self.get_queryset()
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(await self.aget_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (
+            queryset.model.DoesNotExist,
+            TypeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(await self.aget_queryset())
+
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(
+                queryset, request, view=self
+            )
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(
+            [obj async for obj in queryset], many=True
+        )
+        return Response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
@@ -0,0 +1,275 @@
+import time
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+
+from .allocation import find_best_seats
+from .exceptions import NoSeatsAvailable, SeatsTaken, ShowSessionsGone
+from .models import Reservation, ShowSession, Ticket
+from .seat_events import publish_seat_changes, seats_changed
+from .seat_holds import SeatHolds, held_seats, parse_hold_id
+
+
+def lock_show_sessions(show_session_ids):
+    """Lock the show session rows so bookings for them run one at a time.
+
+    Rows are locked in id order, so bookings spanning several sessions
+    cannot deadlock each other. Must be called inside a transaction.
+    """
+    return list(
+        ShowSession.objects.select_for_update()
+        .filter(id__in=show_session_ids)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def lock_show_sessions_to_book(show_session_ids):
+    """lock_show_sessions(), or raise ShowSessionsGone if some of the
+    sessions were deleted since the request was validated.
+
+    Their tickets would only fail the foreign key check at commit, past
+    the IntegrityError handling of _insert_tickets().
+    """
+    missing = set(show_session_ids) - set(lock_show_sessions(show_session_ids))
+    if missing:
+        raise ShowSessionsGone(missing)
+
+
+@transaction.atomic
+def book_tickets(reservation, tickets_data, hold=None):
+    """Insert the tickets of a reservation, or raise SeatsTaken.
+
+    Seats held by others are taken too. The seats of the given hold
+    (planetarium.seat_holds.Hold) are not, and the hold is used up.
+    """
+    tickets = [
+        Ticket(reservation=reservation, **ticket_data)
+        for ticket_data in tickets_data
+    ]
+    seats = [
+        (ticket.show_session_id, ticket.row, ticket.seat) for ticket in tickets
+    ]
+    show_session_ids = {ticket.show_session_id for ticket in tickets}
+
+    lock_show_sessions_to_book(show_session_ids)
+
+    taken_seats = Ticket.taken_seats(seats) | (
+        set(seats)
+        & held_seats(show_session_ids, exclude=hold and hold.id)
+    )
+    if taken_seats:
+        raise SeatsTaken(taken_seats)
+
+    tickets = _insert_tickets(tickets)
+    if hold is not None:
+        _update_holds(hold.show_session_id, use_up=hold.id)
+    return tickets
+
+
+@transaction.atomic
+def book_reservations(user_id, tickets_per_reservation, partial=False):
+    """Create several reservations of a user with their tickets at once.
+
+    tickets_per_reservation maps a key (e.g. the position in a request)
+    to validated ticket data. All sessions involved are locked up front,
+    then a reservation is rejected if one of its seats is sold or claimed
+    by an earlier reservation of the batch. Unless partial is set, one
+    rejection leaves everything uncreated.
+
+    Returns the created reservations and the rejected seats, both by key.
+    """
+    seats_per_reservation = {
+        key: [
+            (ticket["show_session"].id, ticket["row"], ticket["seat"])
+            for ticket in tickets_data
+        ]
+        for key, tickets_data in tickets_per_reservation.items()
+    }
+    requested_seats = [
+        seat for seats in seats_per_reservation.values() for seat in seats
+    ]
+    show_session_ids = {
+        show_session_id for show_session_id, _, _ in requested_seats
+    }
+    lock_show_sessions_to_book(show_session_ids)
+
+    claimed_seats = Ticket.taken_seats(requested_seats) | (
+        set(requested_seats) & held_seats(show_session_ids)
+    )
+    conflicts = {}
+    for key, seats in seats_per_reservation.items():
+        clashing = set()
+        reservation_seats = set()
+        for seat in seats:
+            # sold, held, taken by an earlier reservation or asked twice
+            if seat in claimed_seats or seat in reservation_seats:
+                clashing.add(seat)
+            reservation_seats.add(seat)
+        if clashing:
+            conflicts[key] = clashing
+        else:
+            claimed_seats |= reservation_seats
+
+    reservations = {
+        key: Reservation(user_id=user_id)
+        for key in tickets_per_reservation
+        if key not in conflicts
+    }
+    if not reservations or (conflicts and not partial):
+        return {}, conflicts
+
+    Reservation.objects.bulk_create(reservations.values())
+    _insert_tickets(
+        [
+            Ticket(reservation=reservations[key], **ticket_data)
+            for key, tickets_data in tickets_per_reservation.items()
+            if key in reservations
+            for ticket_data in tickets_data
+        ]
+    )
+    return reservations, conflicts
+
+
+def _insert_tickets(tickets):
+    """Insert tickets whose seats were checked under the session locks."""
+    seats = [
+        (ticket.show_session_id, ticket.row, ticket.seat) for ticket in tickets
+    ]
+    try:
+        with transaction.atomic():
+            tickets = Ticket.objects.bulk_create(tickets)
+    except IntegrityError:
+        # a ticket was written without taking the session lock (e.g. admin)
+        raise SeatsTaken(Ticket.taken_seats(seats))
+
+    sold = Counter(ticket.show_session_id for ticket in tickets)
+    for show_session_id, count in sold.items():
+        ShowSession.objects.filter(id=show_session_id).add_tickets_sold(count)
+    # the booking stands if the broker or the cache is down
+    transaction.on_commit(lambda: seats_changed(taken=seats), robust=True)
+    return tickets
+
+
+@transaction.atomic
+def auto_book(show_session, user_id, party_size):
+    """Reserve the best available seats for a party, or raise
+    NoSeatsAvailable.
+
+    The seats are chosen under the session lock from the sold and held
+    seats, so the result is as safe as a booking of chosen seats.
+    Returns the reservation, its tickets and whether they are adjacent.
+    """
+    lock_show_sessions_to_book([show_session.id])
+    planetarium_dome = show_session.planetarium_dome
+    taken = set(
+        Ticket.objects.filter(show_session=show_session)
+        .order_by()
+        .values_list("row", "seat")
+    )
+    taken |= SeatHolds.load(show_session.id).held_seats(time.time())
+
+    found = find_best_seats(
+        planetarium_dome.rows, planetarium_dome.seats_in_row, taken, party_size
+    )
+    if found is None:
+        raise NoSeatsAvailable()
+    seats, together = found
+
+    reservation = Reservation.objects.create(user_id=user_id)
+    tickets = _insert_tickets(
+        [
+            Ticket(
+                reservation=reservation,
+                show_session=show_session,
+                row=row,
+                seat=seat,
+            )
+            for row, seat in seats
+        ]
+    )
+    return reservation, tickets, together
+
+
+@transaction.atomic
+def place_hold(show_session, user_id, seats, minutes):
+    """Hold (row, seat) pairs of a session for a user, or raise SeatsTaken.
+
+    Held seats count as taken for everyone else until the hold expires,
+    is released, or is turned into tickets with book_tickets().
+    """
+    lock_show_sessions([show_session.id])
+    now = time.time()
+    holds = SeatHolds.load(show_session.id)
+    released = holds.evict(now)
+
+    requested_seats = [(show_session.id, row, seat) for row, seat in seats]
+    taken_seats = Ticket.taken_seats(requested_seats) | {
+        (show_session.id, row, seat)
+        for row, seat in set(seats) & holds.held_seats(now)
+    }
+    if taken_seats:
+        raise SeatsTaken(taken_seats)
+
+    hold = holds.add(user_id, now + minutes * 60, seats)
+    holds.save(now)
+    _holds_changed(show_session.id, taken=seats, released=released)
+    return hold
+
+
+@transaction.atomic
+def release_hold(hold_id, user_id):
+    """Release a live hold of the user, return whether there was one."""
+    show_session_id = parse_hold_id(hold_id)
+    if show_session_id is None:
+        return False
+
+    lock_show_sessions([show_session_id])
+    hold = SeatHolds.load(show_session_id).get(hold_id, time.time())
+    if hold is None or hold.user_id != user_id:
+        return False
+    _update_holds(show_session_id, release=hold_id)
+    return True
+
+
+def sweep_expired_holds(show_session_ids):
+    """Drop the expired holds of the sessions, return the seats released."""
+    now = time.time()
+    released = 0
+    for holds in SeatHolds.load_many(list(show_session_ids)):
+        if holds.has_expired(now):
+            with transaction.atomic():
+                lock_show_sessions([holds.show_session_id])
+                released += _update_holds(holds.show_session_id)
+    return released
+
+
+def _update_holds(show_session_id, release=None, use_up=None):
+    """Evict expired holds, and the released or used up one.
+
+    Must be called under the session lock. Returns the number of seats
+    released.
+    """
+    now = time.time()
+    holds = SeatHolds.load(show_session_id)
+    released = holds.evict(now)
+    if release in holds.holds:
+        released += holds.remove(release)
+    if use_up in holds.holds:
+        # its seats are sold now, they stay taken
+        holds.remove(use_up)
+    holds.save(now)
+    _holds_changed(show_session_id, released=released)
+    return len(released)
+
+
+def _holds_changed(show_session_id, taken=(), released=()):
+    # the seats in the session detail changed: refresh its ETag
+    ShowSession.objects.filter(id=show_session_id).touch()
+    transaction.on_commit(
+        lambda: publish_seat_changes(
+            taken=[(show_session_id, row, seat) for row, seat in taken],
+            released=[(show_session_id, row, seat) for row, seat in released],
+        ),
+        robust=True,
+    )
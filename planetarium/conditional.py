@@ -0,0 +1,59 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+
+class ConditionalRetrieveMixin:
+    """Answer conditional GETs of an object from its change timestamps.
+
+    get_version_stamps() returns the updated_at values the detail response
+    depends on, read without loading the object. When the client's
+    If-None-Match still matches them, the view replies 304 before loading
+    or serializing anything.
+
+    There is no Last-Modified: it has whole seconds only, so a seat sold
+    in the same second as a response would be answered 304 to
+    If-Modified-Since.
+    """
+
+    def get_version_stamps(self):
+        raise NotImplementedError
+
+    async def aget_version_stamps(self):
+        return await sync_to_async(self.get_version_stamps)()
+
+    def get_version_etag(self, request, stamps):
+        version = "|".join(
+            [request.get_full_path()] + [stamp.isoformat() for stamp in stamps]
+        )
+        return quote_etag(hashlib.md5(version.encode()).hexdigest())
+
+    def retrieve(self, request, *args, **kwargs):
+        stamps = [stamp for stamp in self.get_version_stamps() or () if stamp]
+        if not stamps:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = self.get_version_etag(request, stamps)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+
+        response["ETag"] = etag
+        return response
+
+    async def aretrieve(self, request, *args, **kwargs):
+        stamps = [
+            stamp for stamp in await self.aget_version_stamps() or () if stamp
+        ]
+        if not stamps:
+            return await super().aretrieve(request, *args, **kwargs)
+
+        etag = self.get_version_etag(request, stamps)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await super().aretrieve(request, *args, **kwargs)
+
+        response["ETag"] = etag
+        return response
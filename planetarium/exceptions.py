@@ -0,0 +1,37 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatsTaken(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats have already been taken."
+    default_code = "seats_taken"
+
+    def __init__(self, taken_seats):
+        super().__init__()
+        self.detail = {
+            "detail": self.detail,
+            "taken_seats": [
+                {"show_session": show_session_id, "row": row, "seat": seat}
+                for show_session_id, row, seat in sorted(taken_seats)
+            ],
+        }
+
+
+class NoSeatsAvailable(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Not enough seats are left for the party."
+    default_code = "no_seats_available"
+
+
+class ShowSessionsGone(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Some of the show sessions no longer exist."
+    default_code = "show_sessions_gone"
+
+    def __init__(self, show_session_ids):
+        super().__init__()
+        self.detail = {
+            "detail": self.detail,
+            "show_sessions": sorted(show_session_ids),
+        }
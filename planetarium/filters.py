@@ -0,0 +1,97 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+
+class ShowSessionFilterSerializer(serializers.Serializer):
+    date = serializers.DateField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    astronomy_show = serializers.CharField(required=False)
+    planetarium_dome = serializers.IntegerField(required=False)
+    has_available_seats = serializers.BooleanField(
+        required=False, allow_null=True, default=None
+    )
+
+    def validate_astronomy_show(self, value):
+        try:
+            return [int(str_id) for str_id in value.split(",")]
+        except ValueError:
+            raise serializers.ValidationError(
+                "Expected a comma separated list of ids."
+            )
+
+    def validate(self, attrs):
+        date_from, date_to = attrs.get("date_from"), attrs.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            raise serializers.ValidationError(
+                {"date_to": "Must not be before date_from."}
+            )
+        return attrs
+
+
+def start_of_day(date):
+    """Return midnight of a date in the current time zone, as an aware
+    datetime."""
+    return timezone.make_aware(
+        datetime.combine(date, time.min), timezone.get_current_timezone()
+    )
+
+
+def in_date_range(queryset, date_from=None, date_to=None, field="show_time"):
+    """Filter a queryset to the days date_from..date_to of a datetime
+    field, either of which may be None."""
+    if date_from:
+        queryset = queryset.filter(**{f"{field}__gte": start_of_day(date_from)})
+    if date_to:
+        queryset = queryset.filter(
+            **{f"{field}__lt": start_of_day(date_to + timedelta(days=1))}
+        )
+    return queryset
+
+
+class ShowSessionFilter(BaseFilterBackend):
+    """Filter show sessions by the ?date, ?date_from, ?date_to,
+    ?astronomy_show, ?planetarium_dome and ?has_available_seats params.
+
+    Dates are days in the current time zone and become half-open
+    show_time ranges, so that the show_time indexes serve them; a
+    show_time__date lookup casts the column and can't use them.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if view.action != "list":
+            return queryset
+
+        params = ShowSessionFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        date = params.get("date")
+        queryset = in_date_range(queryset, date, date)
+        queryset = in_date_range(
+            queryset, params.get("date_from"), params.get("date_to")
+        )
+
+        if "astronomy_show" in params:
+            queryset = queryset.filter(
+                astronomy_show_id__in=params["astronomy_show"]
+            )
+
+        if "planetarium_dome" in params:
+            queryset = queryset.filter(
+                planetarium_dome_id=params["planetarium_dome"]
+            )
+
+        capacity = F("planetarium_dome__rows") * F(
+            "planetarium_dome__seats_in_row"
+        )
+        if params["has_available_seats"] is True:
+            queryset = queryset.filter(tickets_sold__lt=capacity)
+        elif params["has_available_seats"] is False:
+            queryset = queryset.filter(tickets_sold__gte=capacity)
+
+        return queryset
@@ -0,0 +1,142 @@
+import asyncio
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Load running API servers with concurrent keep-alive connections "
+        "and report requests per second and latency percentiles, e.g. to "
+        "compare WSGI and ASGI deployments"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="+", metavar="url")
+        parser.add_argument("--connections", type=int, default=500)
+        parser.add_argument("--duration", type=float, default=10)
+        parser.add_argument(
+            "--warmup",
+            type=float,
+            default=2,
+            help="Seconds of load before measuring",
+        )
+        parser.add_argument(
+            "--user",
+            help="Email of the user to authenticate as, the first user by default",
+        )
+
+    def handle(self, *args, **options):
+        token = self.get_token(options)
+        for url in options["urls"]:
+            stats = asyncio.run(self.load(url, token, options))
+            self.report(url, stats, options)
+
+    def get_token(self, options):
+        users = get_user_model().objects.order_by("id")
+        if options["user"]:
+            users = users.filter(email=options["user"])
+        user = users.first()
+        if user is None:
+            raise CommandError("No user to authenticate as")
+        return str(AccessToken.for_user(user))
+
+    async def load(self, url, token, options):
+        url = urlsplit(url)
+        path = url.path + (f"?{url.query}" if url.query else "")
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {url.hostname}\r\n"
+            f"Authorization: Bearer {token}\r\n"
+            "Accept: application/json\r\n"
+            "\r\n"
+        ).encode()
+
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + options["warmup"]
+        deadline = measure_from + options["duration"]
+        stats = {"latencies": [], "statuses": Counter(), "errors": 0}
+
+        async def connection():
+            reader = writer = None
+            while loop.time() < deadline:
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(
+                            url.hostname, url.port or 80
+                        )
+                    started = loop.time()
+                    writer.write(request)
+                    status, keep_alive = await read_response(reader)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    stats["errors"] += 1
+                    if writer is not None:
+                        writer.close()
+                    reader = writer = None
+                    await asyncio.sleep(0.01)
+                    continue
+
+                if started >= measure_from and loop.time() <= deadline:
+                    stats["latencies"].append(loop.time() - started)
+                    stats["statuses"][status] += 1
+                if not keep_alive:
+                    writer.close()
+                    reader = writer = None
+            if writer is not None:
+                writer.close()
+
+        await asyncio.gather(
+            *(connection() for _ in range(options["connections"]))
+        )
+        return stats
+
+    def report(self, url, stats, options):
+        latencies = sorted(stats["latencies"])
+        if not latencies:
+            raise CommandError(f"No request to {url} completed")
+
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(url))
+        self.stdout.write(
+            f"{len(latencies)} requests in {options['duration']:g} s over "
+            f"{options['connections']} connections: "
+            f"{len(latencies) / options['duration']:.1f} req/s"
+        )
+        self.stdout.write(
+            f"latency p50={percentile(0.5) * 1000:.1f} ms "
+            f"p99={percentile(0.99) * 1000:.1f} ms "
+            f"max={latencies[-1] * 1000:.1f} ms"
+        )
+        self.stdout.write(
+            "statuses "
+            + ", ".join(
+                f"{status}: {count}"
+                for status, count in sorted(stats["statuses"].items())
+            )
+            + f"; connection errors: {stats['errors']}"
+        )
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response, return its status and keep-alive flag."""
+    status_line = await reader.readuntil(b"\r\n")
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while (line := await reader.readuntil(b"\r\n")) != b"\r\n":
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if headers.get("transfer-encoding") == "chunked":
+        while size := int((await reader.readuntil(b"\r\n")).strip(), 16):
+            await reader.readexactly(size + 2)
+        await reader.readuntil(b"\r\n")
+    else:
+        await reader.readexactly(int(headers.get("content-length", 0)))
+
+    return status, headers.get("connection") != "close"
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from planetarium.management.commands import benchmark_http
+
+# the benchmark only reads, so workers may each keep their own cache
+SHARED_CACHE_NOT_NEEDED = {"GUNICORN_ALLOW_LOCAL_CACHE": "1"}
+
+SERVERS = {
+    "runserver": (
+        ["manage.py", "runserver", "--noreload", "127.0.0.1:{port}"],
+        {},
+    ),
+    "gunicorn": (
+        ["-m", "gunicorn", "-c", "config/gunicorn.conf.py",
+         "--bind", "127.0.0.1:{port}", "config.wsgi"],
+        SHARED_CACHE_NOT_NEEDED,
+    ),
+    "uvicorn": (
+        ["-m", "gunicorn", "-c", "config/gunicorn.conf.py",
+         "--bind", "127.0.0.1:{port}", "config.asgi"],
+        {
+            **SHARED_CACHE_NOT_NEEDED,
+            "GUNICORN_WORKER_CLASS": "uvicorn.workers.UvicornWorker",
+        },
+    ),
+}
+
+
+class Command(benchmark_http.Command):
+    help = (
+        "Start the development server and the production servers one "
+        "after another and load each with the same requests, to compare "
+        "their throughput and latency"
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(connections=64)
+        parser.add_argument(
+            "--servers",
+            nargs="+",
+            choices=SERVERS,
+            default=["runserver", "gunicorn"],
+        )
+        parser.add_argument("--port", type=int, default=8100)
+        parser.add_argument(
+            "--startup-timeout",
+            type=float,
+            default=30,
+            help="Seconds to wait for a server to accept connections",
+        )
+
+    def handle(self, *args, **options):
+        token = self.get_token(options)
+        results = []
+        for name in options["servers"]:
+            arguments, env = SERVERS[name]
+            port = options["port"]
+            process = subprocess.Popen(
+                [sys.executable]
+                + [argument.format(port=port) for argument in arguments],
+                cwd=settings.BASE_DIR,
+                env={**os.environ, **env},
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                self.wait_until_listening(process, port, options)
+                for url in options["urls"]:
+                    url = f"http://localhost:{port}/{url.lstrip('/')}"
+                    stats = asyncio.run(self.load(url, token, options))
+                    self.report(f"{name} {url}", stats, options)
+                    results.append((name, url, stats))
+            finally:
+                process.terminate()
+                process.wait()
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Summary"))
+        for name, url, stats in results:
+            self.stdout.write(
+                f"{name:<10} {len(stats['latencies']) / options['duration']:>8.1f} "
+                f"req/s  {url}"
+            )
+
+    def wait_until_listening(self, process, port, options):
+        deadline = time.monotonic() + options["startup_timeout"]
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(
+                    f"Server exited with status {process.returncode}"
+                )
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"Server did not listen on port {port} in time")
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from planetarium.filters import start_of_day
+from planetarium.models import AstronomyShow, ShowSession, Reservation
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the query plans of the list endpoint queries "
+        "and fail if any of them scans a planetarium table sequentially"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--disable-seqscan",
+            action="store_true",
+            help=(
+                "Discourage sequential scans, to check that an index "
+                "is usable on a database too small for the planner to pick it"
+            ),
+        )
+        parser.add_argument("--analyze", action="store_true")
+
+    def list_queries(self):
+        show_session = ShowSession.objects.order_by("-id").first()
+        reservation = Reservation.objects.order_by("-id").first()
+        if show_session is None or reservation is None:
+            raise CommandError(
+                "Seed some data first, e.g. with seed_benchmark_data"
+            )
+
+        sessions = ShowSession.objects.order_by("-show_time", "id")
+        day = timezone.localdate(show_session.show_time)
+        return [
+            ("show sessions", sessions[:20]),
+            (
+                "show sessions by date",
+                sessions.filter(
+                    show_time__gte=start_of_day(day),
+                    show_time__lt=start_of_day(day + timedelta(days=1)),
+                )[:20],
+            ),
+            (
+                "show sessions by astronomy show",
+                sessions.filter(
+                    astronomy_show_id=show_session.astronomy_show_id
+                )[:20],
+            ),
+            (
+                "show sessions by planetarium dome",
+                sessions.filter(
+                    planetarium_dome_id=show_session.planetarium_dome_id
+                )[:20],
+            ),
+            (
+                "reservations of a user",
+                Reservation.objects.filter(
+                    user_id=reservation.user_id
+                ).order_by("-created_at", "id")[:20],
+            ),
+            (
+                "astronomy shows by title",
+                AstronomyShow.objects.filter(
+                    title__icontains=show_session.astronomy_show.title[-5:]
+                ),
+            ),
+        ]
+
+    def handle(self, *args, **options):
+        seq_scans = []
+
+        with transaction.atomic():
+            if options["disable_seqscan"]:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, queryset in self.list_queries():
+                plan = queryset.explain(analyze=options["analyze"])
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(plan)
+                if "Seq Scan on planetarium_" in plan:
+                    seq_scans.append(name)
+
+        if seq_scans:
+            raise CommandError("Sequential scan in: " + ", ".join(seq_scans))
+
+        self.stdout.write(self.style.SUCCESS("All list queries use index scans"))
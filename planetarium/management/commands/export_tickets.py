@@ -0,0 +1,81 @@
+import resource
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from planetarium import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every ticket with its reservation, user, show session, "
+        "astronomy show and dome as CSV or NDJSON, streamed from a "
+        "server-side cursor"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=export.FORMATS, default="csv")
+        parser.add_argument(
+            "--output", "-o", help="File to write to, standard output by default"
+        )
+        parser.add_argument("--date-from", type=date.fromisoformat)
+        parser.add_argument("--date-to", type=date.fromisoformat)
+        parser.add_argument("--planetarium-dome", type=int)
+        parser.add_argument("--chunk-size", type=int, default=export.CHUNK_SIZE)
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help=(
+                "Let Postgres render the CSV with COPY TO STDOUT, which is "
+                "faster; timestamps are then in Postgres' format"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["copy"] and options["format"] != "csv":
+            raise CommandError("--copy only writes CSV")
+
+        queryset = export.tickets_for_export(
+            options["date_from"], options["date_to"], options["planetarium_dome"]
+        )
+        # like dumpdata, write to the stream under self.stdout, which
+        # would add a newline to every chunk
+        output = (
+            open(options["output"], "w", newline="", encoding="utf-8")
+            if options["output"]
+            else self.stdout._out
+        )
+        stats = {"rows": 0}
+        started = time.monotonic()
+        try:
+            if options["copy"]:
+                stats["rows"] = self.copy(queryset, output)
+            else:
+                for chunk in export.stream(
+                    queryset, options["format"], options["chunk_size"], stats
+                ):
+                    output.write(chunk)
+        finally:
+            if options["output"]:
+                output.close()
+        seconds = time.monotonic() - started
+
+        # the report goes to stderr, stdout may be the export itself
+        rows = stats["rows"]
+        self.stderr.write(
+            f"Exported {rows} tickets in {seconds:.2f} s "
+            f"({rows / seconds if seconds else 0:.0f} rows/s), peak memory "
+            f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB",
+            style_func=self.style.SUCCESS,
+        )
+
+    @staticmethod
+    def copy(queryset, output):
+        sql, params = queryset.query.sql_with_params()
+        output.write(export.csv_header())
+        with connection.cursor() as cursor:
+            sql = cursor.mogrify(sql, params).decode()
+            cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv)", output)
+            return cursor.rowcount
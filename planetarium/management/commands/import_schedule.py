@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from planetarium.schedule_import import (
+    FORMATS,
+    ScheduleImportError,
+    import_sessions,
+    parse_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create show sessions from a CSV, JSON or NDJSON schedule whose "
+        "sessions name their show and dome by id or by title and name; "
+        "nothing is created if any session is invalid or overlaps another"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "file", help="Schedule to import, - for standard input"
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Format of the file, by default its extension",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only check the schedule",
+        )
+        parser.add_argument("--batch-size", type=int)
+        parser.add_argument(
+            "--session-minutes",
+            type=int,
+            help="How long a session keeps its dome busy",
+        )
+
+    def handle(self, *args, **options):
+        import_format = options["format"]
+        if import_format is None:
+            import_format = os.path.splitext(options["file"])[1].lstrip(".")
+            if import_format not in FORMATS:
+                raise CommandError(
+                    "Give --format, it can't be told from the file name"
+                )
+
+        if options["file"] == "-":
+            text = sys.stdin.read()
+        else:
+            with open(options["file"], encoding="utf-8-sig", newline="") as file:
+                text = file.read()
+
+        self.started = time.monotonic()
+        try:
+            result = import_sessions(
+                parse_rows(text, import_format),
+                dry_run=options["dry_run"],
+                batch_size=options["batch_size"],
+                session_minutes=options["session_minutes"],
+                progress=self.progress,
+            )
+        except ScheduleImportError as error:
+            for row_error in error.errors:
+                where = ", ".join(
+                    filter(None, (
+                        row_error["row"] and f"row {row_error['row']}",
+                        row_error["field"],
+                    ))
+                )
+                message = row_error["message"]
+                self.stderr.write(f"{where}: {message}" if where else message)
+            raise CommandError(f"Nothing imported, {len(error.errors)} errors")
+
+        rows, timings = result["rows"], result["timings"]
+        self.stdout.write(
+            f"Read {rows} sessions in {timings['read']:.2f} s, checked for "
+            f"overlaps in {timings['check']:.2f} s, inserted in "
+            f"{timings['insert']:.2f} s, total {timings['total']:.2f} s "
+            f"({rows / timings['total'] if timings['total'] else 0:.0f} rows/s)"
+        )
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"{rows} sessions can be imported"))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Imported {len(result['created'])} sessions")
+            )
+
+    def progress(self, done, total):
+        seconds = time.monotonic() - self.started
+        self.stdout.write(
+            f"Inserted {done}/{total} sessions "
+            f"({done / seconds if seconds else 0:.0f} rows/s)"
+        )
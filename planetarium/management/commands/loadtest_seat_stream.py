@@ -0,0 +1,156 @@
+import asyncio
+import statistics
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium import seat_events
+from planetarium.models import ShowSession
+
+
+class Watcher:
+    def __init__(self, application, path, token):
+        self.application = application
+        self.path = path
+        self.token = token
+        self.status = None
+        self.snapshot = asyncio.Event()
+        self.seats_received_at = None
+        self._requested = False
+        self._disconnected = asyncio.Event()
+
+    async def receive(self):
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            if self.status != 200:
+                self.snapshot.set()
+        elif message.get("body", b"").startswith(b"event: snapshot"):
+            self.snapshot.set()
+        elif message.get("body", b"").startswith(b"event: seats"):
+            self.seats_received_at = asyncio.get_running_loop().time()
+
+    async def run(self):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"host", b"localhost"),
+                (b"authorization", f"Bearer {self.token}".encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+        await self.application(scope, self.receive, self.send)
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many seat availability streams against an in-process ASGI "
+        "application, publish one seat event and time its fan-out"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--watchers", type=int, default=1000)
+        parser.add_argument(
+            "--show-session",
+            type=int,
+            help="Show session to watch, the latest one by default",
+        )
+        parser.add_argument("--timeout", type=float, default=60)
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.order_by("id").first()
+        show_session = (
+            ShowSession.objects.filter(id=options["show_session"]).first()
+            if options["show_session"]
+            else ShowSession.objects.order_by("-id").first()
+        )
+        if user is None or show_session is None:
+            raise CommandError(
+                "Seed some data first, e.g. with seed_benchmark_data"
+            )
+
+        path = reverse(
+            "planetarium:showsession-seats-stream", args=[show_session.id]
+        )
+        token = str(AccessToken.for_user(user))
+        asyncio.run(
+            self.load_test(path, token, show_session.id, options)
+        )
+
+    async def load_test(self, path, token, show_session_id, options):
+        loop = asyncio.get_running_loop()
+        application = ASGIHandler()
+        watchers = [
+            Watcher(application, path, token)
+            for _ in range(options["watchers"])
+        ]
+
+        started = loop.time()
+        tasks = [asyncio.create_task(watcher.run()) for watcher in watchers]
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(watcher.snapshot.wait() for watcher in watchers)),
+                options["timeout"],
+            )
+            failed = [watcher for watcher in watchers if watcher.status != 200]
+            if failed:
+                raise CommandError(
+                    f"{len(failed)} streams failed with status "
+                    f"{failed[0].status}"
+                )
+            self.stdout.write(
+                f"{len(watchers)} streams open in "
+                f"{(loop.time() - started) * 1000:.0f} ms, "
+                f"{seat_events.hub.subscriber_count(show_session_id)} "
+                "hub subscribers"
+            )
+
+            published = loop.time()
+            # an empty change, so the seat map is left as it is
+            await sync_to_async(seat_events.get_broker().publish)(
+                show_session_id, {"taken": [], "released": []}
+            )
+            while any(watcher.seats_received_at is None for watcher in watchers):
+                if loop.time() - published > options["timeout"]:
+                    raise CommandError("Timed out waiting for the seat event")
+                await asyncio.sleep(0.001)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        latencies = sorted(
+            (watcher.seats_received_at - published) * 1000
+            for watcher in watchers
+        )
+        self.stdout.write(
+            "Seat event fan-out: "
+            f"p50={statistics.median(latencies):.1f} ms, "
+            f"p99={latencies[int(len(latencies) * 0.99) - 1]:.1f} ms, "
+            f"max={latencies[-1]:.1f} ms"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(watchers)} watchers served by one publish, "
+                f"{seat_events.hub.subscriber_count()} subscribers left"
+            )
+        )
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from planetarium.booking import lock_show_sessions
+from planetarium.models import ShowSession, Ticket
+
+
+class Command(BaseCommand):
+    help = "Find and repair show sessions whose tickets_sold counter drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the drifted show sessions",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = list(
+                ShowSession.objects.annotate(counted=Count("tickets"))
+                .exclude(tickets_sold=F("counted"))
+                .order_by("id")
+                .values_list("id", "tickets_sold", "counted")
+            )
+            for show_session_id, tickets_sold, counted in drifted:
+                self.stdout.write(
+                    f"Show session {show_session_id}: "
+                    f"tickets_sold={tickets_sold}, tickets={counted}"
+                )
+
+            if not drifted or options["dry_run"]:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Found {len(drifted)} drifted show sessions"
+                    )
+                )
+                return
+
+            ids = [show_session_id for show_session_id, _, _ in drifted]
+            # lock the rows like bookings do, so the recount below
+            # sees every ticket committed before it
+            lock_show_sessions(ids)
+            repaired = ShowSession.objects.filter(id__in=ids).update(
+                tickets_sold=Coalesce(
+                    Subquery(
+                        Ticket.objects.filter(show_session=OuterRef("pk"))
+                        .order_by()
+                        .values("show_session")
+                        .annotate(count=Count("id"))
+                        .values("count")
+                    ),
+                    0,
+                )
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Repaired {repaired} show sessions")
+        )
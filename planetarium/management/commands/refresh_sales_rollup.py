@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from planetarium.analytics import refresh_sales_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Add the tickets sold since the last run to the sales rollup the "
+        "analytics endpoints read, and recount drifted show sessions"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild the rollup from all tickets",
+        )
+
+    def handle(self, *args, **options):
+        result = refresh_sales_rollup(full=options["full"])
+        timings = result["timings"]
+        self.stdout.write(
+            f"Rolled up tickets up to id {result['last_ticket_id']}: "
+            f"{result['rows_updated']} rows updated in "
+            f"{timings['new_tickets']:.2f} s, "
+            f"{result['recounted_sessions']} sessions recounted in "
+            f"{timings['recount']:.2f} s, total {timings['total']:.2f} s"
+        )
+        self.stdout.write(self.style.SUCCESS("Sales rollup refreshed"))
@@ -0,0 +1,134 @@
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from planetarium.models import (
+    PlanetariumDome,
+    ShowTheme,
+    AstronomyShow,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
+
+
+class Command(BaseCommand):
+    help = "Fill the database with a large synthetic dataset for benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--domes", type=int, default=10)
+        parser.add_argument("--shows", type=int, default=1000)
+        parser.add_argument("--sessions", type=int, default=20000)
+        parser.add_argument("--tickets", type=int, default=1000000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--tickets-per-reservation", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+
+        with transaction.atomic():
+            users = get_user_model().objects.bulk_create(
+                get_user_model()(email=f"bench{index}@example.com")
+                for index in range(options["users"])
+            )
+            domes = PlanetariumDome.objects.bulk_create(
+                PlanetariumDome(
+                    name=f"Dome {index}",
+                    rows=rng.randint(10, 50),
+                    seats_in_row=rng.randint(10, 60),
+                )
+                for index in range(options["domes"])
+            )
+            themes = ShowTheme.objects.bulk_create(
+                ShowTheme(name=f"Theme {index}") for index in range(20)
+            )
+            shows = AstronomyShow.objects.bulk_create(
+                (
+                    AstronomyShow(
+                        title=f"Astronomy show {index}",
+                        description=f"Description of astronomy show {index}",
+                    )
+                    for index in range(options["shows"])
+                ),
+                batch_size=batch_size,
+            )
+            AstronomyShow.show_theme.through.objects.bulk_create(
+                (
+                    AstronomyShow.show_theme.through(
+                        astronomyshow_id=show.id,
+                        showtheme_id=rng.choice(themes).id,
+                    )
+                    for show in shows
+                ),
+                batch_size=batch_size,
+            )
+            start = timezone.now() - timedelta(days=365)
+            sessions = ShowSession.objects.bulk_create(
+                (
+                    ShowSession(
+                        astronomy_show=rng.choice(shows),
+                        planetarium_dome=rng.choice(domes),
+                        show_time=start + timedelta(
+                            minutes=rng.randrange(0, 2 * 365 * 24 * 60, 15)
+                        ),
+                    )
+                    for _ in range(options["sessions"])
+                ),
+                batch_size=batch_size,
+            )
+            self.stdout.write(
+                f"Created {len(users)} users, {len(domes)} domes, "
+                f"{len(shows)} shows and {len(sessions)} sessions"
+            )
+
+            created = self._create_tickets(sessions, users, rng, options)
+
+        self.stdout.write(self.style.SUCCESS(f"Created {created} tickets"))
+
+    def _create_tickets(self, sessions, users, rng, options):
+        tickets_left = options["tickets"]
+        per_reservation = options["tickets_per_reservation"]
+        batch_size = options["batch_size"]
+        domes = {dome.id: dome for dome in PlanetariumDome.objects.all()}
+        created = 0
+
+        for index, show_session in enumerate(sessions):
+            if tickets_left <= 0:
+                break
+            dome = domes[show_session.planetarium_dome_id]
+            count = min(
+                dome.capacity,
+                math.ceil(tickets_left / (len(sessions) - index)),
+            )
+            reservations = Reservation.objects.bulk_create(
+                Reservation(user=rng.choice(users))
+                for _ in range(math.ceil(count / per_reservation))
+            )
+            Ticket.objects.bulk_create(
+                (
+                    Ticket(
+                        row=seat // dome.seats_in_row + 1,
+                        seat=seat % dome.seats_in_row + 1,
+                        show_session=show_session,
+                        reservation=reservations[seat // per_reservation],
+                    )
+                    for seat in range(count)
+                ),
+                batch_size=batch_size,
+            )
+            show_session.tickets_sold = count
+            tickets_left -= count
+            created += count
+
+        ShowSession.objects.bulk_update(
+            sessions, ["tickets_sold"], batch_size=batch_size
+        )
+        return created
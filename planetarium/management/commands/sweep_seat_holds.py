@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from planetarium.booking import sweep_expired_holds
+from planetarium.models import ShowSession
+
+LOCAL_CACHE = "django.core.cache.backends.locmem.LocMemCache"
+
+
+class Command(BaseCommand):
+    help = (
+        "Drop expired seat holds of upcoming show sessions and announce "
+        "their seats as free; run it every minute or so (or with "
+        "--interval), holds are otherwise only dropped when their show "
+        "session is next written to"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--interval",
+            type=int,
+            help="Sweep every this many seconds until stopped",
+        )
+
+    def handle(self, *args, **options):
+        if settings.CACHES["default"]["BACKEND"] == LOCAL_CACHE:
+            # holds are kept in the cache of the process that took them
+            self.stderr.write(
+                "The default cache is a LocMemCache, so the holds of the "
+                "web workers are out of sight; set CACHE_BACKEND and "
+                "CACHE_LOCATION to the cache they share"
+            )
+
+        while True:
+            released = self.sweep(options["batch_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Released {released} seats of expired holds")
+            )
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
+
+    @staticmethod
+    def sweep(batch_size):
+        # holds of sessions that have started can't be booked anymore
+        ids = (
+            ShowSession.objects.filter(show_time__gte=timezone.now())
+            .order_by()
+            .values_list("id", flat=True)
+        )
+        batch = []
+        released = 0
+        for show_session_id in ids.iterator(chunk_size=batch_size):
+            batch.append(show_session_id)
+            if len(batch) == batch_size:
+                released += sweep_expired_holds(batch)
+                batch = []
+        return released + sweep_expired_holds(batch)
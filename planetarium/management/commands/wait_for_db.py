@@ -1,22 +1,136 @@
-from time import sleep
-from django.db import connections
+import math
+import random
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
 
 
 class Command(BaseCommand):
+    help = (
+        "Wait until the database answers a query, and optionally until "
+        "its migrations are applied, retrying with exponential backoff"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Seconds to wait in total before failing",
+        )
+        parser.add_argument(
+            "--initial-delay",
+            type=float,
+            default=0.1,
+            help="Seconds to wait after the first failed attempt",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=5,
+            help="Upper bound of the wait between attempts",
+        )
+        parser.add_argument(
+            "--check-migrations",
+            action="store_true",
+            help="Also wait until no migration is left to apply",
+        )
 
     def handle(self, *args, **options):
+        self.options = options
+        self.deadline = time.monotonic() + options["timeout"]
+        connection = connections[options["database"]]
+        timings = []
+
         self.stdout.write("Waiting for db...")
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections["default"]
-            except OperationalError:
-                self.stdout.write("Waiting...")
-                sleep(1)
+        timings.append(("connect", *self.retry(connection, self.ping)))
+        if options["check_migrations"]:
+            timings.append(
+                ("migrations", *self.retry(connection, self.migrated))
+            )
+
         self.stdout.write(
-            self.style.SUCCESS(
-                "Database has been successfully connected"
+            "Startup timings: "
+            + ", ".join(
+                f"{phase} {seconds:.2f} s ({attempts} attempts)"
+                for phase, seconds, attempts in timings
             )
+            + f", total {sum(seconds for _, seconds, _ in timings):.2f} s"
         )
+        self.stdout.write(
+            self.style.SUCCESS("Database has been successfully connected")
+        )
+
+    def retry(self, connection, attempt):
+        """Call attempt(connection) until it returns True, return the time
+        and tries.
+
+        The waits between tries grow exponentially from --initial-delay
+        up to --max-delay, with full jitter so that replicas starting
+        together do not retry in lockstep.
+        """
+        started = time.monotonic()
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                with self.connect_timeout(connection):
+                    if attempt(connection):
+                        return time.monotonic() - started, attempts
+                reason = "migrations are not applied"
+            except OperationalError as error:
+                reason = str(error).strip().split("\n")[0] or repr(error)
+
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise CommandError(
+                    f"Database not ready after {self.options['timeout']:g} s "
+                    f"and {attempts} attempts: {reason}"
+                )
+            delay = min(
+                self.options["max_delay"],
+                self.options["initial_delay"] * 2 ** (attempts - 1),
+            )
+            delay = min(remaining, random.uniform(0, delay))
+            self.stdout.write(f"Waiting {delay:.2f} s... ({reason})")
+            time.sleep(delay)
+
+    @contextmanager
+    def connect_timeout(self, connection):
+        """Give up connecting when --timeout runs out, not after the
+        driver's own timeout, which is unbounded by default."""
+        options = connection.settings_dict["OPTIONS"]
+        configured = options.get("connect_timeout")
+        # whole seconds, as libpq takes them
+        remaining = max(1, math.ceil(self.deadline - time.monotonic()))
+        options["connect_timeout"] = min(remaining, configured or remaining)
+        try:
+            yield
+        finally:
+            if configured is None:
+                del options["connect_timeout"]
+            else:
+                options["connect_timeout"] = configured
+
+    @staticmethod
+    def ping(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+        except OperationalError:
+            # drop the broken connection, the next try opens a new one
+            connection.close()
+            raise
+        return True
+
+    @staticmethod
+    def migrated(connection):
+        executor = MigrationExecutor(connection)
+        targets = executor.loader.graph.leaf_nodes()
+        return not executor.migration_plan(targets)
@@ -0,0 +1,42 @@
+# Generated by Django 4.2 on 2026-10-18 19:28
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+import django.db.models.functions.datetime
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planetarium', '0002_alter_astronomyshow_options_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='astronomyshow',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='astronomyshow_title_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', '-created_at'], name='reservation_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='showsession',
+            index=models.Index(fields=['show_time'], name='showsession_show_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='showsession',
+            index=models.Index(fields=['planetarium_dome', 'show_time'], name='showsession_dome_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='showsession',
+            index=models.Index(fields=['astronomy_show', 'show_time'], name='showsession_show_show_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='showsession',
+            index=models.Index(django.db.models.functions.datetime.TruncDate('show_time'), name='showsession_show_date_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2 on 2026-10-18 19:34
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_VECTOR_TRIGGER = """
+CREATE FUNCTION planetarium_astronomyshow_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER planetarium_astronomyshow_search_vector
+BEFORE INSERT OR UPDATE OF title, description, search_vector
+ON planetarium_astronomyshow
+FOR EACH ROW EXECUTE FUNCTION planetarium_astronomyshow_search_vector();
+
+UPDATE planetarium_astronomyshow SET search_vector = NULL;
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER planetarium_astronomyshow_search_vector
+ON planetarium_astronomyshow;
+DROP FUNCTION planetarium_astronomyshow_search_vector();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planetarium', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='astronomyshow',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='astronomyshow',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='astronomyshow_search_idx'),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-18 19:42
+
+from django.db import migrations, models
+
+
+COUNT_TICKETS_SOLD = """
+UPDATE planetarium_showsession
+SET tickets_sold = counts.tickets_sold
+FROM (
+    SELECT show_session_id, COUNT(*) AS tickets_sold
+    FROM planetarium_ticket
+    GROUP BY show_session_id
+) AS counts
+WHERE planetarium_showsession.id = counts.show_session_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planetarium', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='showsession',
+            name='tickets_sold',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(COUNT_TICKETS_SOLD, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 20:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planetarium', '0006_showsession_tickets_sold'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='showsession',
+            name='showsession_show_date_idx',
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-18 20:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planetarium', '0007_remove_showsession_show_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('last_ticket_id', models.BigIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ShowSessionRowSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row', models.IntegerField()),
+                ('tickets_sold', models.IntegerField()),
+                ('show_session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='row_sales', to='planetarium.showsession')),
+            ],
+            options={
+                'unique_together': {('show_session', 'row')},
+            },
+        ),
+    ]
@@ -1,12 +1,25 @@
+import re
+
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+    TrigramSimilarity,
+)
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 
 class PlanetariumDome(models.Model):
     name = models.CharField(max_length=255)
     rows = models.IntegerField()
     seats_in_row = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def capacity(self) -> int:
@@ -18,20 +31,80 @@ class PlanetariumDome(models.Model):
 
 class ShowTheme(models.Model):
     name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
 
+class AstronomyShowQuerySet(models.QuerySet):
+    def touch(self):
+        return self.update(updated_at=timezone.now())
+
+    def search(self, text):
+        """Rank shows by full-text match of title and description.
+
+        Every word is matched as a prefix. Only when nothing matches are
+        titles that are trigram-similar to the text returned instead, so
+        typos still find something.
+        """
+        matches, similar = self._search(text)
+        return matches if matches.exists() else similar
+
+    async def asearch(self, text):
+        matches, similar = self._search(text)
+        return matches if await matches.aexists() else similar
+
+    def _search(self, text):
+        words = re.findall(r"\w+", text)
+        if not words:
+            return self.none(), self.none()
+
+        query = SearchQuery(
+            " & ".join(f"{word}:*" for word in words),
+            search_type="raw",
+            config="english",
+        )
+        matches = (
+            self.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "title")
+        )
+        similar = (
+            self.annotate(
+                title_upper=Upper("title"),
+                similarity=TrigramSimilarity(Upper("title"), text.upper()),
+            )
+            .filter(title_upper__trigram_similar=text.upper())
+            .order_by("-similarity", "title")
+        )
+        return matches, similar
+
+
 class AstronomyShow(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     show_theme = models.ManyToManyField(
         ShowTheme, related_name="astronomy_shows"
     )
+    # weighted title and description lexemes, kept up to date by the
+    # planetarium_astronomyshow_search_vector trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+    # also bumped when its show themes change, see planetarium.signals
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AstronomyShowQuerySet.as_manager()
 
     class Meta:
         ordering = ["title"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="astronomyshow_search_idx"),
+            # serves title__icontains, which compiles to UPPER(title) LIKE
+            GinIndex(
+                OpClass(Upper("title"), name="gin_trgm_ops"),
+                name="astronomyshow_title_trgm",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -45,12 +118,38 @@ class Reservation(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"],
+                name="reservation_user_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return (f"Reservation by {self.user.username}"
                 f" created at {self.created_at}")
 
 
+class ShowSessionQuerySet(models.QuerySet):
+    def touch(self):
+        return self.update(updated_at=timezone.now())
+
+    def with_tickets_available(self):
+        return self.annotate(
+            tickets_available_count=(
+                F("planetarium_dome__rows")
+                * F("planetarium_dome__seats_in_row")
+                - F("tickets_sold")
+            )
+        )
+
+    def add_tickets_sold(self, count):
+        return self.update(
+            tickets_sold=F("tickets_sold") + count,
+            updated_at=timezone.now(),
+        )
+
+
 class ShowSession(models.Model):
     astronomy_show = models.ForeignKey(
         AstronomyShow,
@@ -63,13 +162,33 @@ class ShowSession(models.Model):
         related_name="show_sessions"
     )
     show_time = models.DateTimeField()
+    # kept in step with the session's tickets in the same transaction;
+    # reconcile_ticket_counters repairs any drift
+    tickets_sold = models.IntegerField(default=0, editable=False)
+    # also bumped whenever one of its tickets is sold or released
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ShowSessionQuerySet.as_manager()
 
     class Meta:
         ordering = ["-show_time"]
+        indexes = [
+            models.Index(fields=["show_time"], name="showsession_show_time_idx"),
+            models.Index(
+                fields=["planetarium_dome", "show_time"],
+                name="showsession_dome_time_idx",
+            ),
+            models.Index(
+                fields=["astronomy_show", "show_time"],
+                name="showsession_show_show_time_idx",
+            ),
+        ]
 
     @property
     def tickets_available(self):
-        return self.planetarium_dome.capacity - self.tickets.count()
+        if hasattr(self, "tickets_available_count"):
+            return self.tickets_available_count
+        return self.planetarium_dome.capacity - self.tickets_sold
 
     def __str__(self):
         return (f"Show: {self.astronomy_show.title} "
@@ -112,6 +231,22 @@ class Ticket(models.Model):
                     }
                 )
 
+    @staticmethod
+    def taken_seats(seats):
+        """Return which of the (show_session_id, row, seat) triples are sold."""
+        if not seats:
+            return set()
+
+        conditions = Q()
+        for show_session_id, row, seat in seats:
+            conditions |= Q(show_session_id=show_session_id, row=row, seat=seat)
+
+        return set(
+            Ticket.objects.filter(conditions)
+            .order_by()
+            .values_list("show_session_id", "row", "seat")
+        )
+
     def clean(self):
         Ticket.validate_ticket(
             self.row,
@@ -136,3 +271,30 @@ class Ticket(models.Model):
         return (
             f"{str(self.show_session)} (row: {self.row}, seat: {self.seat})"
         )
+
+
+class ShowSessionRowSales(models.Model):
+    """Tickets sold per row of a show session, rolled up from Ticket by
+    planetarium.analytics so that reports don't scan the tickets."""
+
+    show_session = models.ForeignKey(
+        ShowSession,
+        on_delete=models.CASCADE,
+        related_name="row_sales"
+    )
+    row = models.IntegerField()
+    tickets_sold = models.IntegerField()
+
+    class Meta:
+        unique_together = ["show_session", "row"]
+
+
+class RollupState(models.Model):
+    """How far a rollup has been refreshed."""
+
+    name = models.CharField(max_length=64, primary_key=True)
+    last_ticket_id = models.BigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,185 @@
+from django.conf import settings
+from rest_framework.pagination import (
+    CursorPagination,
+    LimitOffsetPagination,
+    _reverse_ordering,
+)
+from rest_framework.response import Response
+
+
+class AdminLimitOffsetPagination(LimitOffsetPagination):
+    default_limit = settings.PAGINATION["PAGE_SIZE"]
+    max_limit = settings.PAGINATION["MAX_PAGE_SIZE"]
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() on the async ORM."""
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [
+            obj async for obj in queryset[self.offset:self.offset + self.limit]
+        ]
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination that seeks on the ordering key instead of OFFSET.
+
+    Staff users may pass ``limit``/``offset`` instead of a cursor to jump
+    to arbitrary positions, e.g. from admin tools.
+    """
+
+    page_size = settings.PAGINATION["PAGE_SIZE"]
+    page_size_query_param = "page_size"
+    max_page_size = settings.PAGINATION["MAX_PAGE_SIZE"]
+    offset_pagination_class = AdminLimitOffsetPagination
+
+    offset_paginator = None
+
+    def use_offset_pagination(self, request):
+        return bool(
+            request.user
+            and request.user.is_staff
+            and {"limit", "offset"} & set(request.query_params)
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_offset_pagination(request):
+            self.offset_paginator = self.offset_pagination_class()
+            return self.offset_paginator.paginate_queryset(
+                queryset.order_by(*self.ordering), request, view
+            )
+
+        queryset = self.seek(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.turn_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() on the async ORM."""
+        if self.use_offset_pagination(request):
+            self.offset_paginator = self.offset_pagination_class()
+            return await self.offset_paginator.apaginate_queryset(
+                queryset.order_by(*self.ordering), request, view
+            )
+
+        queryset = self.seek(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.turn_page([obj async for obj in queryset])
+
+    # CursorPagination.paginate_queryset(), split around the one query it
+    # runs so that query can go through either ORM interface
+
+    def seek(self, queryset, request, view=None):
+        """Return the queryset of the requested page plus one row."""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            order = self.ordering[0]
+            is_reversed = order.startswith("-")
+            order_attr = order.lstrip("-")
+
+            if self.cursor.reverse != is_reversed:
+                kwargs = {order_attr + "__lt": current_position}
+            else:
+                kwargs = {order_attr + "__gt": current_position}
+
+            queryset = queryset.filter(**kwargs)
+
+        return queryset[offset:offset + self.page_size + 1]
+
+    def turn_page(self, results):
+        """Set the page and its links from the rows fetched by seek()."""
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator:
+            return self.offset_paginator.get_paginated_response(data)
+
+        if settings.PAGINATION["RESPONSE_SHAPE"] == "link_header":
+            links = [
+                f'<{url}>; rel="{rel}"'
+                for url, rel in (
+                    (self.get_next_link(), "next"),
+                    (self.get_previous_link(), "prev"),
+                )
+                if url
+            ]
+            headers = {"Link": ", ".join(links)} if links else None
+            return Response(data, headers=headers)
+
+        return super().get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        if settings.PAGINATION["RESPONSE_SHAPE"] == "link_header":
+            return schema
+        return super().get_paginated_response_schema(schema)
+
+
+class ShowSessionPagination(KeysetPagination):
+    ordering = ("-show_time", "id")
+
+
+class ReservationPagination(KeysetPagination):
+    ordering = ("-created_at", "id")
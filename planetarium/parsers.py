@@ -0,0 +1,29 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .schedule_import import ScheduleImportError, parse_rows
+
+
+class _RowsParser(BaseParser):
+    """Read a body of rows as a list of dicts, like JSONParser a JSON array."""
+
+    import_format = None
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", "utf-8")
+        try:
+            return parse_rows(stream.read().decode(encoding), self.import_format)
+        except ScheduleImportError as error:
+            raise ParseError(error.errors[0]["message"])
+        except UnicodeDecodeError as error:
+            raise ParseError(f"Invalid {self.import_format} body: {error}")
+
+
+class CSVParser(_RowsParser):
+    media_type = "text/csv"
+    import_format = "csv"
+
+
+class NDJSONParser(_RowsParser):
+    media_type = "application/x-ndjson"
+    import_format = "ndjson"
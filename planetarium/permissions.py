@@ -1,6 +1,10 @@
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
 
+def is_staff(request):
+    return bool(request.user and request.user.is_staff)
+
+
 class IsAdminOrIfAuthenticatedReadOnly(BasePermission):
     def has_permission(self, request, view):
         return bool(
@@ -9,5 +13,12 @@ class IsAdminOrIfAuthenticatedReadOnly(BasePermission):
                 and request.user
                 and request.user.is_authenticated
             )
-            or (request.user and request.user.is_staff)
+            or is_staff(request)
         )
+
+
+class IsStaff(BasePermission):
+    """Staff only, for reports and other back office endpoints."""
+
+    def has_permission(self, request, view):
+        return is_staff(request)
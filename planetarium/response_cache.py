@@ -0,0 +1,158 @@
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import parse_etags, quote_etag
+from rest_framework import status
+
+GENERATION_KEY = "planetarium:response_cache:generation"
+
+_lock = threading.Lock()
+_local = OrderedDict()
+_stats = Counter()
+
+
+def _shared_cache():
+    return caches[settings.RESPONSE_CACHE["CACHE_ALIAS"]]
+
+
+def _generation():
+    generation = _shared_cache().get(GENERATION_KEY)
+    if generation is None:
+        _shared_cache().add(GENERATION_KEY, 1, timeout=None)
+        generation = _shared_cache().get(GENERATION_KEY, 1)
+    return generation
+
+
+def _local_get(key):
+    with _lock:
+        entry = _local.get(key)
+        if entry is not None:
+            _local.move_to_end(key)
+        return entry
+
+
+def _local_set(key, entry):
+    with _lock:
+        _local[key] = entry
+        _local.move_to_end(key)
+        while len(_local) > settings.RESPONSE_CACHE["LOCAL_MAX_ENTRIES"]:
+            _local.popitem(last=False)
+
+
+def cache_key(request):
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    query = "&".join(f"{name}={value}" for name, value in params)
+    return f"planetarium:response:{_generation()}:{request.path}?{query}"
+
+
+def invalidate():
+    """Drop every cached catalog response, here and in the shared cache."""
+    try:
+        _shared_cache().incr(GENERATION_KEY)
+    except ValueError:
+        _shared_cache().add(GENERATION_KEY, 2, timeout=None)
+    with _lock:
+        _local.clear()
+    _stats["invalidations"] += 1
+
+
+def stats():
+    with _lock:
+        return {**_stats, "local_entries": len(_local)}
+
+
+def _build_response(request, etag, content):
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        _stats["not_modified"] += 1
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type="application/json")
+    response["ETag"] = etag
+    return response
+
+
+class CachedResponseMixin:
+    """Serve list and retrieve from a cache of rendered JSON responses.
+
+    Entries live in a small in-process LRU in front of the cache alias
+    named by RESPONSE_CACHE["CACHE_ALIAS"], and are keyed by path plus
+    sorted query params. Writes to the catalog models invalidate all of
+    them (see planetarium.signals).
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.acached_response(
+            super().alist, request, *args, **kwargs
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached_response(
+            super().aretrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.accepted_renderer.format != "json":
+            return handler(request, *args, **kwargs)
+
+        key, entry = _lookup(request)
+        if entry is not None:
+            return _build_response(request, *entry)
+
+        response = handler(request, *args, **kwargs)
+        return _store(request, key, response)
+
+    async def acached_response(self, handler, request, *args, **kwargs):
+        if request.accepted_renderer.format != "json":
+            return await handler(request, *args, **kwargs)
+
+        key, entry = await sync_to_async(_lookup)(request)
+        if entry is not None:
+            return _build_response(request, *entry)
+
+        response = await handler(request, *args, **kwargs)
+        return await sync_to_async(_store)(request, key, response)
+
+
+def _lookup(request):
+    """Return the cache key of a request and its cached entry, if any."""
+    key = cache_key(request)
+    entry = _local_get(key)
+    if entry is not None:
+        _stats["local_hits"] += 1
+        return key, entry
+
+    entry = _shared_cache().get(key)
+    if entry is not None:
+        _stats["shared_hits"] += 1
+        _local_set(key, entry)
+    else:
+        _stats["misses"] += 1
+    return key, entry
+
+
+def _store(request, key, response):
+    if response.status_code != status.HTTP_200_OK:
+        return response
+
+    content = request.accepted_renderer.render(
+        response.data, request.accepted_media_type
+    )
+    entry = (quote_etag(hashlib.md5(content).hexdigest()), content)
+    _local_set(key, entry)
+    _shared_cache().set(key, entry, settings.RESPONSE_CACHE["TIMEOUT"])
+    return _build_response(request, *entry)
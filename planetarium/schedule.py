@@ -0,0 +1,74 @@
+"""Per-day aggregates of the show sessions, for calendar views.
+
+calendar_days() computes them in one grouped query. Days before today
+can't change anymore, so get_calendar() keeps the rows of those in the
+cache for good and only queries the rest of a range on later calls.
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, F, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .filters import start_of_day
+from .models import ShowSession
+
+
+def calendar_days(date_from, date_to, planetarium_dome=None, by_dome=False):
+    """Return the session count, capacity, seats sold and first show
+    time of the days date_from..date_to that have sessions, per dome if
+    by_dome, ordered by date."""
+    queryset = ShowSession.objects.filter(
+        show_time__gte=start_of_day(date_from),
+        show_time__lt=start_of_day(date_to + timedelta(days=1)),
+    )
+    if planetarium_dome is not None:
+        queryset = queryset.filter(planetarium_dome_id=planetarium_dome)
+
+    group_by = ["date", "planetarium_dome"] if by_dome else ["date"]
+    return list(
+        queryset.annotate(
+            date=TruncDate("show_time", tzinfo=timezone.get_current_timezone())
+        )
+        .values(*group_by)
+        .annotate(
+            sessions=Count("id"),
+            capacity=Sum(
+                F("planetarium_dome__rows") * F("planetarium_dome__seats_in_row")
+            ),
+            seats_sold=Sum("tickets_sold"),
+            first_show_time=Min("show_time"),
+        )
+        # replaces the default ordering, which would be grouped by too
+        .order_by(*group_by)
+    )
+
+
+def _cache_key(date_from, date_to, planetarium_dome, by_dome):
+    return (
+        f"planetarium:calendar:{timezone.get_current_timezone_name()}:"
+        f"{date_from}:{date_to}:{planetarium_dome}:{by_dome}"
+    )
+
+
+def get_calendar(date_from, date_to, planetarium_dome=None, by_dome=False):
+    """calendar_days() with the days before today cached forever."""
+    today = timezone.localdate()
+    if date_from >= today:
+        return calendar_days(date_from, date_to, planetarium_dome, by_dome)
+
+    past_to = min(date_to, today - timedelta(days=1))
+    key = _cache_key(date_from, past_to, planetarium_dome, by_dome)
+    past_days = cache.get(key)
+    if past_days is None:
+        days = calendar_days(date_from, date_to, planetarium_dome, by_dome)
+        cache.set(
+            key, [day for day in days if day["date"] <= past_to], timeout=None
+        )
+        return days
+
+    if date_to < today:
+        return past_days
+    return past_days + calendar_days(today, date_to, planetarium_dome, by_dome)
@@ -0,0 +1,266 @@
+"""Bulk import of show sessions, e.g. a season's schedule.
+
+Each session names its astronomy show and dome by id, or by title and
+name. The references are resolved with one query per table. A session
+keeps its dome busy for SCHEDULE_IMPORT["SESSION_MINUTES"], and sessions
+of the same dome, imported or already scheduled, must not overlap; this
+is checked in memory after one query for the sessions around the
+imported ones. Either every session is created, with bulk_create() in
+batches, or none is and ScheduleImportError lists what is wrong.
+"""
+
+import csv
+import io
+import json
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AstronomyShow, PlanetariumDome, ShowSession
+
+FORMATS = ("csv", "json", "ndjson")
+FIELDS = ("astronomy_show", "planetarium_dome", "show_time")
+
+
+class ScheduleImportError(Exception):
+    """The sessions can't be imported; errors lists why, row by row."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} errors in the schedule")
+        self.errors = errors
+
+
+def _error(row, field, message):
+    return {"row": row, "field": field, "message": message}
+
+
+def parse_rows(text, import_format):
+    """Return the sessions in a CSV, JSON array or NDJSON text as dicts."""
+    if import_format == "csv":
+        return list(csv.DictReader(io.StringIO(text)))
+
+    try:
+        if import_format == "json":
+            rows = json.loads(text)
+        else:
+            rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    except ValueError as error:
+        raise ScheduleImportError([_error(None, None, f"Invalid JSON: {error}")])
+    if not isinstance(rows, list):
+        raise ScheduleImportError(
+            [_error(None, None, "Expected a list of show sessions.")]
+        )
+    return rows
+
+
+def _reference(value):
+    """Return an id as an int and anything else as a stripped name."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    value = str(value).strip()
+    return int(value) if value.isdigit() else value
+
+
+def _read_row(number, row, errors):
+    if not isinstance(row, dict):
+        errors.append(_error(number, None, "Expected an object."))
+        return None
+
+    session = {}
+    for field in FIELDS:
+        value = row.get(field)
+        if value is None or value == "":
+            errors.append(_error(number, field, "This field is required."))
+        elif field == "show_time":
+            show_time = value if isinstance(value, datetime) else None
+            try:
+                show_time = show_time or parse_datetime(str(value).strip())
+            except ValueError:
+                pass
+            if show_time is None:
+                errors.append(
+                    _error(number, field, f"Invalid date and time: {value!r}.")
+                )
+                continue
+            if timezone.is_naive(show_time):
+                # as DRF reads them, in the current time zone
+                show_time = timezone.make_aware(show_time)
+            session[field] = show_time
+        else:
+            session[field] = _reference(value)
+    return session if len(session) == len(FIELDS) else None
+
+
+def _resolve(model, name_field, references):
+    """Map each reference to the id of the object it names, in one query.
+
+    Names that match several objects map to None.
+    """
+    ids = {ref for ref in references if isinstance(ref, int)}
+    names = set(references) - ids
+    matches = model.objects.filter(
+        Q(id__in=ids) | Q(**{f"{name_field}__in": names})
+    ).order_by().values_list("id", name_field)
+
+    resolved = {}
+    for object_id, name in matches:
+        if object_id in ids:
+            resolved[object_id] = object_id
+        if name in names:
+            resolved[name] = None if name in resolved else object_id
+    return resolved
+
+
+def _find_overlaps(sessions, session_length):
+    """Report sessions starting within session_length of another in their dome.
+
+    sessions are (dome id, show time, row number or None for sessions
+    already scheduled) tuples.
+    """
+    by_dome = defaultdict(list)
+    for dome_id, show_time, number in sessions:
+        by_dome[dome_id].append((show_time, number))
+
+    errors = []
+    for dome_id, dome_sessions in by_dome.items():
+        dome_sessions.sort(key=lambda session: session[0])
+        # sorted by start, a session can only overlap the ones next to it
+        for (previous_time, previous), (show_time, number) in zip(
+            dome_sessions, dome_sessions[1:]
+        ):
+            if (
+                show_time - previous_time >= session_length
+                or previous is number is None
+            ):
+                continue
+            other = (
+                f"row {previous}" if previous is not None
+                else f"the session at {previous_time.isoformat()}"
+            )
+            if number is not None:
+                errors.append(_error(number, "show_time", f"Overlaps {other}."))
+            else:
+                errors.append(
+                    _error(
+                        previous,
+                        "show_time",
+                        f"Overlaps the session at {show_time.isoformat()}.",
+                    )
+                )
+    return errors
+
+
+def import_sessions(
+    rows, dry_run=False, batch_size=None, session_minutes=None, progress=None
+):
+    """Create a show session per row, or raise ScheduleImportError.
+
+    Rows are dicts of FIELDS, numbered from 1 in errors. progress, if
+    given, is called with the number of sessions created so far and the
+    total after each batch. Returns the number of rows, the ids created
+    (none on a dry run) and the seconds spent in each step.
+    """
+    options = settings.SCHEDULE_IMPORT
+    batch_size = batch_size or options["BATCH_SIZE"]
+    session_length = timedelta(
+        minutes=session_minutes or options["SESSION_MINUTES"]
+    )
+    timings = {}
+    started = time.monotonic()
+
+    errors = []
+    sessions = {}
+    for number, row in enumerate(rows, start=1):
+        session = _read_row(number, row, errors)
+        if session is not None:
+            sessions[number] = session
+
+    shows = _resolve(
+        AstronomyShow,
+        "title",
+        {session["astronomy_show"] for session in sessions.values()},
+    )
+    domes = _resolve(
+        PlanetariumDome,
+        "name",
+        {session["planetarium_dome"] for session in sessions.values()},
+    )
+    references = (("astronomy_show", shows), ("planetarium_dome", domes))
+    for number, session in list(sessions.items()):
+        for field, resolved in references:
+            reference = session[field]
+            if reference not in resolved:
+                message = f"Not found: {reference!r}."
+            elif resolved[reference] is None:
+                message = f"Several match {reference!r}, use the id."
+            else:
+                session[field] = resolved[reference]
+                continue
+            errors.append(_error(number, field, message))
+            sessions.pop(number)
+            break
+    timings["read"] = time.monotonic() - started
+
+    with transaction.atomic():
+        dome_ids = sorted({s["planetarium_dome"] for s in sessions.values()})
+        if not dry_run:
+            # imports into the same domes run one at a time, so two of
+            # them can't both pass the overlap check
+            list(
+                PlanetariumDome.objects.select_for_update()
+                .filter(id__in=dome_ids)
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+
+        step = time.monotonic()
+        scheduled = []
+        if sessions:
+            show_times = [s["show_time"] for s in sessions.values()]
+            scheduled = ShowSession.objects.filter(
+                planetarium_dome__in=dome_ids,
+                show_time__gt=min(show_times) - session_length,
+                show_time__lt=max(show_times) + session_length,
+            ).order_by().values_list("planetarium_dome_id", "show_time")
+        errors += _find_overlaps(
+            [
+                (s["planetarium_dome"], s["show_time"], number)
+                for number, s in sessions.items()
+            ]
+            + [(dome_id, show_time, None) for dome_id, show_time in scheduled],
+            session_length,
+        )
+        timings["check"] = time.monotonic() - step
+
+        if errors:
+            errors.sort(key=lambda error: error["row"] or 0)
+            raise ScheduleImportError(errors)
+
+        step = time.monotonic()
+        created = []
+        if not dry_run:
+            new_sessions = [
+                ShowSession(
+                    astronomy_show_id=session["astronomy_show"],
+                    planetarium_dome_id=session["planetarium_dome"],
+                    show_time=session["show_time"],
+                )
+                for session in sessions.values()
+            ]
+            for start in range(0, len(new_sessions), batch_size):
+                batch = ShowSession.objects.bulk_create(
+                    new_sessions[start:start + batch_size]
+                )
+                created += [session.id for session in batch]
+                if progress is not None:
+                    progress(len(created), len(new_sessions))
+        timings["insert"] = time.monotonic() - step
+
+    timings["total"] = time.monotonic() - started
+    return {"rows": len(sessions), "created": created, "timings": timings}
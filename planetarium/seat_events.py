@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+import psycopg2
+from django.conf import settings
+from django.db import connection, connections
+
+from .seat_map import invalidate_seat_maps
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "planetarium_seats"
+# NOTIFY payloads are limited to 8000 bytes
+SEATS_PER_NOTIFICATION = 500
+# longest wait between attempts to reopen a lost listening connection
+MAX_RECONNECT_SECONDS = 30
+
+
+class SeatEventHub:
+    """Fans seat events out to the live streams of this process.
+
+    Every stream owns an asyncio queue on its event loop; events may be
+    dispatched from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, show_session_id):
+        queue = asyncio.Queue(maxsize=settings.SEAT_EVENTS["QUEUE_SIZE"])
+        subscriber = (queue, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[show_session_id].add(subscriber)
+        return queue
+
+    def unsubscribe(self, show_session_id, queue):
+        with self._lock:
+            subscribers = self._subscribers[show_session_id]
+            subscribers.difference_update(
+                {subscriber for subscriber in subscribers if subscriber[0] is queue}
+            )
+            if not subscribers:
+                del self._subscribers[show_session_id]
+
+    def subscriber_count(self, show_session_id=None):
+        with self._lock:
+            if show_session_id is not None:
+                return len(self._subscribers.get(show_session_id, ()))
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def dispatch(self, show_session_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(show_session_id, ()))
+        for queue, loop in subscribers:
+            loop.call_soon_threadsafe(_put, queue, event)
+
+    def resync(self, loop):
+        """Make the streams of an event loop start over from a snapshot."""
+        with self._lock:
+            queues = [
+                queue
+                for subscribers in self._subscribers.values()
+                for queue, subscriber_loop in subscribers
+                if subscriber_loop is loop
+            ]
+        for queue in queues:
+            loop.call_soon_threadsafe(_resync, queue)
+
+
+def _put(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # the watcher fell behind: drop its backlog and let it resync
+        _resync(queue)
+
+
+def _resync(queue):
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(None)
+
+
+class InMemoryBroker:
+    """Delivers events to the streams of the publishing process only."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def publish(self, show_session_id, event):
+        self.hub.dispatch(show_session_id, event)
+
+    async def listen(self):
+        pass
+
+
+class PostgresBroker:
+    """Delivers events to every process through LISTEN/NOTIFY.
+
+    Each process keeps one listening connection, however many streams it
+    serves, and fans the notifications out through its hub. A lost
+    connection is reopened with backoff, after which the streams start
+    over from a snapshot.
+    """
+
+    def __init__(self, hub):
+        self.hub = hub
+        # event loop -> task opening its listening connection
+        self._listeners = {}
+
+    def publish(self, show_session_id, event):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, %s)",
+                [CHANNEL, json.dumps({"show_session": show_session_id, **event})],
+            )
+
+    async def listen(self):
+        loop = asyncio.get_running_loop()
+        task = self._listeners.get(loop)
+        if task is None:
+            task = self._listeners[loop] = loop.create_task(self._start(loop))
+        # streams opened meanwhile wait for the same connection
+        await asyncio.shield(task)
+
+    async def _start(self, loop):
+        try:
+            await self._open(loop)
+        except BaseException:
+            # the next stream to open retries
+            del self._listeners[loop]
+            raise
+
+    async def _reconnect(self, loop):
+        delay = 1
+        while True:
+            try:
+                await self._open(loop)
+            except Exception:
+                logger.warning(
+                    "Could not reopen the seat events connection, "
+                    "retrying in %s s",
+                    delay,
+                    exc_info=True,
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_SECONDS)
+            else:
+                # the events sent meanwhile are lost
+                self.hub.resync(loop)
+                return
+
+    async def _open(self, loop):
+        params = connections["default"].get_connection_params()
+        # connecting blocks, and would stall every stream of the loop
+        listener = await loop.run_in_executor(None, self._connect, params)
+        # a connection lost by the server no longer reports its descriptor
+        fileno = listener.fileno()
+        loop.add_reader(fileno, self._receive, listener, fileno)
+
+    @staticmethod
+    def _connect(params):
+        listener = psycopg2.connect(**params)
+        listener.set_isolation_level(
+            psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT
+        )
+        listener.cursor().execute(f"LISTEN {CHANNEL}")
+        return listener
+
+    def _receive(self, listener, fileno):
+        try:
+            listener.poll()
+        except psycopg2.Error:
+            logger.exception("Lost the seat events connection")
+            loop = asyncio.get_running_loop()
+            loop.remove_reader(fileno)
+            listener.close()
+            # new streams wait for the reconnection
+            self._listeners[loop] = loop.create_task(self._reconnect(loop))
+            return
+
+        while listener.notifies:
+            notification = listener.notifies.pop(0)
+            try:
+                event = json.loads(notification.payload)
+                self.hub.dispatch(event.pop("show_session"), event)
+            except (ValueError, KeyError):
+                logger.warning("Ignoring seat event %r", notification.payload)
+
+
+hub = SeatEventHub()
+
+BROKERS = {
+    "memory": InMemoryBroker,
+    "postgres": PostgresBroker,
+}
+_brokers = {}
+
+
+def get_broker():
+    name = settings.SEAT_EVENTS["BROKER"]
+    if name not in _brokers:
+        _brokers[name] = BROKERS[name](hub)
+    return _brokers[name]
+
+
+def seats_changed(taken=(), released=()):
+    """Propagate committed seat changes to seat maps and live streams.
+
+    taken and released are (show_session_id, row, seat) triples.
+    """
+    invalidate_seat_maps(
+        show_session_id for show_session_id, _, _ in (*taken, *released)
+    )
+    publish_seat_changes(taken=taken, released=released)
+
+
+def publish_seat_changes(taken=(), released=()):
+    """Send seat changes to the live streams only, e.g. for seat holds."""
+    changes = defaultdict(lambda: {"taken": [], "released": []})
+    for show_session_id, row, seat in taken:
+        changes[show_session_id]["taken"].append([row, seat])
+    for show_session_id, row, seat in released:
+        changes[show_session_id]["released"].append([row, seat])
+
+    broker = get_broker()
+    for show_session_id, change in changes.items():
+        for start in range(
+            0,
+            max(len(change["taken"]), len(change["released"])),
+            SEATS_PER_NOTIFICATION,
+        ):
+            broker.publish(
+                show_session_id,
+                {
+                    kind: seats[start:start + SEATS_PER_NOTIFICATION]
+                    for kind, seats in change.items()
+                },
+            )
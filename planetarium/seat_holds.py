@@ -0,0 +1,164 @@
+import secrets
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+from .seat_map import get_seat_map
+
+Hold = namedtuple("Hold", ("id", "show_session_id", "user_id", "expires_at", "seats"))
+
+# holds are kept this long after they expire, so their release is still
+# reflected in the version of the session's seats
+EXPIRED_RETENTION = 60
+
+
+class SeatHolds:
+    """The seat holds of one show session, stored as one cache entry.
+
+    Holds map an id to (user_id, expires_at, seats) with expires_at a
+    Unix timestamp and seats a tuple of (row, seat). Expired holds are
+    ignored by readers and dropped by the next writer (see
+    planetarium.booking), which must hold the session's row lock.
+    """
+
+    def __init__(self, show_session_id, holds=None, changed_at=0.0):
+        self.show_session_id = show_session_id
+        self.holds = dict(holds or {})
+        self.changed_at = changed_at
+
+    @classmethod
+    def load(cls, show_session_id):
+        return cls._from_cached(
+            show_session_id, cache.get(_cache_key(show_session_id))
+        )
+
+    @classmethod
+    def load_many(cls, show_session_ids):
+        cached = cache.get_many([_cache_key(pk) for pk in show_session_ids])
+        return [
+            cls._from_cached(pk, cached.get(_cache_key(pk)))
+            for pk in show_session_ids
+        ]
+
+    @classmethod
+    def _from_cached(cls, show_session_id, cached):
+        if cached is None:
+            return cls(show_session_id)
+        holds, changed_at = cached
+        return cls(show_session_id, holds, changed_at)
+
+    def save(self, now):
+        self.changed_at = now
+        key = _cache_key(self.show_session_id)
+        if not self.holds:
+            cache.set(key, ({}, now), EXPIRED_RETENTION)
+            return
+        expires_at = max(expires_at for _, expires_at, _ in self.holds.values())
+        cache.set(
+            key,
+            (self.holds, now),
+            int(expires_at - now) + 1 + EXPIRED_RETENTION,
+        )
+
+    def live(self, now):
+        """Return the holds that have not expired, as Hold tuples."""
+        return [
+            Hold(hold_id, self.show_session_id, user_id, expires_at, seats)
+            for hold_id, (user_id, expires_at, seats) in self.holds.items()
+            if expires_at > now
+        ]
+
+    def get(self, hold_id, now):
+        for hold in self.live(now):
+            if hold.id == hold_id:
+                return hold
+        return None
+
+    def held_seats(self, now, exclude=None):
+        return {
+            seat
+            for hold in self.live(now)
+            if hold.id != exclude
+            for seat in hold.seats
+        }
+
+    def add(self, user_id, expires_at, seats):
+        hold_id = f"{self.show_session_id}.{secrets.token_hex(8)}"
+        self.holds[hold_id] = (user_id, expires_at, tuple(seats))
+        return Hold(hold_id, self.show_session_id, user_id, expires_at, tuple(seats))
+
+    def remove(self, hold_id):
+        """Drop a hold, return its seats."""
+        _, _, seats = self.holds.pop(hold_id)
+        return seats
+
+    def has_expired(self, now):
+        return any(expires_at <= now for _, expires_at, _ in self.holds.values())
+
+    def evict(self, now):
+        """Drop the expired holds, return the seats they released."""
+        expired = [
+            hold_id
+            for hold_id, (_, expires_at, _) in self.holds.items()
+            if expires_at <= now
+        ]
+        return [seat for hold_id in expired for seat in self.remove(hold_id)]
+
+    def version(self, now):
+        """Return when the set of live holds last changed, if it has."""
+        stamps = [self.changed_at] + [
+            expires_at
+            for _, expires_at, _ in self.holds.values()
+            if expires_at <= now
+        ]
+        if not max(stamps):
+            return None
+        return datetime.fromtimestamp(max(stamps), timezone.utc)
+
+
+def _cache_key(show_session_id):
+    return f"planetarium:seat_holds:{show_session_id}"
+
+
+def parse_hold_id(hold_id):
+    """Return the show session id a hold id belongs to, or None."""
+    show_session_id, _, token = str(hold_id).partition(".")
+    if not (show_session_id.isdigit() and token):
+        return None
+    return int(show_session_id)
+
+
+def get_hold(hold_id):
+    """Return the live hold with this id, or None."""
+    show_session_id = parse_hold_id(hold_id)
+    if show_session_id is None:
+        return None
+    return SeatHolds.load(show_session_id).get(hold_id, time.time())
+
+
+def held_seats(show_session_ids, exclude=None):
+    """Return the (show_session_id, row, seat) triples held right now."""
+    now = time.time()
+    return {
+        (holds.show_session_id, row, seat)
+        for holds in SeatHolds.load_many(list(show_session_ids))
+        for row, seat in holds.held_seats(now, exclude=exclude)
+    }
+
+
+def holds_version(show_session_id):
+    return SeatHolds.load(show_session_id).version(time.time())
+
+
+def get_seat_map_with_holds(show_session):
+    """Return the seat map of a session with held seats marked taken."""
+    seat_map = get_seat_map(show_session)
+    for row, seat in SeatHolds.load(show_session.id).held_seats(time.time()):
+        try:
+            seat_map.take(row, seat)
+        except IndexError:
+            # the dome was resized since the seat was held
+            pass
+    return seat_map
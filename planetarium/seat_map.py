@@ -0,0 +1,102 @@
+import base64
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Ticket
+
+
+class SeatMap:
+    """Occupancy of a show session as a bitset with one bit per seat.
+
+    Seats are numbered row by row, so (row, seat) maps to bit
+    (row - 1) * seats_in_row + (seat - 1), least significant bit first.
+    """
+
+    def __init__(self, rows, seats_in_row, bits=None):
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        if bits is None:
+            bits = bytearray((rows * seats_in_row + 7) // 8)
+        self.bits = bytearray(bits)
+
+    @classmethod
+    def from_db(cls, show_session):
+        planetarium_dome = show_session.planetarium_dome
+        seat_map = cls(planetarium_dome.rows, planetarium_dome.seats_in_row)
+        tickets = Ticket.objects.filter(show_session=show_session)
+        for row, seat in tickets.order_by().values_list("row", "seat"):
+            seat_map.take(row, seat)
+        return seat_map
+
+    def _index(self, row, seat):
+        if not (1 <= row <= self.rows and 1 <= seat <= self.seats_in_row):
+            raise IndexError(f"No seat {seat} in row {row}")
+        return (row - 1) * self.seats_in_row + seat - 1
+
+    def take(self, row, seat):
+        index = self._index(row, seat)
+        self.bits[index >> 3] |= 1 << (index & 7)
+
+    def release(self, row, seat):
+        index = self._index(row, seat)
+        self.bits[index >> 3] &= ~(1 << (index & 7))
+
+    def is_taken(self, row, seat):
+        index = self._index(row, seat)
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def taken_places(self):
+        places = []
+        for byte_index, byte in enumerate(self.bits):
+            if not byte:
+                continue
+            for bit in range(8):
+                if byte & (1 << bit):
+                    row, seat = divmod(byte_index * 8 + bit, self.seats_in_row)
+                    places.append({"row": row + 1, "seat": seat + 1})
+        return places
+
+    def to_base64(self):
+        return base64.b64encode(self.bits).decode()
+
+
+def _cache_key(show_session_id):
+    return f"planetarium:seat_map:{show_session_id}"
+
+
+def get_seat_map(show_session):
+    """Return the cached seat map of a session, rebuilding it on a miss.
+
+    Entries carry the updated_at of the session they were built for,
+    which every ticket sold or released bumps, and only serve callers
+    that loaded the same updated_at. A map built while a booking
+    commits is then rebuilt on the next read instead of missing a seat.
+    """
+    cached = cache.get(_cache_key(show_session.id))
+    if cached is not None:
+        updated_at, *seat_map = cached
+        if updated_at == show_session.updated_at:
+            return SeatMap(*seat_map)
+
+    seat_map = SeatMap.from_db(show_session)
+    cache.set(
+        _cache_key(show_session.id),
+        (
+            show_session.updated_at,
+            seat_map.rows,
+            seat_map.seats_in_row,
+            bytes(seat_map.bits),
+        ),
+        settings.SEAT_MAP_CACHE_TIMEOUT,
+    )
+    return seat_map
+
+
+def invalidate_seat_maps(show_session_ids):
+    """Drop the cached maps of sessions whose seats changed.
+
+    Maps are not patched in place: that would run after the session
+    lock is released, where concurrent bookings overwrite each other.
+    """
+    cache.delete_many([_cache_key(pk) for pk in set(show_session_ids)])
@@ -1,7 +1,16 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import prefetch_related_objects
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from rest_framework.validators import UniqueTogetherValidator
 
+from .analytics import GROUPINGS
+from .booking import auto_book, book_reservations, book_tickets, place_hold
+from .exceptions import SeatsTaken
 from .models import (
     PlanetariumDome,
     ShowTheme,
@@ -10,6 +19,7 @@ from .models import (
     Ticket,
     Reservation
 )
+from .seat_holds import get_hold, get_seat_map_with_holds
 
 
 class PlanetariumDomeSerializer(serializers.ModelSerializer):
@@ -76,7 +86,31 @@ class ShowSessionListSerializer(ShowSessionSerializer):
         )
 
 
+class ShowSessionRelatedField(serializers.PrimaryKeyRelatedField):
+    """Looks up each show session, with its dome, once per serializer."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault(
+            "queryset", ShowSession.objects.select_related("planetarium_dome")
+        )
+        super().__init__(**kwargs)
+        self._show_sessions = {}
+
+    def to_internal_value(self, data):
+        key = str(data)
+        if key not in self._show_sessions:
+            # fetched for a whole batch by BatchReservationSerializer
+            prefetched = self.context.get("show_sessions", {})
+            if key in prefetched:
+                self._show_sessions[key] = prefetched[key]
+            else:
+                self._show_sessions[key] = super().to_internal_value(data)
+        return self._show_sessions[key]
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    show_session = ShowSessionRelatedField()
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -90,6 +124,9 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "show_session")
+        # taken seats are checked for all tickets of a reservation at once
+        # in ReservationSerializer.validate_tickets
+        validators = []
 
 
 class TicketListSerializer(TicketSerializer):
@@ -111,9 +148,7 @@ class ShowSessionDetailSerializer(ShowSessionSerializer):
         many=False,
         read_only=True,
     )
-    taken_places = TicketSeatsSerializer(
-        source="tickets", many=True, read_only=True
-    )
+    taken_places = serializers.SerializerMethodField()
 
     class Meta:
         model = ShowSession
@@ -125,22 +160,431 @@ class ShowSessionDetailSerializer(ShowSessionSerializer):
             "taken_places"
         )
 
+    @extend_schema_field(TicketSeatsSerializer(many=True))
+    def get_taken_places(self, show_session):
+        seat_map = getattr(show_session, "seat_map", None)
+        if seat_map is None:
+            seat_map = get_seat_map_with_holds(show_session)
+        request = self.context.get("request")
+        if request and request.query_params.get("seat_map") == "bitmap":
+            return seat_map.to_base64()
+        return seat_map.taken_places()
+
+
+class ShowSessionCalendarParamsSerializer(serializers.Serializer):
+    MAX_DAYS = 366
+
+    date_from = serializers.DateField()
+    to = serializers.DateField()
+    planetarium_dome = serializers.IntegerField(required=False)
+    by_dome = serializers.BooleanField(default=False)
+
+    def get_fields(self):
+        # "from" is a keyword, so it can't be declared as an attribute
+        fields = super().get_fields()
+        fields["from"] = fields.pop("date_from")
+        return fields
+
+    def validate(self, attrs):
+        days = (attrs["to"] - attrs["from"]).days + 1
+        if days < 1:
+            raise serializers.ValidationError({"to": "Must not be before from."})
+        if days > self.MAX_DAYS:
+            raise serializers.ValidationError(
+                {"to": f"The range must not span more than {self.MAX_DAYS} days."}
+            )
+        return attrs
+
+
+class ShowSessionCalendarDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    planetarium_dome = serializers.IntegerField(
+        required=False, help_text="Only with ?by_dome=true"
+    )
+    sessions = serializers.IntegerField()
+    capacity = serializers.IntegerField()
+    seats_sold = serializers.IntegerField()
+    first_show_time = serializers.DateTimeField()
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldSerializer(serializers.Serializer):
+    """Validates and describes a planetarium.seat_holds.Hold."""
+
+    id = serializers.CharField(read_only=True)
+    show_session = serializers.IntegerField(read_only=True)
+    seats = SeatSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=settings.SEAT_HOLDS["MAX_SEATS"],
+    )
+    minutes = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.SEAT_HOLDS["MAX_MINUTES"],
+        default=settings.SEAT_HOLDS["MINUTES"],
+        write_only=True,
+    )
+    expires_at = serializers.SerializerMethodField()
+
+    def validate_seats(self, seats):
+        planetarium_dome = self.context["show_session"].planetarium_dome
+        for seat in seats:
+            Ticket.validate_ticket(
+                seat["row"], seat["seat"], planetarium_dome, serializers.ValidationError
+            )
+        if len({(seat["row"], seat["seat"]) for seat in seats}) < len(seats):
+            raise serializers.ValidationError("Seats must not repeat.")
+        return seats
+
+    def create(self, validated_data):
+        return place_hold(
+            self.context["show_session"],
+            validated_data["user_id"],
+            [(seat["row"], seat["seat"]) for seat in validated_data["seats"]],
+            validated_data["minutes"],
+        )
+
+    def to_representation(self, hold):
+        return {
+            "id": hold.id,
+            "show_session": hold.show_session_id,
+            "seats": [{"row": row, "seat": seat} for row, seat in hold.seats],
+            "expires_at": self.get_expires_at(hold),
+        }
+
+    def get_expires_at(self, hold) -> datetime:
+        return serializers.DateTimeField().to_representation(
+            datetime.fromtimestamp(hold.expires_at, timezone.utc)
+        )
+
 
 class ReservationSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    tickets = TicketSerializer(
+        many=True, read_only=False, allow_empty=False, required=False
+    )
+    hold = serializers.CharField(
+        write_only=True,
+        required=False,
+        help_text="Id of a seat hold to turn into the tickets",
+    )
 
     class Meta:
         model = Reservation
-        fields = ("id", "tickets", "created_at")
+        fields = ("id", "tickets", "hold", "created_at")
+
+    def validate_hold(self, hold_id):
+        hold = get_hold(hold_id)
+        request = self.context.get("request")
+        if hold is None or request is None or hold.user_id != request.user.id:
+            raise serializers.ValidationError(
+                "No such hold, or it has expired.", code="invalid_hold"
+            )
+        return hold
+
+    def validate(self, attrs):
+        hold = attrs.get("hold")
+        if hold is None:
+            if "tickets" not in attrs:
+                raise serializers.ValidationError(
+                    {"tickets": [self.error_messages["required"]]},
+                    code="required",
+                )
+            return attrs
+
+        if "tickets" in attrs:
+            raise serializers.ValidationError(
+                "Send either tickets or a hold.", code="invalid"
+            )
+        show_session = ShowSession.objects.select_related(
+            "planetarium_dome"
+        ).filter(pk=hold.show_session_id).first()
+        if show_session is None:
+            raise serializers.ValidationError(
+                {"hold": ["No such hold, or it has expired."]},
+                code="invalid_hold",
+            )
+        attrs["tickets"] = [
+            {"show_session": show_session, "row": row, "seat": seat}
+            for row, seat in hold.seats
+        ]
+        return attrs
+
+    def validate_tickets(self, tickets):
+        seats = [
+            (ticket["show_session"].id, ticket["row"], ticket["seat"])
+            for ticket in tickets
+        ]
+        taken_seats = Ticket.taken_seats(seats)
+        message = UniqueTogetherValidator.message.format(
+            field_names=", ".join(Ticket._meta.unique_together[0])
+        )
+
+        errors = []
+        requested_seats = set()
+        for seat in seats:
+            if seat in taken_seats or seat in requested_seats:
+                errors.append({"non_field_errors": [message]})
+            else:
+                errors.append({})
+            requested_seats.add(seat)
+
+        if any(errors):
+            raise serializers.ValidationError(errors, code="unique")
+        return tickets
 
     @transaction.atomic
     def create(self, validated_data):
         tickets_data = validated_data.pop("tickets")
+        hold = validated_data.pop("hold", None)
         reservation = Reservation.objects.create(**validated_data)
-        for ticket_data in tickets_data:
-            Ticket.objects.create(reservation=reservation, **ticket_data)
+        book_tickets(reservation, tickets_data, hold=hold)
         return reservation
 
 
+class AutoReserveSerializer(serializers.Serializer):
+    MAX_PARTY_SIZE = 20
+
+    party_size = serializers.IntegerField(
+        min_value=1, max_value=MAX_PARTY_SIZE, write_only=True
+    )
+    reservation = ReservationSerializer(read_only=True)
+    together = serializers.BooleanField(
+        read_only=True,
+        help_text="Whether the seats are next to each other in one row",
+    )
+
+    def create(self, validated_data):
+        reservation, tickets, together = auto_book(
+            self.context["show_session"],
+            validated_data["user_id"],
+            validated_data["party_size"],
+        )
+        return {"reservation": reservation, "together": together}
+
+
+class BatchReservationItemSerializer(ReservationSerializer):
+    hold = None
+
+    class Meta(ReservationSerializer.Meta):
+        fields = ("id", "tickets", "created_at")
+
+    def validate_tickets(self, tickets):
+        # seats are checked for the whole batch, under the session locks,
+        # by book_reservations
+        return tickets
+
+
+class BatchReservationSerializer(serializers.Serializer):
+    ALL_OR_NOTHING = "all_or_nothing"
+    BEST_EFFORT = "best_effort"
+    MAX_RESERVATIONS = 100
+
+    mode = serializers.ChoiceField(
+        choices=(ALL_OR_NOTHING, BEST_EFFORT), default=ALL_OR_NOTHING
+    )
+    reservations = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=MAX_RESERVATIONS,
+    )
+
+    def validate(self, attrs):
+        context = {
+            **self.context,
+            "show_sessions": self.prefetch_show_sessions(attrs["reservations"]),
+        }
+        tickets_per_reservation = {}
+        errors = {}
+        for index, data in enumerate(attrs["reservations"]):
+            item = BatchReservationItemSerializer(data=data, context=context)
+            if item.is_valid():
+                tickets_per_reservation[index] = item.validated_data["tickets"]
+            else:
+                errors[index] = item.errors
+
+        if errors and attrs["mode"] == self.ALL_OR_NOTHING:
+            raise serializers.ValidationError(
+                {"results": self.results(len(attrs["reservations"]), {}, errors)}
+            )
+        attrs["tickets_per_reservation"] = tickets_per_reservation
+        attrs["errors"] = errors
+        return attrs
+
+    @staticmethod
+    def prefetch_show_sessions(reservations):
+        """Load every show session the batch refers to in one query."""
+        ids = {
+            str(ticket.get("show_session"))
+            for reservation in reservations
+            if isinstance(reservation.get("tickets"), list)
+            for ticket in reservation["tickets"]
+            if isinstance(ticket, dict)
+        }
+        show_sessions = ShowSession.objects.select_related(
+            "planetarium_dome"
+        ).in_bulk([pk for pk in ids if pk.isdigit()])
+        return {str(pk): show_session for pk, show_session in show_sessions.items()}
+
+    def create(self, validated_data):
+        reservations, conflicts = book_reservations(
+            validated_data["user_id"],
+            validated_data["tickets_per_reservation"],
+            partial=validated_data["mode"] == self.BEST_EFFORT,
+        )
+        errors = {
+            **validated_data["errors"],
+            **{
+                index: SeatsTaken(seats).detail
+                for index, seats in conflicts.items()
+            },
+        }
+        return self.results(
+            len(validated_data["reservations"]), reservations, errors
+        )
+
+    @staticmethod
+    def results(count, reservations, errors):
+        """Describe the outcome of each reservation of the batch, in order.
+
+        Reservations that were valid but not created because another one
+        failed in all_or_nothing mode are "skipped".
+        """
+        prefetch_related_objects(list(reservations.values()), "tickets")
+        results = []
+        for index in range(count):
+            if index in reservations:
+                results.append({
+                    "index": index,
+                    "status": "created",
+                    "reservation": ReservationSerializer(
+                        reservations[index]
+                    ).data,
+                })
+            elif index in errors:
+                results.append(
+                    {"index": index, "status": "failed", "errors": errors[index]}
+                )
+            else:
+                results.append({"index": index, "status": "skipped"})
+        return results
+
+
 class ReservationListSerializer(ReservationSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+
+class ResponseCacheStatsSerializer(serializers.Serializer):
+    local_hits = serializers.IntegerField(required=False)
+    shared_hits = serializers.IntegerField(required=False)
+    misses = serializers.IntegerField(required=False)
+    not_modified = serializers.IntegerField(required=False)
+    invalidations = serializers.IntegerField(required=False)
+    local_entries = serializers.IntegerField(
+        help_text="Responses in this process' LRU"
+    )
+
+
+class AnalyticsParamsSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        date_from, date_to = attrs.get("date_from"), attrs.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            raise serializers.ValidationError(
+                {"date_to": "Must not be before date_from."}
+            )
+        return attrs
+
+
+class SalesReportParamsSerializer(AnalyticsParamsSerializer):
+    by = serializers.ChoiceField(choices=GROUPINGS)
+
+
+@extend_schema_field(
+    {"oneOf": [{"type": "integer"}, {"type": "string", "format": "date"}]}
+)
+class SalesReportKeyField(serializers.ReadOnlyField):
+    """An id or an hour, or a date when grouping by day."""
+
+
+class SalesReportRowSerializer(serializers.Serializer):
+    key = SalesReportKeyField(
+        help_text=(
+            "The id of the show, theme or dome, the hour of the day "
+            "or the date"
+        )
+    )
+    name = serializers.CharField(required=False, allow_null=True)
+    sessions = serializers.IntegerField()
+    capacity = serializers.IntegerField()
+    tickets_sold = serializers.IntegerField()
+    fill_rate = serializers.SerializerMethodField()
+
+    def get_fill_rate(self, row) -> float:
+        return row["tickets_sold"] / row["capacity"] if row["capacity"] else None
+
+
+class SalesReportSerializer(serializers.Serializer):
+    refreshed_at = serializers.DateTimeField(
+        allow_null=True, help_text="When the rollup was last refreshed"
+    )
+    results = SalesReportRowSerializer(many=True)
+
+
+class RowHeatmapParamsSerializer(AnalyticsParamsSerializer):
+    planetarium_dome = serializers.PrimaryKeyRelatedField(
+        queryset=PlanetariumDome.objects.all()
+    )
+    astronomy_show = serializers.IntegerField(required=False)
+
+
+class RowSalesSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    tickets_sold = serializers.IntegerField()
+    fill_rate = serializers.FloatField(allow_null=True)
+
+
+class RowHeatmapSerializer(serializers.Serializer):
+    refreshed_at = serializers.DateTimeField(
+        allow_null=True, help_text="When the rollup was last refreshed"
+    )
+    planetarium_dome = serializers.IntegerField()
+    sessions = serializers.IntegerField()
+    seats_in_row = serializers.IntegerField()
+    rows = RowSalesSerializer(many=True)
+
+
+class TicketExportParamsSerializer(AnalyticsParamsSerializer):
+    planetarium_dome = serializers.IntegerField(required=False)
+
+
+class ScheduleImportParamsSerializer(serializers.Serializer):
+    dry_run = serializers.BooleanField(
+        default=False, help_text="Only check the sessions"
+    )
+
+
+class ScheduleImportRowSerializer(serializers.Serializer):
+    astronomy_show = serializers.CharField(help_text="Id or title")
+    planetarium_dome = serializers.CharField(help_text="Id or name")
+    show_time = serializers.DateTimeField()
+
+
+class ScheduleImportErrorSerializer(serializers.Serializer):
+    row = serializers.IntegerField(allow_null=True)
+    field = serializers.CharField(allow_null=True)
+    message = serializers.CharField()
+
+
+class ScheduleImportResultSerializer(serializers.Serializer):
+    rows = serializers.IntegerField()
+    created = serializers.ListField(
+        child=serializers.IntegerField(),
+        help_text="Ids of the show sessions created, none on a dry run",
+    )
+    rows_per_second = serializers.FloatField()
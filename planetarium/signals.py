@@ -0,0 +1,95 @@
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from . import response_cache
+from .models import (
+    PlanetariumDome,
+    ShowTheme,
+    AstronomyShow,
+    ShowSession,
+    Ticket,
+)
+from .seat_events import seats_changed
+
+CATALOG_MODELS = (PlanetariumDome, ShowTheme, AstronomyShow)
+
+
+@receiver(post_save, sender=Ticket)
+def publish_seats_on_ticket_save(sender, instance, created, **kwargs):
+    seat = (instance.show_session_id, instance.row, instance.seat)
+    previous_seat = getattr(instance, "previous_seat", None)
+    if created:
+        transaction.on_commit(lambda: seats_changed(taken=[seat]), robust=True)
+    elif previous_seat != seat:
+        transaction.on_commit(
+            lambda: seats_changed(taken=[seat], released=[previous_seat]),
+            robust=True,
+        )
+
+
+@receiver(post_delete, sender=Ticket)
+def publish_seats_on_ticket_delete(sender, instance, **kwargs):
+    seat = (instance.show_session_id, instance.row, instance.seat)
+    transaction.on_commit(lambda: seats_changed(released=[seat]), robust=True)
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_seat(sender, instance, **kwargs):
+    instance.previous_seat = (
+        Ticket.objects.filter(pk=instance.pk)
+        .values_list("show_session_id", "row", "seat")
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Ticket)
+def count_ticket_on_save(sender, instance, created, **kwargs):
+    sessions = ShowSession.objects.filter(id=instance.show_session_id)
+    previous_seat = getattr(instance, "previous_seat", None)
+    previous_show_session_id = previous_seat[0] if previous_seat else None
+    if created:
+        sessions.add_tickets_sold(1)
+    elif previous_show_session_id != instance.show_session_id:
+        sessions.add_tickets_sold(1)
+        ShowSession.objects.filter(
+            id=previous_show_session_id
+        ).add_tickets_sold(-1)
+    else:
+        sessions.touch()
+
+
+@receiver(post_delete, sender=Ticket)
+def count_ticket_on_delete(sender, instance, **kwargs):
+    ShowSession.objects.filter(
+        id=instance.show_session_id
+    ).add_tickets_sold(-1)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_response_cache_on_catalog_change(sender, **kwargs):
+    if sender in CATALOG_MODELS:
+        transaction.on_commit(response_cache.invalidate)
+
+
+@receiver(m2m_changed, sender=AstronomyShow.show_theme.through)
+def on_show_theme_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # the shows losing this theme are unknown once it is cleared
+        instance.astronomy_shows.all().touch()
+    if not action.startswith("post_"):
+        return
+
+    if reverse:
+        AstronomyShow.objects.filter(id__in=pk_set or ()).touch()
+    else:
+        AstronomyShow.objects.filter(id=instance.id).touch()
+    transaction.on_commit(response_cache.invalidate)
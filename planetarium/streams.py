@@ -0,0 +1,160 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import (
+    Http404,
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import seat_events
+from .models import ShowSession
+from .seat_holds import get_seat_map_with_holds
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def _outside_request_thread(function):
+    """Run blocking setup in the shared thread pool.
+
+    The request thread would keep its database connection open for the
+    whole life of the stream, one per watcher.
+    """
+
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+def _authenticate(request):
+    drf_request = Request(
+        request,
+        authenticators=[
+            authentication()
+            for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    return drf_request.user
+
+
+def _snapshot(show_session_id):
+    show_session = (
+        ShowSession.objects.select_related("planetarium_dome")
+        .filter(pk=show_session_id)
+        .first()
+    )
+    if show_session is None:
+        return None
+    return {
+        "rows": show_session.planetarium_dome.rows,
+        "seats_in_row": show_session.planetarium_dome.seats_in_row,
+        "taken": get_seat_map_with_holds(show_session).to_base64(),
+    }
+
+
+@_outside_request_thread
+def _open_stream(request, show_session_id):
+    """Return (error response, snapshot) for a new stream."""
+    try:
+        user = _authenticate(request)
+    except AuthenticationFailed as error:
+        detail = error.detail
+    else:
+        if user.is_authenticated:
+            snapshot = _snapshot(show_session_id)
+            if snapshot is None:
+                raise Http404
+            return None, snapshot
+        detail = "Authentication credentials were not provided."
+    return (
+        JsonResponse({"detail": detail}, status=status.HTTP_401_UNAUTHORIZED),
+        None,
+    )
+
+
+async def _seat_events(show_session_id, queue, snapshot):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.SEAT_EVENTS["MAX_STREAM_SECONDS"]
+    try:
+        yield _event("snapshot", snapshot)
+        while True:
+            timeout = min(
+                settings.SEAT_EVENTS["KEEPALIVE_SECONDS"],
+                deadline - loop.time(),
+            )
+            if timeout <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            if event is None:
+                # the stream fell behind and its backlog was dropped
+                snapshot = await _outside_request_thread(_snapshot)(
+                    show_session_id
+                )
+                if snapshot is None:
+                    return
+                yield _event("snapshot", snapshot)
+            else:
+                yield _event("seats", event)
+    finally:
+        seat_events.hub.unsubscribe(show_session_id, queue)
+
+
+async def show_session_seats_stream(request, pk):
+    """Stream the seat availability of a show session as Server-Sent Events.
+
+    A "snapshot" event carries the seat map as a base64 bitset (see
+    planetarium.seat_map.SeatMap), then every committed change arrives as a
+    "seats" event with the taken and released [row, seat] pairs.
+
+    Needs an ASGI server (config.asgi). Under WSGI Django collects the
+    whole stream before sending any of it, holding a worker thread for
+    MAX_STREAM_SECONDS, so such requests are refused with a 501.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "Seat streams are only served over ASGI."},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+
+    await seat_events.get_broker().listen()
+    # subscribe before reading the snapshot so no change slips between them
+    queue = seat_events.hub.subscribe(pk)
+    try:
+        error, snapshot = await _open_stream(request, pk)
+    except Exception:
+        seat_events.hub.unsubscribe(pk, queue)
+        raise
+    if error is not None:
+        seat_events.hub.unsubscribe(pk, queue)
+        return error
+
+    response = StreamingHttpResponse(
+        _seat_events(pk, queue, snapshot),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,157 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.allocation import find_best_seats
+from planetarium.booking import auto_book
+from planetarium.exceptions import ShowSessionsGone
+from planetarium.models import (
+    PlanetariumDome,
+    AstronomyShow,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
+
+
+def sample_show_session(rows=5, seats_in_row=5):
+    return ShowSession.objects.create(
+        astronomy_show=AstronomyShow.objects.create(title="Test", description="Test"),
+        planetarium_dome=PlanetariumDome.objects.create(
+            name="Test Dome", rows=rows, seats_in_row=seats_in_row
+        ),
+        show_time=datetime.now(),
+    )
+
+
+class FindBestSeatsTest(SimpleTestCase):
+    def test_center_of_an_empty_dome(self):
+        self.assertEqual(find_best_seats(5, 9, set(), 3), ([(3, 4), (3, 5), (3, 6)], True))
+
+    def test_party_stays_together(self):
+        # the middle row is broken up, the next rows are not
+        taken = {(3, 3), (3, 6)}
+        self.assertEqual(find_best_seats(5, 8, taken, 4), ([(2, 3), (2, 4), (2, 5), (2, 6)], True))
+
+    def test_single_seat_gaps_are_avoided(self):
+        # seats 1-2 and 8-10 of the row are sold; 4-6 would strand seat 3
+        taken = {(1, 1), (1, 2), (1, 8), (1, 9), (1, 10)}
+        self.assertEqual(find_best_seats(1, 10, taken, 3), ([(1, 5), (1, 6), (1, 7)], True))
+
+    def test_party_is_split_when_no_row_fits(self):
+        taken = {(row, seat) for row in range(1, 4) for seat in (2, 4)}
+        seats, together = find_best_seats(3, 5, taken, 2)
+        self.assertFalse(together)
+        self.assertEqual(len(seats), 2)
+        self.assertFalse(set(seats) & taken)
+
+    def test_full(self):
+        taken = {(row, seat) for row in range(1, 3) for seat in range(1, 4)} - {(1, 1)}
+        self.assertEqual(find_best_seats(2, 3, taken, 1), ([(1, 1)], True))
+        self.assertIsNone(find_best_seats(2, 3, taken, 2))
+
+
+class AutoReserveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.show_session = sample_show_session()
+        self.url = reverse("planetarium:showsession-auto-reserve", args=[self.show_session.id])
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reserves_the_best_seats(self):
+        response = self.client.post(self.url, {"party_size": 5})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data["together"])
+        self.assertEqual(
+            [(ticket["row"], ticket["seat"]) for ticket in response.data["reservation"]["tickets"]],
+            [(3, seat) for seat in range(1, 6)],
+        )
+        self.assertEqual(Reservation.objects.get().user, self.user)
+        self.show_session.refresh_from_db()
+        self.assertEqual(self.show_session.tickets_sold, 5)
+
+    def test_sold_and_held_seats_are_skipped(self):
+        Ticket.objects.create(
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.user),
+            row=3,
+            seat=3,
+        )
+        other = APIClient()
+        other.force_authenticate(get_user_model().objects.create_user(email="other@gmail.com", password="test"))
+        other.post(
+            reverse("planetarium:showsession-holds", args=[self.show_session.id]),
+            {"seats": [{"row": 2, "seat": 3}, {"row": 4, "seat": 3}]},
+            format="json",
+        )
+
+        response = self.client.post(self.url, {"party_size": 1})
+        ticket = response.data["reservation"]["tickets"][0]
+        self.assertNotIn((ticket["row"], ticket["seat"]), {(3, 3), (2, 3), (4, 3)})
+        self.assertEqual(ticket["row"], 3)
+
+    def test_no_seats_left(self):
+        response = self.client.post(self.url, {"party_size": 20})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(response.data["together"])
+
+        response = self.client.post(self.url, {"party_size": 6})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["detail"].code, "no_seats_available")
+        self.assertEqual(Ticket.objects.count(), 20)
+
+    def test_party_size_is_validated(self):
+        for party_size in (0, 21, "many"):
+            response = self.client.post(self.url, {"party_size": party_size})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_session_deleted_after_validation_is_rejected(self):
+        ShowSession.objects.filter(id=self.show_session.id).delete()
+        with self.assertRaises(ShowSessionsGone):
+            auto_book(self.show_session, self.user.id, 2)
+        self.assertFalse(Reservation.objects.exists())
+
+
+class ConcurrentAutoReserveTest(TransactionTestCase):
+    allocations = 150
+    workers = 16
+
+    def setUp(self):
+        cache.clear()
+        self.show_session = sample_show_session(rows=50, seats_in_row=60)
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+
+    def _auto_reserve(self, party_size):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        try:
+            response = client.post(
+                reverse("planetarium:showsession-auto-reserve", args=[self.show_session.id]),
+                {"party_size": party_size},
+            )
+            return response.status_code
+        finally:
+            connection.close()
+
+    def test_concurrent_allocations_never_double_sell(self):
+        party_sizes = [random.randint(1, 6) for _ in range(self.allocations)]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            status_codes = list(executor.map(self._auto_reserve, party_sizes))
+
+        self.assertEqual(set(status_codes), {status.HTTP_201_CREATED})
+        seats = list(Ticket.objects.values_list("row", "seat"))
+        self.assertEqual(len(seats), sum(party_sizes))
+        self.assertEqual(len(seats), len(set(seats)))
+        self.show_session.refresh_from_db()
+        self.assertEqual(self.show_session.tickets_sold, sum(party_sizes))
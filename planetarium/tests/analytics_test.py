@@ -0,0 +1,226 @@
+from datetime import datetime
+from io import StringIO
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.analytics import refresh_sales_rollup
+from planetarium.models import (
+    PlanetariumDome,
+    ShowTheme,
+    AstronomyShow,
+    ShowSession,
+    ShowSessionRowSales,
+    Reservation,
+    Ticket,
+)
+
+SALES_URL = reverse("planetarium:analytics-sales")
+ROW_HEATMAP_URL = reverse("planetarium:analytics-row-heatmap")
+UTC = ZoneInfo("UTC")
+
+
+class SalesTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.dome = PlanetariumDome.objects.create(name="Dome", rows=3, seats_in_row=4)
+        self.other_dome = PlanetariumDome.objects.create(name="Other", rows=2, seats_in_row=2)
+        stars_theme = ShowTheme.objects.create(name="Stars")
+        planets_theme = ShowTheme.objects.create(name="Planets")
+        self.stars = AstronomyShow.objects.create(title="Stars", description="Test")
+        self.stars.show_theme.set([stars_theme])
+        self.planets = AstronomyShow.objects.create(title="Planets", description="Test")
+        self.planets.show_theme.set([stars_theme, planets_theme])
+        self.morning = ShowSession.objects.create(
+            astronomy_show=self.stars,
+            planetarium_dome=self.dome,
+            show_time=datetime(2024, 3, 1, 10, tzinfo=UTC),
+        )
+        self.evening = ShowSession.objects.create(
+            astronomy_show=self.planets,
+            planetarium_dome=self.dome,
+            show_time=datetime(2024, 3, 2, 19, tzinfo=UTC),
+        )
+        self.other = ShowSession.objects.create(
+            astronomy_show=self.planets,
+            planetarium_dome=self.other_dome,
+            show_time=datetime(2024, 3, 2, 10, tzinfo=UTC),
+        )
+        self.reservation = self._sell(self.morning, (1, 1), (1, 2), (2, 1))
+        self._sell(self.evening, (1, 1))
+        self._sell(self.other, (1, 1), (1, 2), (2, 1), (2, 2))
+
+    def _sell(self, show_session, *seats):
+        reservation = Reservation.objects.create(user=self.user)
+        for row, seat in seats:
+            Ticket.objects.create(show_session=show_session, reservation=reservation, row=row, seat=seat)
+        return reservation
+
+
+class SalesRollupTest(SalesTestCase):
+    def _rollup(self):
+        return set(ShowSessionRowSales.objects.values_list("show_session", "row", "tickets_sold"))
+
+    def test_refresh_adds_new_tickets(self):
+        result = refresh_sales_rollup()
+        self.assertEqual(result["rows_updated"], 5)
+        self.assertEqual(result["recounted_sessions"], 0)
+        self.assertEqual(
+            self._rollup(),
+            {
+                (self.morning.id, 1, 2),
+                (self.morning.id, 2, 1),
+                (self.evening.id, 1, 1),
+                (self.other.id, 1, 2),
+                (self.other.id, 2, 2),
+            },
+        )
+
+        self._sell(self.morning, (1, 3), (3, 1))
+        result = refresh_sales_rollup()
+        self.assertEqual(result["rows_updated"], 2)
+        self.assertIn((self.morning.id, 1, 3), self._rollup())
+        self.assertIn((self.morning.id, 3, 1), self._rollup())
+        self.assertEqual(len(self._rollup()), 6)
+
+    def test_refresh_reads_only_new_tickets(self):
+        refresh_sales_rollup()
+        with CaptureQueriesContext(connection) as queries:
+            refresh_sales_rollup()
+        ticket_queries = [query["sql"] for query in queries if '"planetarium_ticket"' in query["sql"]]
+        self.assertEqual(len(ticket_queries), 2)
+        self.assertIn('MAX("planetarium_ticket"."id")', ticket_queries[0])
+        self.assertIn('"planetarium_ticket"."id" > ', ticket_queries[1])
+
+    def test_refresh_recounts_sessions_that_lost_tickets(self):
+        refresh_sales_rollup()
+        self.reservation.delete()
+        self._sell(self.morning, (3, 4))
+        result = refresh_sales_rollup()
+        self.assertEqual(result["recounted_sessions"], 1)
+        self.assertEqual(
+            {(row, sold) for pk, row, sold in self._rollup() if pk == self.morning.id},
+            {(3, 1)},
+        )
+
+    def test_full_refresh(self):
+        refresh_sales_rollup()
+        rollup = self._rollup()
+        ShowSessionRowSales.objects.filter(row=2).delete()
+        ShowSessionRowSales.objects.update(row=F("row") + 1)
+        result = refresh_sales_rollup(full=True)
+        self.assertEqual(result["rows_updated"], 5)
+        self.assertEqual(self._rollup(), rollup)
+
+    def test_command_reports_timings(self):
+        out = StringIO()
+        call_command("refresh_sales_rollup", stdout=out)
+        self.assertIn("5 rows updated in", out.getvalue())
+        self.assertIn("total", out.getvalue())
+
+
+class SalesAnalyticsViewsTest(SalesTestCase):
+    def setUp(self):
+        super().setUp()
+        refresh_sales_rollup()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@gmail.com", password="admin", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def _report(self, **params):
+        response = self.client.get(SALES_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data["refreshed_at"])
+        return [
+            (row["key"], row["sessions"], row["capacity"], row["tickets_sold"])
+            for row in response.json()["results"]
+        ]
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=self.user)
+        for url, params in ((SALES_URL, {"by": "day"}), (ROW_HEATMAP_URL, {"planetarium_dome": self.dome.id})):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, params).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_sales_by_astronomy_show(self):
+        response = self.client.get(SALES_URL, {"by": "astronomy_show"})
+        self.assertEqual(
+            [dict(row) for row in response.data["results"]],
+            [
+                {
+                    "key": self.stars.id,
+                    "name": "Stars",
+                    "sessions": 1,
+                    "capacity": 12,
+                    "tickets_sold": 3,
+                    "fill_rate": 0.25,
+                },
+                {
+                    "key": self.planets.id,
+                    "name": "Planets",
+                    "sessions": 2,
+                    "capacity": 16,
+                    "tickets_sold": 5,
+                    "fill_rate": 5 / 16,
+                },
+            ],
+        )
+
+    def test_sales_by_show_theme(self):
+        # the planets show has both themes
+        self.assertEqual(
+            [row[1:] for row in self._report(by="show_theme")],
+            [(3, 28, 8), (2, 16, 5)],
+        )
+
+    def test_sales_by_planetarium_dome_hour_and_day(self):
+        self.assertEqual(
+            self._report(by="planetarium_dome"),
+            [(self.dome.id, 2, 24, 4), (self.other_dome.id, 1, 4, 4)],
+        )
+        self.assertEqual(self._report(by="hour"), [(10, 2, 16, 7), (19, 1, 12, 1)])
+        self.assertEqual(
+            self._report(by="day", date_from="2024-03-02"),
+            [("2024-03-02", 2, 16, 5)],
+        )
+
+    def test_reports_do_not_read_tickets(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._report(by="show_theme")
+            self.client.get(ROW_HEATMAP_URL, {"planetarium_dome": self.dome.id})
+        for query in queries:
+            self.assertNotIn('"planetarium_ticket"', query["sql"])
+
+    def test_row_heatmap(self):
+        response = self.client.get(ROW_HEATMAP_URL, {"planetarium_dome": self.dome.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["sessions"], 2)
+        self.assertEqual(
+            [(row["row"], row["tickets_sold"], row["fill_rate"]) for row in response.data["rows"]],
+            [(1, 3, 3 / 8), (2, 1, 1 / 8), (3, 0, 0.0)],
+        )
+
+        response = self.client.get(
+            ROW_HEATMAP_URL, {"planetarium_dome": self.dome.id, "astronomy_show": self.planets.id}
+        )
+        self.assertEqual([row["tickets_sold"] for row in response.data["rows"]], [1, 0, 0])
+
+    def test_invalid_params(self):
+        for url, params in (
+            (SALES_URL, {"by": "week"}),
+            (SALES_URL, {"by": "day", "date_from": "2024-03-02", "date_to": "2024-03-01"}),
+            (ROW_HEATMAP_URL, {}),
+            (ROW_HEATMAP_URL, {"planetarium_dome": 0}),
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,156 @@
+import asyncio
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium import response_cache
+from planetarium.models import (
+    PlanetariumDome,
+    ShowTheme,
+    AstronomyShow,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
+from planetarium.views import AstronomyShowViewSet, ShowSessionViewSet
+
+
+def render(response):
+    # cached responses are plain HttpResponses
+    return response.render() if hasattr(response, "render") else response
+
+
+@override_settings(ASYNC_READ_VIEWS=True)
+class AsyncReadViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        response_cache.invalidate()
+        self.factory = AsyncRequestFactory()
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.staff = get_user_model().objects.create_user(
+            email="staff@gmail.com", password="test", is_staff=True
+        )
+        show_theme = ShowTheme.objects.create(name="Stars")
+        self.astronomy_show = AstronomyShow.objects.create(title="Black holes", description="Test")
+        self.astronomy_show.show_theme.add(show_theme)
+        AstronomyShow.objects.create(title="Comets", description="Test")
+        planetarium_dome = PlanetariumDome.objects.create(name="Test Dome", rows=5, seats_in_row=5)
+        now = timezone.now()
+        self.show_sessions = [
+            ShowSession.objects.create(
+                astronomy_show=self.astronomy_show,
+                planetarium_dome=planetarium_dome,
+                show_time=now + timedelta(hours=index),
+            )
+            for index in range(3)
+        ]
+        Ticket.objects.create(
+            show_session=self.show_sessions[0],
+            reservation=Reservation.objects.create(user=self.user),
+            row=2,
+            seat=3,
+        )
+
+    def auth(self, user=None):
+        return {"Authorization": f"Bearer {AccessToken.for_user(user or self.user)}"}
+
+    async def call(self, viewset, actions, request, **kwargs):
+        view = viewset.as_view(dict(actions))
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        return render(await view(request, **kwargs))
+
+    async def assert_same_as_sync(self, viewset, actions, path, data=None, user=None, **kwargs):
+        response = await self.call(
+            viewset, actions, self.factory.get(path, data, headers=self.auth(user)), **kwargs
+        )
+        with override_settings(ASYNC_READ_VIEWS=False):
+            sync_view = viewset.as_view(dict(actions))
+        expected = await sync_to_async(
+            lambda: render(sync_view(self.factory.get(path, data, headers=self.auth(user)), **kwargs))
+        )()
+
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        return response
+
+    async def test_show_session_list(self):
+        path = "/api/planetarium/show-sessions/"
+        response = await self.assert_same_as_sync(
+            ShowSessionViewSet, {"get": "list"}, path, {"page_size": 2}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(response.data["results"][0]["tickets_available"], 25)
+
+        cursor = response.data["next"].split("cursor=")[1].split("&")[0]
+        response = await self.assert_same_as_sync(
+            ShowSessionViewSet, {"get": "list"}, path, {"page_size": 2, "cursor": cursor}
+        )
+        self.assertEqual(len(response.data["results"]), 1)
+
+    async def test_show_session_list_offset_for_staff(self):
+        response = await self.assert_same_as_sync(
+            ShowSessionViewSet,
+            {"get": "list"},
+            "/api/planetarium/show-sessions/",
+            {"limit": 1, "offset": 1},
+            user=self.staff,
+        )
+        self.assertEqual(response.data["count"], 3)
+
+    async def test_show_session_detail(self):
+        show_session = self.show_sessions[0]
+        path = f"/api/planetarium/show-sessions/{show_session.id}/"
+        response = await self.assert_same_as_sync(
+            ShowSessionViewSet, {"get": "retrieve"}, path, pk=show_session.id
+        )
+        self.assertEqual(response.data["taken_places"], [{"row": 2, "seat": 3}])
+        self.assertEqual(response.data["astronomy_show"]["show_theme"], ["Stars"])
+
+        response = await self.call(
+            ShowSessionViewSet,
+            {"get": "retrieve"},
+            self.factory.get(
+                path, headers={"If-None-Match": response["ETag"], **self.auth()}
+            ),
+            pk=show_session.id,
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_show_session_not_found(self):
+        response = await self.assert_same_as_sync(
+            ShowSessionViewSet, {"get": "retrieve"}, "/api/planetarium/show-sessions/0/", pk=0
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_astronomy_show_list(self):
+        path = "/api/planetarium/astronomy-shows/"
+        await self.assert_same_as_sync(AstronomyShowViewSet, {"get": "list"}, path)
+        response = await self.assert_same_as_sync(
+            AstronomyShowViewSet, {"get": "list"}, path, {"q": "black"}
+        )
+        self.assertEqual(json.loads(response.content), [
+            {"id": self.astronomy_show.id, "title": "Black holes", "description": "Test", "show_theme": ["Stars"]}
+        ])
+
+    async def test_permissions(self):
+        view = ShowSessionViewSet.as_view({"get": "list", "post": "create"})
+        path = "/api/planetarium/show-sessions/"
+
+        response = await view(self.factory.get(path))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = await view(self.factory.post(path, {}, headers=self.auth()))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_sync_view_when_disabled(self):
+        with override_settings(ASYNC_READ_VIEWS=False):
+            view = ShowSessionViewSet.as_view({"get": "list"})
+        self.assertFalse(asyncio.iscoroutinefunction(view))
@@ -0,0 +1,279 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.booking import book_reservations
+from planetarium.exceptions import SeatsTaken, ShowSessionsGone
+from planetarium.models import (
+    PlanetariumDome,
+    AstronomyShow,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
+from planetarium.serializers import ReservationSerializer
+
+RESERVATION_URL = reverse("planetarium:reservation-list")
+
+
+def sample_show_session(**params):
+    astronomy_show = AstronomyShow.objects.create(title="Test", description="Test")
+    planetarium_dome = PlanetariumDome.objects.create(name="Test Dome", rows=5, seats_in_row=5)
+    defaults = {
+        "astronomy_show": astronomy_show,
+        "planetarium_dome": planetarium_dome,
+        "show_time": datetime.now(),
+    }
+    defaults.update(params)
+    return ShowSession.objects.create(**defaults)
+
+
+class BookTicketsTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.show_session = sample_show_session()
+
+    def test_seat_taken_after_validation_raises_conflict(self):
+        serializer = ReservationSerializer(
+            data={
+                "tickets": [
+                    {"row": 1, "seat": 1, "show_session": self.show_session.id},
+                    {"row": 1, "seat": 2, "show_session": self.show_session.id},
+                ]
+            }
+        )
+        self.assertTrue(serializer.is_valid())
+
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=2, show_session=self.show_session, reservation=reservation)
+
+        with self.assertRaises(SeatsTaken) as context:
+            serializer.save(user=self.user)
+
+        self.assertEqual(
+            context.exception.detail["taken_seats"],
+            [{"show_session": self.show_session.id, "row": 1, "seat": 2}],
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+
+    def test_session_deleted_after_validation_is_rejected(self):
+        serializer = ReservationSerializer(
+            data={"tickets": [{"row": 1, "seat": 1, "show_session": self.show_session.id}]}
+        )
+        self.assertTrue(serializer.is_valid())
+        # deleted by someone else, the validated instance keeps its id
+        ShowSession.objects.filter(id=self.show_session.id).delete()
+
+        with self.assertRaises(ShowSessionsGone) as context:
+            serializer.save(user=self.user)
+
+        self.assertEqual(context.exception.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(context.exception.detail["show_sessions"], [self.show_session.id])
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_booking_stands_when_seat_events_fail(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = {"tickets": [{"row": 1, "seat": 1, "show_session": self.show_session.id}]}
+
+        with mock.patch("planetarium.seat_events.get_broker", side_effect=OSError):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post(RESERVATION_URL, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Ticket.objects.filter(show_session=self.show_session).exists())
+
+
+class ConcurrentBookingTest(TransactionTestCase):
+    bookings = 200
+    workers = 16
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.show_session = sample_show_session()
+
+    def _book(self, seats):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        try:
+            data = {
+                "tickets": [
+                    {"row": row, "seat": seat, "show_session": self.show_session.id}
+                    for row, seat in seats
+                ]
+            }
+            response = client.post(RESERVATION_URL, data, format="json")
+            return response.status_code, seats
+        finally:
+            connection.close()
+
+    def test_competing_bookings_never_double_sell(self):
+        all_seats = [(row, seat) for row in range(1, 6) for seat in range(1, 6)]
+        requests = [random.sample(all_seats, 2) for _ in range(self.bookings)]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(self._book, requests))
+
+        status_codes = {status_code for status_code, _ in results}
+        self.assertTrue(
+            status_codes <= {
+                status.HTTP_201_CREATED,
+                status.HTTP_400_BAD_REQUEST,
+                status.HTTP_409_CONFLICT,
+            },
+            status_codes,
+        )
+
+        booked_seats = [
+            seat
+            for status_code, seats in results
+            if status_code == status.HTTP_201_CREATED
+            for seat in seats
+        ]
+        self.assertEqual(len(booked_seats), len(set(booked_seats)))
+        self.assertEqual(
+            sorted(booked_seats),
+            sorted(Ticket.objects.values_list("row", "seat")),
+        )
+
+
+class BatchReservationTest(TestCase):
+    url = reverse("planetarium:reservation-batch")
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.show_sessions = [sample_show_session(), sample_show_session()]
+
+    def reservation(self, *seats):
+        return {
+            "tickets": [
+                {"row": row, "seat": seat, "show_session": self.show_sessions[index].id}
+                for index, row, seat in seats
+            ]
+        }
+
+    def test_creates_reservations_across_sessions(self):
+        data = {
+            "reservations": [
+                self.reservation((0, 1, 1), (0, 1, 2)),
+                self.reservation((1, 1, 1)),
+                self.reservation((0, 2, 1), (1, 2, 1)),
+            ]
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = response.data["results"]
+        self.assertEqual([result["status"] for result in results], ["created"] * 3)
+        self.assertEqual(
+            [(ticket["row"], ticket["seat"]) for ticket in results[0]["reservation"]["tickets"]],
+            [(1, 1), (1, 2)],
+        )
+        self.assertEqual(Reservation.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(
+            list(ShowSession.objects.order_by("id").values_list("tickets_sold", flat=True)),
+            [3, 2],
+        )
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        def data(rows):
+            return {
+                "reservations": [
+                    self.reservation((0, row, 1), (1, row, 2)) for row in rows
+                ]
+            }
+
+        self.client.post(self.url, data([1]), format="json")
+        with self.assertNumQueries(12):
+            self.client.post(self.url, data([2]), format="json")
+        with self.assertNumQueries(12):
+            response = self.client.post(self.url, data([3, 4, 5]), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.count(), 10)
+
+    def test_all_or_nothing_rolls_back_on_conflict(self):
+        self.client.post(self.url, {"reservations": [self.reservation((0, 1, 1))]}, format="json")
+        data = {
+            "reservations": [
+                self.reservation((1, 1, 1)),
+                self.reservation((0, 1, 1)),
+                self.reservation((1, 2, 2), (1, 1, 1)),
+            ]
+        }
+        response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        results = response.data["results"]
+        self.assertEqual([result["status"] for result in results], ["skipped", "failed", "failed"])
+        self.assertEqual(
+            results[1]["errors"]["taken_seats"],
+            [{"show_session": self.show_sessions[0].id, "row": 1, "seat": 1}],
+        )
+        self.assertEqual(
+            results[2]["errors"]["taken_seats"],
+            [{"show_session": self.show_sessions[1].id, "row": 1, "seat": 1}],
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_all_or_nothing_rejects_invalid_reservations(self):
+        data = {"reservations": [self.reservation((0, 1, 1)), self.reservation((0, 6, 1))]}
+        response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        results = response.data["results"]
+        self.assertEqual([result["status"] for result in results], ["skipped", "failed"])
+        self.assertIn("row", results[1]["errors"]["tickets"][0])
+        self.assertEqual(Reservation.objects.count(), 0)
+
+    def test_best_effort_creates_what_it_can(self):
+        data = {
+            "mode": "best_effort",
+            "reservations": [
+                self.reservation((0, 1, 1)),
+                self.reservation((0, 1, 1)),
+                self.reservation((0, 6, 1)),
+                {"tickets": [{"row": 1, "seat": 1, "show_session": 0}]},
+                self.reservation((0, 1, 2), (1, 1, 2)),
+            ],
+        }
+        response = self.client.post(self.url, data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["created", "failed", "failed", "failed", "created"],
+        )
+        self.assertIn("show_session", response.data["results"][3]["errors"]["tickets"][0])
+        self.assertEqual(Reservation.objects.count(), 2)
+        self.assertEqual(Ticket.objects.count(), 3)
+
+        response = self.client.post(self.url, {**data, "reservations": data["reservations"][:2]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_batch_size_is_limited(self):
+        data = {"reservations": [self.reservation((0, 1, 1))] * 101}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("reservations", response.data)
+
+    def test_session_deleted_after_validation_is_rejected(self):
+        show_session = self.show_sessions[1]
+        tickets = {0: [{"show_session": show_session, "row": 1, "seat": 1}]}
+        ShowSession.objects.filter(id=show_session.id).delete()
+
+        with self.assertRaises(ShowSessionsGone):
+            book_reservations(self.user.id, tickets)
+        self.assertFalse(Reservation.objects.exists())
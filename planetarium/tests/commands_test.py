@@ -0,0 +1,140 @@
+import itertools
+from contextlib import contextmanager
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.utils import OperationalError
+from django.test import TestCase
+
+from planetarium.models import ShowSession, Ticket
+
+
+class SeedBenchmarkDataTest(TestCase):
+    def test_seed_creates_requested_tickets(self):
+        call_command(
+            "seed_benchmark_data",
+            domes=2, shows=5, sessions=10, tickets=300, users=3,
+            stdout=StringIO(),
+        )
+        self.assertEqual(ShowSession.objects.count(), 10)
+        self.assertEqual(Ticket.objects.count(), 300)
+
+
+class ReconcileTicketCountersTest(TestCase):
+    def setUp(self):
+        call_command(
+            "seed_benchmark_data",
+            domes=1, shows=1, sessions=3, tickets=30, users=1,
+            stdout=StringIO(),
+        )
+
+    def test_drifted_counters_repaired(self):
+        ShowSession.objects.update(tickets_sold=0)
+        out = StringIO()
+        call_command("reconcile_ticket_counters", dry_run=True, stdout=out)
+        self.assertIn("Found 3 drifted show sessions", out.getvalue())
+        self.assertEqual(set(ShowSession.objects.values_list("tickets_sold", flat=True)), {0})
+
+        out = StringIO()
+        call_command("reconcile_ticket_counters", stdout=out)
+        self.assertIn("Repaired 3 show sessions", out.getvalue())
+        self.assertEqual(set(ShowSession.objects.values_list("tickets_sold", flat=True)), {10})
+
+        out = StringIO()
+        call_command("reconcile_ticket_counters", stdout=out)
+        self.assertIn("Found 0 drifted show sessions", out.getvalue())
+
+
+class ExplainListQueriesTest(TestCase):
+    def test_list_queries_can_use_indexes(self):
+        call_command(
+            "seed_benchmark_data",
+            domes=2, shows=5, sessions=10, tickets=50, users=3,
+            stdout=StringIO(),
+        )
+        out = StringIO()
+        call_command("explain_list_queries", disable_seqscan=True, stdout=out)
+        self.assertIn("All list queries use index scans", out.getvalue())
+
+
+class FlakyConnection:
+    """Stands in for a database connection that refuses the first tries."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.queries = 0
+        self.closed = 0
+        self.settings_dict = {"OPTIONS": {}}
+        self.connect_timeouts = []
+
+    @contextmanager
+    def cursor(self):
+        self.connect_timeouts.append(self.settings_dict["OPTIONS"].get("connect_timeout"))
+        if self.failures:
+            self.failures -= 1
+            raise OperationalError("connection refused\nIs the server running?")
+        yield mock.Mock()
+        self.queries += 1
+
+    def close(self):
+        self.closed += 1
+
+
+@mock.patch("planetarium.management.commands.wait_for_db.time.sleep")
+class WaitForDbTest(TestCase):
+    def call(self, connection, **options):
+        out = StringIO()
+        with mock.patch(
+            "planetarium.management.commands.wait_for_db.connections",
+            {"default": connection},
+        ):
+            call_command("wait_for_db", stdout=out, **options)
+        return out.getvalue()
+
+    def test_retries_until_the_database_answers(self, sleep):
+        connection = FlakyConnection(failures=4)
+        out = self.call(connection, initial_delay=1, max_delay=4)
+
+        self.assertEqual(connection.queries, 1)
+        self.assertEqual(connection.closed, 4)
+        self.assertEqual(sleep.call_count, 4)
+        # exponential backoff with jitter, capped by max_delay
+        for (delay,), bound in zip((call.args for call in sleep.call_args_list), (1, 2, 4, 4)):
+            self.assertLessEqual(delay, bound)
+        self.assertIn("connection refused", out)
+        self.assertIn("connect", out.split("Startup timings: ")[1])
+        self.assertIn("(5 attempts)", out)
+
+    def test_fails_after_the_deadline(self, sleep):
+        with mock.patch(
+            "planetarium.management.commands.wait_for_db.time.monotonic",
+            side_effect=itertools.count(step=10),
+        ):
+            with self.assertRaisesMessage(CommandError, "Database not ready after 25 s"):
+                self.call(FlakyConnection(failures=10), timeout=25)
+        self.assertLessEqual(sleep.call_count, 3)
+
+    def test_connects_within_the_time_left(self, sleep):
+        connection = FlakyConnection(failures=2)
+        with mock.patch(
+            "planetarium.management.commands.wait_for_db.time.monotonic",
+            side_effect=itertools.count(step=4),
+        ):
+            self.call(connection, timeout=25)
+
+        # each try is bounded by what is left of the 25 s
+        self.assertEqual(connection.connect_timeouts, [17, 9, 1])
+        self.assertEqual(connection.settings_dict["OPTIONS"], {})
+
+    def test_checks_migrations(self, sleep):
+        out = StringIO()
+        with mock.patch(
+            "planetarium.management.commands.wait_for_db.MigrationExecutor.migration_plan",
+            side_effect=[["pending"], []],
+        ):
+            call_command("wait_for_db", check_migrations=True, stdout=out)
+        self.assertIn("migrations are not applied", out.getvalue())
+        self.assertIn("migrations", out.getvalue().split("Startup timings: ")[1])
+        self.assertEqual(sleep.call_count, 1)
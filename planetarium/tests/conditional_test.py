@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    PlanetariumDome,
+    ShowTheme,
+    AstronomyShow,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
+
+
+class ShowSessionConditionalGetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.client.force_authenticate(user=self.user)
+        self.astronomy_show = AstronomyShow.objects.create(title="Test", description="Test")
+        planetarium_dome = PlanetariumDome.objects.create(name="Test Dome", rows=5, seats_in_row=5)
+        self.show_session = ShowSession.objects.create(
+            astronomy_show=self.astronomy_show,
+            planetarium_dome=planetarium_dome,
+            show_time=datetime.now(),
+        )
+        self.url = reverse("planetarium:showsession-detail", args=[self.show_session.id])
+
+    def _etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Last-Modified", response)
+        return response["ETag"]
+
+    def test_if_none_match_returns_not_modified_from_one_query(self):
+        etag = self._etag()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since_is_not_answered(self):
+        self._etag()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, show_session=self.show_session, reservation=reservation)
+
+        # the sale may be in the same second as the previous response
+        since = http_date((timezone.now() + timedelta(minutes=1)).timestamp())
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["taken_places"], [{"row": 1, "seat": 1}])
+
+    def test_etag_depends_on_query(self):
+        etag = self._etag()
+        response = self.client.get(self.url, {"seat_map": "bitmap"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_ticket_sale_changes_etag(self):
+        etag = self._etag()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, show_session=self.show_session, reservation=reservation)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_reservation_changes_etag(self):
+        etag = self._etag()
+        self.client.post(
+            reverse("planetarium:reservation-list"),
+            {"tickets": [{"row": 1, "seat": 1, "show_session": self.show_session.id}]},
+            format="json",
+        )
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_show_theme_change_changes_etag(self):
+        etag = self._etag()
+        theme = ShowTheme.objects.create(name="Stars")
+        theme.astronomy_shows.add(self.astronomy_show)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["astronomy_show"]["show_theme"], ["Stars"])
+
+    def test_missing_show_session(self):
+        url = reverse("planetarium:showsession-detail", args=[self.show_session.id + 1])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,188 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from psycopg2 import extensions
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from config.db.base import DatabaseWrapper
+from config.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.rolled_back = False
+        self.info = mock.Mock(transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+
+    def rollback(self):
+        self.rolled_back = True
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def test_reuses_returned_connections(self):
+        pool = ConnectionPool(max_size=2)
+        first = pool.getconn(FakeConnection)
+        pool.putconn(first)
+
+        self.assertIs(pool.getconn(FakeConnection), first)
+        self.assertEqual(pool.stats()["created"], 1)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_waits_for_a_connection_when_full(self):
+        pool = ConnectionPool(max_size=1, timeout=5)
+        first = pool.getconn(FakeConnection)
+        threading.Timer(0.05, pool.putconn, (first,)).start()
+
+        self.assertIs(pool.getconn(FakeConnection), first)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_times_out_when_full(self):
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        pool.getconn(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(FakeConnection)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_concurrent_opens_stay_within_max_size(self):
+        pool = ConnectionPool(max_size=3, timeout=5)
+        lock = threading.Lock()
+        connecting = peak = 0
+
+        def connect():
+            nonlocal connecting, peak
+            with lock:
+                connecting += 1
+                peak = max(peak, connecting + pool.stats()["size"])
+            time.sleep(0.02)
+            with lock:
+                connecting -= 1
+            return FakeConnection()
+
+        def borrow():
+            nonlocal peak
+            connection = pool.getconn(connect)
+            with lock:
+                peak = max(peak, pool.stats()["size"])
+            time.sleep(0.01)
+            pool.putconn(connection)
+
+        threads = [threading.Thread(target=borrow) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(peak, 3)
+        self.assertEqual(pool.stats()["created"], 3)
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = ConnectionPool(max_size=1)
+        with self.assertRaises(OSError):
+            pool.getconn(mock.Mock(side_effect=OSError))
+
+        pool.getconn(FakeConnection)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_recycles_old_and_broken_connections(self):
+        pool = ConnectionPool(max_size=2, max_lifetime=60)
+        old, broken = pool.getconn(FakeConnection), pool.getconn(FakeConnection)
+        broken.info.transaction_status = extensions.TRANSACTION_STATUS_UNKNOWN
+        pool.putconn(broken)
+        with mock.patch("time.monotonic", return_value=time.monotonic() + 61):
+            pool.putconn(old)
+
+        self.assertTrue(old.closed and broken.closed)
+        self.assertEqual(pool.stats()["recycled"], 2)
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_rolls_back_open_transactions(self):
+        pool = ConnectionPool()
+        conn = pool.getconn(FakeConnection)
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INERROR
+        pool.putconn(conn)
+
+        self.assertTrue(conn.rolled_back)
+        self.assertIs(pool.getconn(FakeConnection), conn)
+
+    def test_checks_idle_connections(self):
+        pool = ConnectionPool(check=True)
+        dead = pool.getconn(FakeConnection)
+        pool.putconn(dead)
+        dead.cursor = mock.Mock(side_effect=OSError)
+
+        self.assertIsNot(pool.getconn(FakeConnection), dead)
+        self.assertEqual(pool.stats()["recycled"], 1)
+
+    def test_checks_idle_connections_outside_the_lock(self):
+        pool = ConnectionPool(check=True)
+        idle = pool.getconn(FakeConnection)
+        pool.putconn(idle)
+        stats = []
+
+        def execute(sql):
+            # another thread can use the pool during the round trip
+            thread = threading.Thread(target=lambda: stats.append(pool.stats()))
+            thread.start()
+            thread.join(1)
+
+        idle.cursor = mock.MagicMock()
+        idle.cursor.return_value.__enter__.return_value.execute.side_effect = execute
+        self.assertIs(pool.getconn(FakeConnection), idle)
+        self.assertEqual(stats[0]["in_use"], 1)
+
+
+class PooledDatabaseWrapperTest(TestCase):
+    def wrapper(self):
+        settings_dict = {
+            **connection.settings_dict,
+            "OPTIONS": {"pool": {"max_size": 1, "timeout": 0.05}},
+            "CONN_MAX_AGE": 0,
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias=connection.alias)
+        self.addCleanup(lambda: wrapper.pool.closeall())
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_connections_go_back_to_the_pool(self):
+        first = self.wrapper()
+        with first.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            pid = cursor.fetchone()[0]
+        first.close()
+
+        second = self.wrapper()
+        with second.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            self.assertEqual(cursor.fetchone()[0], pid)
+
+            # the only connection is checked out
+            with self.assertRaises(PoolTimeout):
+                self.wrapper().ensure_connection()
+        second.close()
+        self.assertEqual(second.pool.stats()["in_use"], 0)
+
+
+class DatabasePoolStatsViewTest(TestCase):
+    def test_staff_only(self):
+        client = APIClient()
+        url = reverse("planetarium:db-pool-stats")
+        client.force_authenticate(get_user_model().objects.create_user(email="test@gmail.com", password="test"))
+        self.assertEqual(client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        client.force_authenticate(
+            get_user_model().objects.create_user(email="staff@gmail.com", password="test", is_staff=True)
+        )
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.data, dict)
@@ -0,0 +1,139 @@
+import csv
+import json
+from datetime import datetime
+from io import StringIO
+from zoneinfo import ZoneInfo
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium import export
+from planetarium.models import (
+    PlanetariumDome,
+    AstronomyShow,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
+
+CSV_URL = reverse("planetarium:export-tickets", args=["csv"])
+NDJSON_URL = reverse("planetarium:export-tickets", args=["ndjson"])
+UTC = ZoneInfo("UTC")
+
+
+class TicketExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@gmail.com", password="admin", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.dome = PlanetariumDome.objects.create(name="Dome", rows=5, seats_in_row=5)
+        self.other_dome = PlanetariumDome.objects.create(name="Other, with a comma", rows=5, seats_in_row=5)
+        show = AstronomyShow.objects.create(title="Stars", description="Test")
+        self.march = ShowSession.objects.create(
+            astronomy_show=show,
+            planetarium_dome=self.dome,
+            show_time=datetime(2024, 3, 1, 10, tzinfo=UTC),
+        )
+        self.april = ShowSession.objects.create(
+            astronomy_show=show,
+            planetarium_dome=self.other_dome,
+            show_time=datetime(2024, 4, 1, 10, tzinfo=UTC),
+        )
+        self.reservation = Reservation.objects.create(user=self.user)
+        self.tickets = [
+            Ticket.objects.create(show_session=show_session, reservation=self.reservation, row=1, seat=seat)
+            for show_session in (self.march, self.april)
+            for seat in (1, 2, 3)
+        ]
+
+    def _get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv(self):
+        rows = list(csv.reader(StringIO(self._get(CSV_URL))))
+        self.assertEqual(rows[0], [name for name, _ in export.COLUMNS])
+        self.assertEqual([int(row[0]) for row in rows[1:]], [ticket.id for ticket in self.tickets])
+        self.assertEqual(
+            rows[4],
+            [
+                str(self.tickets[3].id), "1", "1",
+                str(self.reservation.id), self.reservation.created_at.isoformat().replace("+00:00", "Z"),
+                str(self.user.id), "test@gmail.com",
+                str(self.april.id), "2024-04-01T10:00:00Z",
+                str(self.april.astronomy_show_id), "Stars",
+                str(self.other_dome.id), "Other, with a comma",
+            ],
+        )
+
+    def test_ndjson(self):
+        lines = self._get(NDJSON_URL, planetarium_dome=self.dome.id).splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row["ticket_id"] for row in rows], [ticket.id for ticket in self.tickets[:3]])
+        self.assertEqual(rows[0]["show_time"], "2024-03-01T10:00:00Z")
+        self.assertEqual(rows[0]["user_email"], "test@gmail.com")
+
+    def test_filter_by_dates(self):
+        rows = list(csv.DictReader(StringIO(self._get(CSV_URL, date_from="2024-03-15", date_to="2024-04-01"))))
+        self.assertEqual({row["show_session_id"] for row in rows}, {str(self.april.id)})
+
+    def test_any_accept_header(self):
+        response = self.client.get(CSV_URL, HTTP_ACCEPT="text/csv")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="tickets.csv"', response["Content-Disposition"])
+
+    def test_staff_only_and_invalid_params(self):
+        self.assertEqual(
+            self.client.get(CSV_URL, {"date_from": "yesterday"}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get(CSV_URL).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_streamed_in_chunks(self):
+        chunks = list(export.stream(export.tickets_for_export(), "csv", chunk_size=4))
+        # the header, then 4 + 2 rows
+        self.assertEqual([chunk.count("\n") for chunk in chunks], [1, 4, 2])
+
+    def test_async_stream_matches(self):
+        async def read(queryset):
+            return [chunk async for chunk in export.astream(queryset, "ndjson", chunk_size=4)]
+
+        queryset = export.tickets_for_export()
+        self.assertEqual(
+            "".join(async_to_sync(read)(queryset)),
+            "".join(export.stream(queryset, "ndjson", chunk_size=4)),
+        )
+
+    def test_command(self):
+        out, err = StringIO(), StringIO()
+        call_command("export_tickets", "--planetarium-dome", self.dome.id, stdout=out, stderr=err)
+        self.assertEqual(len(list(csv.reader(StringIO(out.getvalue())))), 4)
+        self.assertIn("Exported 3 tickets", err.getvalue())
+
+        out, err = StringIO(), StringIO()
+        call_command("export_tickets", "--format", "ndjson", "--date-to", "2024-03-31", stdout=out, stderr=err)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+    def test_command_copy(self):
+        out, err = StringIO(), StringIO()
+        call_command("export_tickets", "--copy", stdout=out, stderr=err)
+        rows = list(csv.reader(StringIO(out.getvalue())))
+        self.assertEqual(rows[0], [name for name, _ in export.COLUMNS])
+        self.assertEqual([int(row[0]) for row in rows[1:]], [ticket.id for ticket in self.tickets])
+        self.assertEqual(rows[6][-1], "Other, with a comma")
+        self.assertIn("Exported 6 tickets", err.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command("export_tickets", "--copy", "--format", "ndjson", stdout=out)
@@ -0,0 +1,146 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import PlanetariumDome, AstronomyShow, ShowSession
+
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+UTC = ZoneInfo("UTC")
+
+
+class ShowSessionFilterTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.client.force_authenticate(user=self.user)
+        self.small_dome = PlanetariumDome.objects.create(name="Small", rows=1, seats_in_row=2)
+        self.big_dome = PlanetariumDome.objects.create(name="Big", rows=5, seats_in_row=5)
+        self.stars = AstronomyShow.objects.create(title="Stars", description="Test")
+        self.comets = AstronomyShow.objects.create(title="Comets", description="Test")
+        self.moons = AstronomyShow.objects.create(title="Moons", description="Test")
+
+        def session(show, dome, *show_time, tickets_sold=0):
+            return ShowSession.objects.create(
+                astronomy_show=show,
+                planetarium_dome=dome,
+                show_time=datetime(*show_time, tzinfo=UTC),
+                tickets_sold=tickets_sold,
+            )
+
+        self.late_evening = session(self.stars, self.small_dome, 2024, 3, 1, 23, 30, tickets_sold=2)
+        self.midnight = session(self.comets, self.big_dome, 2024, 3, 2, 0, 0)
+        self.afternoon = session(self.moons, self.big_dome, 2024, 3, 2, 15, 0)
+        self.next_day = session(self.stars, self.big_dome, 2024, 3, 3, 10, 0)
+
+    def _ids(self, params):
+        response = self.client.get(SHOW_SESSION_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {item["id"] for item in response.data["results"]}
+
+    def test_filter_by_date(self):
+        self.assertEqual(
+            self._ids({"date": "2024-03-02"}),
+            {self.midnight.id, self.afternoon.id},
+        )
+
+    @override_settings(TIME_ZONE="America/New_York")
+    def test_filter_by_date_in_current_time_zone(self):
+        # 2024-03-01 23:30 UTC and midnight are still March 1st in New York
+        self.assertEqual(
+            self._ids({"date": "2024-03-01"}),
+            {self.late_evening.id, self.midnight.id},
+        )
+
+    def test_filter_by_date_range(self):
+        self.assertEqual(
+            self._ids({"date_from": "2024-03-02"}),
+            {self.midnight.id, self.afternoon.id, self.next_day.id},
+        )
+        self.assertEqual(
+            self._ids({"date_to": "2024-03-02"}),
+            {self.late_evening.id, self.midnight.id, self.afternoon.id},
+        )
+        self.assertEqual(
+            self._ids({"date_from": "2024-03-02", "date_to": "2024-03-02"}),
+            self._ids({"date": "2024-03-02"}),
+        )
+
+    def test_filter_by_astronomy_shows(self):
+        self.assertEqual(
+            self._ids({"astronomy_show": self.stars.id}),
+            {self.late_evening.id, self.next_day.id},
+        )
+        self.assertEqual(
+            self._ids({"astronomy_show": f"{self.comets.id},{self.moons.id}"}),
+            {self.midnight.id, self.afternoon.id},
+        )
+
+    def test_filter_by_planetarium_dome(self):
+        self.assertEqual(
+            self._ids({"planetarium_dome": self.small_dome.id}),
+            {self.late_evening.id},
+        )
+
+    def test_filter_by_available_seats(self):
+        self.assertEqual(
+            self._ids({"has_available_seats": "true"}),
+            {self.midnight.id, self.afternoon.id, self.next_day.id},
+        )
+        self.assertEqual(
+            self._ids({"has_available_seats": "false"}),
+            {self.late_evening.id},
+        )
+
+    def test_filters_combine(self):
+        self.assertEqual(
+            self._ids({
+                "date": "2024-03-02",
+                "astronomy_show": f"{self.stars.id},{self.moons.id}",
+                "planetarium_dome": self.big_dome.id,
+            }),
+            {self.afternoon.id},
+        )
+
+    def test_ignores_unrelated_params(self):
+        # the old view read the date from ?title and the show from ?show_theme
+        self.assertEqual(
+            self._ids({"title": "2024-03-02", "show_theme": self.stars.id}),
+            {session.id for session in ShowSession.objects.all()},
+        )
+
+    def test_invalid_params(self):
+        for field, params in (
+            ("date", {"date": "03/02/2024"}),
+            ("date_to", {"date_from": "2024-03-03", "date_to": "2024-03-02"}),
+            ("astronomy_show", {"astronomy_show": "1,stars"}),
+            ("planetarium_dome", {"planetarium_dome": "big"}),
+            ("has_available_seats", {"has_available_seats": "maybe"}),
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(SHOW_SESSION_URL, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(field, response.data)
+
+    def test_date_filter_is_a_show_time_range(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(SHOW_SESSION_URL, {"date": "2024-03-02"})
+        sql = next(
+            query["sql"] for query in queries
+            if 'FROM "planetarium_showsession"' in query["sql"]
+        )
+        self.assertIn(
+            '"planetarium_showsession"."show_time" >= \'2024-03-02T00:00:00+00:00\'', sql
+        )
+        self.assertIn(
+            '"planetarium_showsession"."show_time" < \'2024-03-03T00:00:00+00:00\'', sql
+        )
+        self.assertNotIn("AT TIME ZONE", sql)
+        self.assertNotIn("::date", sql)
+        self.assertNotIn("DISTINCT", sql)
@@ -58,8 +58,29 @@ class ShowSessionTest(TestCase):
         user = sample_user()
         reservation = Reservation.objects.create(user=user, created_at=datetime.datetime.now())
         Ticket.objects.create(row=1, seat=1, show_session=self.session, reservation=reservation)
+        self.session.refresh_from_db()
         self.assertEqual(self.session.tickets_available, self.dome.capacity - 1)
 
+    def test_tickets_sold_follows_ticket_changes(self):
+        user = sample_user()
+        reservation = Reservation.objects.create(user=user)
+        other_session = ShowSession.objects.create(
+            astronomy_show=self.show, planetarium_dome=self.dome, show_time="2024-01-01 12:00:00+00:00"
+        )
+        ticket = Ticket.objects.create(row=1, seat=1, show_session=self.session, reservation=reservation)
+        Ticket.objects.create(row=1, seat=2, show_session=self.session, reservation=reservation)
+
+        ticket.show_session = other_session
+        ticket.save()
+        self.session.refresh_from_db()
+        other_session.refresh_from_db()
+        self.assertEqual((self.session.tickets_sold, other_session.tickets_sold), (1, 1))
+
+        reservation.delete()
+        self.session.refresh_from_db()
+        other_session.refresh_from_db()
+        self.assertEqual((self.session.tickets_sold, other_session.tickets_sold), (0, 0))
+
     def test_str_representation(self):
         self.assertEqual(
             str(self.session),
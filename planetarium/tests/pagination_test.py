@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    PlanetariumDome,
+    AstronomyShow,
+    ShowSession,
+    Reservation,
+)
+from planetarium.pagination import ShowSessionPagination
+
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+RESERVATION_URL = reverse("planetarium:reservation-list")
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.client.force_authenticate(user=self.user)
+        astronomy_show = AstronomyShow.objects.create(title="Test", description="Test")
+        planetarium_dome = PlanetariumDome.objects.create(name="Test Dome", rows=5, seats_in_row=5)
+        show_time = timezone.make_aware(datetime(2024, 1, 1, 12))
+        self.show_sessions = [
+            ShowSession.objects.create(
+                astronomy_show=astronomy_show,
+                planetarium_dome=planetarium_dome,
+                show_time=show_time + timedelta(hours=index // 2),
+            )
+            for index in range(7)
+        ]
+
+    def _collect_pages(self, url, params):
+        ids = []
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item["id"] for item in response.data["results"])
+            url, params = response.data["next"], None
+        return ids
+
+    def test_show_sessions_cursor_pages_follow_ordering(self):
+        ids = self._collect_pages(SHOW_SESSION_URL, {"page_size": 3})
+        expected = ShowSession.objects.order_by("-show_time", "id").values_list("id", flat=True)
+        self.assertEqual(ids, list(expected))
+
+    def test_show_sessions_cursor_page_has_no_offset_scan(self):
+        ShowSession.objects.filter(id__in=[s.id for s in self.show_sessions[1::2]]).delete()
+        response = self.client.get(SHOW_SESSION_URL, {"page_size": 2})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(response.data["next"])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("OFFSET", queries[0]["sql"])
+
+    @patch.object(ShowSessionPagination, "max_page_size", 2)
+    def test_page_size_is_capped(self):
+        response = self.client.get(SHOW_SESSION_URL, {"page_size": 1000})
+        self.assertEqual(len(response.data["results"]), 2)
+
+    @override_settings(PAGINATION={"PAGE_SIZE": 20, "MAX_PAGE_SIZE": 100, "RESPONSE_SHAPE": "link_header"})
+    def test_link_header_response_shape(self):
+        response = self.client.get(SHOW_SESSION_URL, {"page_size": 2})
+        self.assertEqual(len(response.data), 2)
+        self.assertIn('rel="next"', response["Link"])
+
+    def test_limit_offset_for_staff(self):
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(SHOW_SESSION_URL, {"limit": 2, "offset": 2})
+        self.assertEqual(response.data["count"], 7)
+        expected = ShowSession.objects.order_by("-show_time", "id").values_list("id", flat=True)
+        self.assertEqual([item["id"] for item in response.data["results"]], list(expected[2:4]))
+
+    def test_limit_offset_ignored_for_regular_user(self):
+        response = self.client.get(SHOW_SESSION_URL, {"limit": 2, "offset": 2})
+        self.assertNotIn("count", response.data)
+        self.assertEqual(len(response.data["results"]), 7)
+
+    def test_reservations_cursor_pages(self):
+        for _ in range(5):
+            Reservation.objects.create(user=self.user)
+        ids = self._collect_pages(RESERVATION_URL, {"page_size": 2})
+        expected = Reservation.objects.order_by("-created_at", "id").values_list("id", flat=True)
+        self.assertEqual(ids, list(expected))
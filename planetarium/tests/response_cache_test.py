@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium import response_cache
+from planetarium.models import PlanetariumDome, ShowTheme, AstronomyShow
+
+PLANETARIUM_DOME_URL = reverse("planetarium:planetariumdome-list")
+ASTRONOMY_SHOW_URL = reverse("planetarium:astronomyshow-list")
+STATS_URL = reverse("planetarium:response-cache-stats")
+
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        response_cache.invalidate()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.client.force_authenticate(user=self.user)
+        self.dome = PlanetariumDome.objects.create(name="Test Dome", rows=5, seats_in_row=5)
+
+    def test_repeated_get_served_from_cache(self):
+        response = self.client.get(PLANETARIUM_DOME_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(PLANETARIUM_DOME_URL)
+
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached["ETag"], response["ETag"])
+        self.assertEqual(cached.json()[0]["name"], "Test Dome")
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.client.get(PLANETARIUM_DOME_URL)["ETag"]
+
+        response = self.client.get(PLANETARIUM_DOME_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_query_params_are_normalized(self):
+        self.client.get(ASTRONOMY_SHOW_URL + "?title=a&show_theme=1")
+
+        with self.assertNumQueries(0):
+            self.client.get(ASTRONOMY_SHOW_URL + "?show_theme=1&title=a")
+
+    def test_catalog_change_invalidates(self):
+        self.client.get(PLANETARIUM_DOME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dome.name = "Renamed Dome"
+            self.dome.save()
+
+        response = self.client.get(PLANETARIUM_DOME_URL)
+        self.assertEqual(response.json()[0]["name"], "Renamed Dome")
+
+    def test_show_theme_m2m_change_invalidates(self):
+        show = AstronomyShow.objects.create(title="Test", description="Test")
+        theme = ShowTheme.objects.create(name="Stars")
+        url = reverse("planetarium:astronomyshow-detail", args=[show.id])
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            show.show_theme.add(theme)
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()["show_theme"], [{"id": theme.id, "name": "Stars"}])
+
+    def test_browsable_api_bypasses_cache(self):
+        self.client.get(PLANETARIUM_DOME_URL)
+        response = self.client.get(PLANETARIUM_DOME_URL, {"format": "api"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", response)
+
+    def test_stats(self):
+        self.client.get(PLANETARIUM_DOME_URL)
+        self.client.get(PLANETARIUM_DOME_URL)
+
+        self.assertEqual(self.client.get(STATS_URL).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        stats = self.client.get(STATS_URL).data
+        self.assertGreaterEqual(stats["misses"], 1)
+        self.assertGreaterEqual(stats["local_hits"], 1)
@@ -0,0 +1,205 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import PlanetariumDome, AstronomyShow, ShowSession
+from planetarium.schedule_import import (
+    ScheduleImportError,
+    import_sessions,
+    parse_rows,
+)
+
+IMPORT_URL = reverse("planetarium:showsession-import")
+UTC = ZoneInfo("UTC")
+
+
+@override_settings(
+    TIME_ZONE="UTC",
+    SCHEDULE_IMPORT={"SESSION_MINUTES": 60, "BATCH_SIZE": 2, "MAX_ROWS": 5},
+)
+class ScheduleImportTest(TestCase):
+    def setUp(self):
+        self.dome = PlanetariumDome.objects.create(name="Big Dome", rows=5, seats_in_row=5)
+        self.small_dome = PlanetariumDome.objects.create(name="Small Dome", rows=2, seats_in_row=2)
+        self.show = AstronomyShow.objects.create(title="Stars", description="Test")
+        self.scheduled = ShowSession.objects.create(
+            astronomy_show=self.show,
+            planetarium_dome=self.dome,
+            show_time=datetime(2024, 3, 1, 12, tzinfo=UTC),
+        )
+
+    def errors(self, rows):
+        with self.assertRaises(ScheduleImportError) as raised:
+            import_sessions(rows)
+        return [(error["row"], error["field"]) for error in raised.exception.errors]
+
+    def test_import_by_id_and_name(self):
+        rows = [
+            {"astronomy_show": "Stars", "planetarium_dome": "Big Dome", "show_time": "2024-03-01T10:00:00Z"},
+            {"astronomy_show": self.show.id, "planetarium_dome": str(self.small_dome.id),
+             "show_time": "2024-03-01T12:00:00"},
+            {"astronomy_show": "Stars", "planetarium_dome": "Big Dome", "show_time": "2024-03-01T13:00:00Z"},
+        ]
+        progress = []
+        with self.assertNumQueries(2 + 1 + 1 + 2 + 2):
+            # shows and domes, dome locks, scheduled sessions, 2 batches
+            # and the savepoint of the transaction
+            result = import_sessions(rows, progress=lambda *args: progress.append(args))
+
+        self.assertEqual(result["rows"], 3)
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+        created = ShowSession.objects.filter(id__in=result["created"]).order_by("id")
+        self.assertEqual(
+            [(session.planetarium_dome_id, session.show_time) for session in created],
+            [
+                (self.dome.id, datetime(2024, 3, 1, 10, tzinfo=UTC)),
+                (self.small_dome.id, datetime(2024, 3, 1, 12, tzinfo=UTC)),
+                (self.dome.id, datetime(2024, 3, 1, 13, tzinfo=UTC)),
+            ],
+        )
+
+    def test_overlaps(self):
+        rows = [
+            # overlaps the session scheduled at 12:00
+            {"astronomy_show": "Stars", "planetarium_dome": "Big Dome", "show_time": "2024-03-01T11:30:00Z"},
+            {"astronomy_show": "Stars", "planetarium_dome": "Small Dome", "show_time": "2024-03-01T10:00:00Z"},
+            {"astronomy_show": "Stars", "planetarium_dome": "Small Dome", "show_time": "2024-03-01T10:59:00Z"},
+            # right before and after the others
+            {"astronomy_show": "Stars", "planetarium_dome": "Big Dome", "show_time": "2024-03-01T10:30:00Z"},
+            {"astronomy_show": "Stars", "planetarium_dome": "Big Dome", "show_time": "2024-03-01T13:00:00Z"},
+        ]
+        self.assertEqual(self.errors(rows), [(1, "show_time"), (3, "show_time")])
+        self.assertEqual(ShowSession.objects.count(), 1)
+
+    def test_invalid_rows(self):
+        PlanetariumDome.objects.create(name="Big Dome", rows=1, seats_in_row=1)
+        rows = [
+            {"astronomy_show": "Planets", "planetarium_dome": self.small_dome.id, "show_time": "2024-05-01T10:00"},
+            {"astronomy_show": "Stars", "planetarium_dome": "Big Dome", "show_time": "2024-05-01T10:00"},
+            {"astronomy_show": "Stars", "planetarium_dome": self.small_dome.id, "show_time": "tomorrow"},
+            {"astronomy_show": "Stars", "show_time": "2024-05-01T10:00"},
+            "Stars",
+        ]
+        self.assertEqual(
+            self.errors(rows),
+            [
+                (1, "astronomy_show"),
+                (2, "planetarium_dome"),
+                (3, "show_time"),
+                (4, "planetarium_dome"),
+                (5, None),
+            ],
+        )
+
+    def test_dry_run(self):
+        rows = [{"astronomy_show": "Stars", "planetarium_dome": "Big Dome", "show_time": "2024-03-02T10:00:00Z"}]
+        result = import_sessions(rows, dry_run=True)
+        self.assertEqual((result["rows"], result["created"]), (1, []))
+        self.assertEqual(ShowSession.objects.count(), 1)
+
+    def test_parse_rows(self):
+        csv_rows = parse_rows(
+            "astronomy_show,planetarium_dome,show_time\nStars,\"Big Dome\",2024-03-02T10:00\n", "csv"
+        )
+        self.assertEqual(
+            csv_rows,
+            [{"astronomy_show": "Stars", "planetarium_dome": "Big Dome", "show_time": "2024-03-02T10:00"}],
+        )
+        self.assertEqual(parse_rows(json.dumps(csv_rows[0]) + "\n\n", "ndjson"), csv_rows)
+        with self.assertRaises(ScheduleImportError):
+            parse_rows("{}", "json")
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "schedule.ndjson")
+            with open(path, "w") as file:
+                for hour in (8, 9, 10):
+                    file.write(json.dumps({
+                        "astronomy_show": "Stars",
+                        "planetarium_dome": "Big Dome",
+                        "show_time": f"2024-03-01T{hour:02}:00:00Z",
+                    }) + "\n")
+
+            out = StringIO()
+            call_command("import_schedule", path, "--dry-run", stdout=out)
+            self.assertIn("3 sessions can be imported", out.getvalue())
+            self.assertEqual(ShowSession.objects.count(), 1)
+
+            out, err = StringIO(), StringIO()
+            with self.assertRaises(CommandError):
+                call_command("import_schedule", path, "--session-minutes", "61", stdout=out, stderr=err)
+            self.assertIn("row 2, show_time: Overlaps row 1.", err.getvalue())
+
+            out = StringIO()
+            call_command("import_schedule", path, stdout=out)
+            self.assertIn("Inserted 2/3 sessions", out.getvalue())
+            self.assertIn("Imported 3 sessions", out.getvalue())
+            self.assertIn("rows/s", out.getvalue())
+            self.assertEqual(ShowSession.objects.count(), 4)
+
+
+@override_settings(SCHEDULE_IMPORT={"SESSION_MINUTES": 60, "BATCH_SIZE": 1000, "MAX_ROWS": 2})
+class ScheduleImportViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@gmail.com", password="admin", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+        PlanetariumDome.objects.create(name="Dome", rows=5, seats_in_row=5)
+        AstronomyShow.objects.create(title="Stars", description="Test")
+
+    def test_import_json(self):
+        rows = [{"astronomy_show": "Stars", "planetarium_dome": "Dome", "show_time": "2024-03-01T10:00:00Z"}]
+        response = self.client.post(IMPORT_URL + "?dry_run=true", rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], [])
+        self.assertFalse(ShowSession.objects.exists())
+
+        response = self.client.post(IMPORT_URL, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["rows"], 1)
+        self.assertEqual(response.data["created"], list(ShowSession.objects.values_list("id", flat=True)))
+
+        response = self.client.post(IMPORT_URL, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0]["field"], "show_time")
+
+    def test_import_csv_and_ndjson(self):
+        response = self.client.post(
+            IMPORT_URL,
+            "astronomy_show,planetarium_dome,show_time\nStars,Dome,2024-03-01T10:00:00Z\n",
+            content_type="text/csv",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(
+            IMPORT_URL,
+            '{"astronomy_show": "Stars", "planetarium_dome": "Dome", "show_time": "2024-03-01T12:00:00Z"}\n',
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(ShowSession.objects.count(), 2)
+
+        response = self.client.post(IMPORT_URL, "{not json\n", content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_limits_and_permissions(self):
+        rows = [{"astronomy_show": "Stars", "planetarium_dome": "Dome", "show_time": "2024-03-01T10:00:00Z"}] * 3
+        response = self.client.post(IMPORT_URL, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.client.force_authenticate(user=user)
+        response = self.client.post(IMPORT_URL, rows[:1], format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
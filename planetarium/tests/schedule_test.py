@@ -0,0 +1,133 @@
+from datetime import date, datetime
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import PlanetariumDome, AstronomyShow, ShowSession
+
+CALENDAR_URL = reverse("planetarium:showsession-calendar")
+UTC = ZoneInfo("UTC")
+
+
+@patch("django.utils.timezone.localdate", lambda *args: date(2024, 3, 3))
+class ShowSessionCalendarTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.client.force_authenticate(user=self.user)
+        self.small_dome = PlanetariumDome.objects.create(name="Small", rows=2, seats_in_row=5)
+        self.big_dome = PlanetariumDome.objects.create(name="Big", rows=10, seats_in_row=10)
+        show = AstronomyShow.objects.create(title="Stars", description="Test")
+
+        for dome, show_time, tickets_sold in (
+            (self.small_dome, (2024, 3, 1, 23, 30), 10),
+            (self.small_dome, (2024, 3, 2, 18, 0), 4),
+            (self.big_dome, (2024, 3, 2, 11, 0), 30),
+            (self.big_dome, (2024, 3, 2, 14, 0), 0),
+            (self.big_dome, (2024, 3, 4, 10, 0), 5),
+        ):
+            ShowSession.objects.create(
+                astronomy_show=show,
+                planetarium_dome=dome,
+                show_time=datetime(*show_time, tzinfo=UTC),
+                tickets_sold=tickets_sold,
+            )
+
+    def _get(self, **params):
+        response = self.client.get(CALENDAR_URL, {"from": "2024-03-01", "to": "2024-03-31", **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_days(self):
+        self.assertEqual(
+            self._get().json(),
+            [
+                {
+                    "date": "2024-03-01",
+                    "sessions": 1,
+                    "capacity": 10,
+                    "seats_sold": 10,
+                    "first_show_time": "2024-03-01T23:30:00Z",
+                },
+                {
+                    "date": "2024-03-02",
+                    "sessions": 3,
+                    "capacity": 210,
+                    "seats_sold": 34,
+                    "first_show_time": "2024-03-02T11:00:00Z",
+                },
+                {
+                    "date": "2024-03-04",
+                    "sessions": 1,
+                    "capacity": 100,
+                    "seats_sold": 5,
+                    "first_show_time": "2024-03-04T10:00:00Z",
+                },
+            ],
+        )
+
+    def test_days_by_dome(self):
+        days = self._get(by_dome="true", to="2024-03-02").json()
+        self.assertEqual(
+            [(day["date"], day["planetarium_dome"], day["sessions"], day["seats_sold"]) for day in days],
+            [
+                ("2024-03-01", self.small_dome.id, 1, 10),
+                ("2024-03-02", self.small_dome.id, 1, 4),
+                ("2024-03-02", self.big_dome.id, 2, 30),
+            ],
+        )
+
+    def test_filter_by_planetarium_dome(self):
+        days = self._get(planetarium_dome=self.small_dome.id).json()
+        self.assertEqual([(day["date"], day["capacity"]) for day in days], [("2024-03-01", 10), ("2024-03-02", 10)])
+
+    @override_settings(TIME_ZONE="Europe/Berlin")
+    def test_days_in_current_time_zone(self):
+        days = self._get(to="2024-03-02").json()
+        # 23:30 UTC on March 1st is already March 2nd in Berlin
+        self.assertEqual([(day["date"], day["sessions"]) for day in days], [("2024-03-02", 4)])
+
+    def test_computed_in_one_grouped_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._get()
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]["sql"]
+        self.assertIn("GROUP BY", sql)
+        self.assertIn('"planetarium_showsession"."show_time" >= ', sql)
+
+    def test_past_days_are_cached(self):
+        self._get()
+        with CaptureQueriesContext(connection) as queries:
+            days = self._get().json()
+        # only today and later are queried again
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([day["date"] for day in days], ["2024-03-01", "2024-03-02", "2024-03-04"])
+
+        # a range in the past is served from the days cached above
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get(to="2024-03-02").json(), days[:2])
+
+    def test_cache_control(self):
+        self.assertIn("immutable", self._get(to="2024-03-02")["Cache-Control"])
+        self.assertFalse(self._get(to="2024-03-03").has_header("Cache-Control"))
+
+    def test_invalid_params(self):
+        for field, params in (
+            ("from", {"to": "2024-03-31"}),
+            ("to", {"from": "2024-03-31", "to": "2024-03-01"}),
+            ("to", {"from": "2024-01-01", "to": "2025-12-31"}),
+            ("planetarium_dome", {"from": "2024-03-01", "to": "2024-03-31", "planetarium_dome": "big"}),
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(CALENDAR_URL, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(field, response.data)
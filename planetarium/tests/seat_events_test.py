@@ -0,0 +1,253 @@
+import asyncio
+import base64
+import json
+import threading
+from datetime import datetime
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium import seat_events
+from planetarium.models import (
+    PlanetariumDome,
+    AstronomyShow,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
+
+MEMORY_BROKER = {**settings.SEAT_EVENTS, "BROKER": "memory"}
+
+
+def parse_event(chunk):
+    name, data = chunk.decode().strip().split("\n")
+    return name.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+@override_settings(SEAT_EVENTS=MEMORY_BROKER)
+class SeatEventHubTest(SimpleTestCase):
+    async def test_one_publish_reaches_every_subscriber(self):
+        queues = [seat_events.hub.subscribe(1) for _ in range(1000)]
+        try:
+            seat_events.get_broker().publish(1, {"taken": [[1, 1]], "released": []})
+            events = await asyncio.gather(*(queue.get() for queue in queues))
+        finally:
+            for queue in queues:
+                seat_events.hub.unsubscribe(1, queue)
+
+        self.assertEqual(events, [{"taken": [[1, 1]], "released": []}] * 1000)
+        self.assertEqual(seat_events.hub.subscriber_count(), 0)
+
+    @override_settings(SEAT_EVENTS={**MEMORY_BROKER, "QUEUE_SIZE": 2})
+    async def test_slow_subscriber_is_resynced(self):
+        queue = seat_events.hub.subscribe(1)
+        try:
+            for seat in range(1, 4):
+                seat_events.hub.dispatch(1, {"taken": [[1, seat]], "released": []})
+            await asyncio.sleep(0)
+        finally:
+            seat_events.hub.unsubscribe(1, queue)
+
+        self.assertEqual(queue.qsize(), 1)
+        self.assertIsNone(queue.get_nowait())
+
+    async def test_seats_changed_publishes_per_show_session(self):
+        first, second = seat_events.hub.subscribe(1), seat_events.hub.subscribe(2)
+        try:
+            seat_events.seats_changed(
+                taken=[(1, 1, 1), (2, 1, 2)], released=[(1, 2, 2)]
+            )
+            events = [await first.get(), await second.get()]
+        finally:
+            seat_events.hub.unsubscribe(1, first)
+            seat_events.hub.unsubscribe(2, second)
+
+        self.assertEqual(
+            events,
+            [
+                {"taken": [[1, 1]], "released": [[2, 2]]},
+                {"taken": [[1, 2]], "released": []},
+            ],
+        )
+
+
+@override_settings(SEAT_EVENTS=MEMORY_BROKER)
+class TicketSeatEventsTest(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        planetarium_dome = PlanetariumDome.objects.create(name="Test Dome", rows=5, seats_in_row=10)
+        self.show_session = ShowSession.objects.create(
+            astronomy_show=AstronomyShow.objects.create(title="Test", description="Test"),
+            planetarium_dome=planetarium_dome,
+            show_time=datetime.now(),
+        )
+        self.reservation = Reservation.objects.create(user=user)
+        self.published = []
+        broker = seat_events.get_broker()
+        broker.publish = lambda show_session_id, event: self.published.append(
+            (show_session_id, event)
+        )
+        self.addCleanup(vars(broker).pop, "publish")
+
+    def test_ticket_changes_are_published_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = Ticket.objects.create(
+                show_session=self.show_session, reservation=self.reservation, row=1, seat=1
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.seat = 2
+            ticket.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+
+        self.assertEqual(
+            self.published,
+            [
+                (self.show_session.id, {"taken": [[1, 1]], "released": []}),
+                (self.show_session.id, {"taken": [[1, 2]], "released": [[1, 1]]}),
+                (self.show_session.id, {"taken": [], "released": [[1, 2]]}),
+            ],
+        )
+
+
+@override_settings(SEAT_EVENTS=MEMORY_BROKER)
+class ShowSessionSeatsStreamTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+        planetarium_dome = PlanetariumDome.objects.create(name="Test Dome", rows=2, seats_in_row=4)
+        self.show_session = ShowSession.objects.create(
+            astronomy_show=AstronomyShow.objects.create(title="Test", description="Test"),
+            planetarium_dome=planetarium_dome,
+            show_time=datetime.now(),
+        )
+        Ticket.objects.create(
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=user),
+            row=1,
+            seat=1,
+        )
+        self.url = reverse(
+            "planetarium:showsession-seats-stream", args=[self.show_session.id]
+        )
+
+    async def test_stream_sends_snapshot_then_deltas(self):
+        response = await self.async_client.get(self.url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        events = response.streaming_content
+        name, snapshot = parse_event(await anext(events))
+        self.assertEqual(name, "snapshot")
+        self.assertEqual(snapshot["rows"], 2)
+        self.assertEqual(base64.b64decode(snapshot["taken"]), bytes([0b1]))
+
+        await sync_to_async(seat_events.seats_changed)(
+            taken=[(self.show_session.id, 2, 4)]
+        )
+        self.assertEqual(
+            parse_event(await anext(events)),
+            ("seats", {"taken": [[2, 4]], "released": []}),
+        )
+        await events.aclose()
+
+    @override_settings(SEAT_EVENTS={**MEMORY_BROKER, "MAX_STREAM_SECONDS": 0})
+    async def test_expired_stream_unsubscribes(self):
+        response = await self.async_client.get(self.url, headers=self.headers)
+        chunks = [chunk async for chunk in response.streaming_content]
+
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(seat_events.hub.subscriber_count(self.show_session.id), 0)
+
+    async def test_stream_requires_authentication(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.get(
+            self.url, headers={"Authorization": "Bearer invalid"}
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(seat_events.hub.subscriber_count(), 0)
+
+    def test_refused_under_wsgi(self):
+        response = self.client.get(self.url, headers=self.headers)
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(response.streaming)
+        self.assertEqual(seat_events.hub.subscriber_count(), 0)
+
+    async def test_unknown_show_session(self):
+        url = reverse(
+            "planetarium:showsession-seats-stream", args=[self.show_session.id + 1]
+        )
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(seat_events.hub.subscriber_count(), 0)
+
+
+class PostgresBrokerTest(TransactionTestCase):
+    async def test_notifications_reach_the_hub(self):
+        broker = seat_events.PostgresBroker(seat_events.hub)
+        await broker.listen()
+        queue = seat_events.hub.subscribe(1)
+        try:
+            await sync_to_async(broker.publish)(1, {"taken": [[3, 4]], "released": []})
+            event = await asyncio.wait_for(queue.get(), timeout=5)
+        finally:
+            seat_events.hub.unsubscribe(1, queue)
+
+        self.assertEqual(event, {"taken": [[3, 4]], "released": []})
+
+    async def test_connects_outside_the_event_loop(self):
+        broker = seat_events.PostgresBroker(seat_events.hub)
+        connect = seat_events.PostgresBroker._connect
+        threads = []
+
+        def record_thread(params):
+            threads.append(threading.current_thread())
+            return connect(params)
+
+        with mock.patch.object(broker, "_connect", side_effect=record_thread):
+            # concurrent streams share one connection
+            await asyncio.gather(broker.listen(), broker.listen())
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    async def test_lost_connection_is_reopened_and_streams_resync(self):
+        broker = seat_events.PostgresBroker(seat_events.hub)
+        listeners = []
+        connect = seat_events.PostgresBroker._connect
+
+        def record_listener(params):
+            listeners.append(connect(params))
+            return listeners[-1]
+
+        with mock.patch.object(broker, "_connect", side_effect=record_listener):
+            await broker.listen()
+            queue = seat_events.hub.subscribe(1)
+            try:
+                await sync_to_async(self.terminate)(listeners[0].get_backend_pid())
+                self.assertIsNone(await asyncio.wait_for(queue.get(), timeout=5))
+                self.assertEqual(len(listeners), 2)
+
+                await sync_to_async(broker.publish)(1, {"taken": [[3, 4]], "released": []})
+                event = await asyncio.wait_for(queue.get(), timeout=5)
+            finally:
+                seat_events.hub.unsubscribe(1, queue)
+                asyncio.get_running_loop().remove_reader(listeners[-1].fileno())
+                listeners[-1].close()
+
+        self.assertEqual(event, {"taken": [[3, 4]], "released": []})
+
+    @staticmethod
+    def terminate(pid):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_terminate_backend(%s)", [pid])
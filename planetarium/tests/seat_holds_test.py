@@ -0,0 +1,277 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    PlanetariumDome,
+    AstronomyShow,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
+from planetarium.seat_holds import SeatHolds
+
+RESERVATION_URL = reverse("planetarium:reservation-list")
+
+
+def sample_show_session():
+    return ShowSession.objects.create(
+        astronomy_show=AstronomyShow.objects.create(title="Test", description="Test"),
+        planetarium_dome=PlanetariumDome.objects.create(name="Test Dome", rows=5, seats_in_row=5),
+        show_time=datetime.now(),
+    )
+
+
+def later(seconds):
+    """Patch the clock of the seat holds to run seconds ahead."""
+    now = time.time() + seconds
+    return mock.patch("planetarium.seat_holds.time.time", return_value=now), mock.patch(
+        "planetarium.booking.time.time", return_value=now
+    )
+
+
+class SeatHoldTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.show_session = sample_show_session()
+        self.holds_url = reverse("planetarium:showsession-holds", args=[self.show_session.id])
+        self.detail_url = reverse("planetarium:showsession-detail", args=[self.show_session.id])
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.other = get_user_model().objects.create_user(email="other@gmail.com", password="test")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(self.other)
+
+    def hold(self, client, *seats, **data):
+        return client.post(
+            self.holds_url,
+            {"seats": [{"row": row, "seat": seat} for row, seat in seats], **data},
+            format="json",
+        )
+
+    def taken_places(self):
+        return self.client.get(self.detail_url).data["taken_places"]
+
+    def test_held_seats_show_in_the_seat_map(self):
+        self.client.get(self.detail_url)
+
+        response = self.hold(self.client, (1, 1), (1, 2), minutes=5)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["seats"], [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}])
+        self.assertEqual(response.data["show_session"], self.show_session.id)
+        self.assertTrue(response.data["id"].startswith(f"{self.show_session.id}."))
+
+        self.assertEqual(self.taken_places(), [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}])
+        # the hold is not a ticket
+        self.assertEqual(
+            self.client.get(reverse("planetarium:showsession-list")).data["results"][0]["tickets_available"],
+            25,
+        )
+
+    def test_held_seats_cannot_be_held_or_booked_by_others(self):
+        self.hold(self.client, (1, 1))
+
+        response = self.hold(self.other_client, (1, 2), (1, 1))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["taken_seats"],
+            [{"show_session": self.show_session.id, "row": 1, "seat": 1}],
+        )
+
+        data = {"tickets": [{"row": 1, "seat": 1, "show_session": self.show_session.id}]}
+        response = self.other_client.post(RESERVATION_URL, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        data = {"reservations": [{"tickets": data["tickets"]}]}
+        response = self.other_client.post(reverse("planetarium:reservation-batch"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Ticket.objects.count(), 0)
+
+    def test_sold_seats_cannot_be_held(self):
+        Ticket.objects.create(
+            show_session=self.show_session,
+            reservation=Reservation.objects.create(user=self.other),
+            row=2,
+            seat=2,
+        )
+        response = self.hold(self.client, (2, 2))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_invalid_seats(self):
+        response = self.hold(self.client, (6, 1))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.hold(self.client, (1, 1), (1, 1))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.hold(self.client, (1, 1), minutes=1000)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hold_converts_into_tickets(self):
+        hold_id = self.hold(self.client, (3, 1), (3, 2)).data["id"]
+
+        response = self.other_client.post(RESERVATION_URL, {"hold": hold_id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("hold", response.data)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(RESERVATION_URL, {"hold": hold_id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted((ticket["row"], ticket["seat"]) for ticket in response.data["tickets"]),
+            [(3, 1), (3, 2)],
+        )
+        self.assertEqual(Reservation.objects.get().user, self.user)
+        self.assertEqual(SeatHolds.load(self.show_session.id).holds, {})
+        self.assertEqual(self.taken_places(), [{"row": 3, "seat": 1}, {"row": 3, "seat": 2}])
+
+        # used up
+        response = self.client.post(RESERVATION_URL, {"hold": hold_id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reservation_needs_tickets_or_a_hold(self):
+        response = self.client.post(RESERVATION_URL, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tickets", response.data)
+
+        hold_id = self.hold(self.client, (1, 1)).data["id"]
+        data = {
+            "hold": hold_id,
+            "tickets": [{"row": 1, "seat": 1, "show_session": self.show_session.id}],
+        }
+        response = self.client.post(RESERVATION_URL, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_holds_expire(self):
+        hold_id = self.hold(self.client, (1, 1), minutes=2).data["id"]
+        clock, booking_clock = later(121)
+        with clock, booking_clock:
+            self.assertEqual(self.taken_places(), [])
+
+            response = self.client.post(RESERVATION_URL, {"hold": hold_id}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+            response = self.hold(self.other_client, (1, 1))
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            # the expired hold was evicted by the writer
+            self.assertEqual(len(SeatHolds.load(self.show_session.id).holds), 1)
+
+    def test_sweep_releases_expired_holds(self):
+        ShowSession.objects.filter(id=self.show_session.id).update(
+            show_time=timezone.now() + timedelta(days=1)
+        )
+        self.hold(self.client, (1, 1), (1, 2), minutes=1)
+        self.hold(self.client, (2, 1), minutes=5)
+
+        clock, booking_clock = later(61)
+        with clock, booking_clock, mock.patch("planetarium.booking.publish_seat_changes") as publish:
+            out, err = StringIO(), StringIO()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("sweep_seat_holds", stdout=out, stderr=err)
+            self.assertIn("Released 2 seats", out.getvalue())
+            self.assertIn("LocMemCache", err.getvalue())
+            publish.assert_called_once_with(
+                taken=[],
+                released=[(self.show_session.id, 1, 1), (self.show_session.id, 1, 2)],
+            )
+            self.assertEqual(len(SeatHolds.load(self.show_session.id).holds), 1)
+
+            out = StringIO()
+            call_command("sweep_seat_holds", stdout=out)
+            self.assertIn("Released 0 seats", out.getvalue())
+
+    def test_sweep_skips_started_sessions(self):
+        self.hold(self.client, (1, 1), minutes=1)
+        ShowSession.objects.filter(id=self.show_session.id).update(
+            show_time=timezone.now() - timedelta(minutes=1)
+        )
+
+        clock, booking_clock = later(61)
+        with clock, booking_clock:
+            out = StringIO()
+            call_command("sweep_seat_holds", stdout=out, stderr=StringIO())
+        self.assertIn("Released 0 seats", out.getvalue())
+        self.assertEqual(len(SeatHolds.load(self.show_session.id).holds), 1)
+
+    def test_release_hold(self):
+        hold_id = self.hold(self.client, (1, 1)).data["id"]
+        url = reverse("planetarium:showsession-hold", args=[self.show_session.id, hold_id])
+
+        self.assertEqual(self.other_client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.taken_places(), [])
+
+    def test_holds_change_the_etag(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        self.hold(self.client, (1, 1))
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["taken_places"], [{"row": 1, "seat": 1}])
+
+        etag = response["ETag"]
+        clock, booking_clock = later(60 * 11)
+        with clock, booking_clock:
+            # expired, but not evicted yet
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class SeatHoldContentionTest(TransactionTestCase):
+    attempts = 40
+    workers = 8
+
+    def setUp(self):
+        cache.clear()
+        self.show_session = sample_show_session()
+        self.users = [
+            get_user_model().objects.create_user(email=f"user{index}@gmail.com", password="test")
+            for index in range(self.workers)
+        ]
+
+    def _hold(self, attempt):
+        client = APIClient()
+        client.force_authenticate(self.users[attempt % self.workers])
+        # overlapping pairs of seats in the first two rows
+        seats = [divmod(attempt % 10, 5), divmod((attempt + 1) % 10, 5)]
+        try:
+            response = client.post(
+                reverse("planetarium:showsession-holds", args=[self.show_session.id]),
+                {"seats": [{"row": row + 1, "seat": seat + 1} for row, seat in seats]},
+                format="json",
+            )
+            return response.status_code, response.data
+        finally:
+            connection.close()
+
+    def test_competing_holds_never_overlap(self):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(self._hold, range(self.attempts)))
+
+        self.assertTrue(
+            {status_code for status_code, _ in results}
+            <= {status.HTTP_201_CREATED, status.HTTP_409_CONFLICT}
+        )
+        held = [
+            (seat["row"], seat["seat"])
+            for status_code, data in results
+            if status_code == status.HTTP_201_CREATED
+            for seat in data["seats"]
+        ]
+        self.assertTrue(held)
+        self.assertEqual(len(held), len(set(held)))
+
+        live = SeatHolds.load(self.show_session.id).held_seats(time.time())
+        self.assertEqual(live, set(held))
@@ -0,0 +1,132 @@
+import base64
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    PlanetariumDome,
+    AstronomyShow,
+    ShowSession,
+    Reservation,
+    Ticket,
+)
+from planetarium.seat_map import SeatMap, get_seat_map
+
+
+class SeatMapTest(TestCase):
+    def test_take_and_release(self):
+        seat_map = SeatMap(rows=3, seats_in_row=4)
+        seat_map.take(1, 1)
+        seat_map.take(3, 4)
+        self.assertTrue(seat_map.is_taken(3, 4))
+        self.assertEqual(len(seat_map.bits), 2)
+
+        seat_map.release(1, 1)
+        self.assertFalse(seat_map.is_taken(1, 1))
+        self.assertEqual(seat_map.taken_places(), [{"row": 3, "seat": 4}])
+
+    def test_out_of_range_seat(self):
+        seat_map = SeatMap(rows=3, seats_in_row=4)
+        with self.assertRaises(IndexError):
+            seat_map.take(1, 5)
+
+    def test_to_base64(self):
+        seat_map = SeatMap(rows=2, seats_in_row=5)
+        seat_map.take(1, 1)
+        seat_map.take(2, 5)
+        self.assertEqual(base64.b64decode(seat_map.to_base64()), bytes([0b1, 0b10]))
+
+
+class ShowSessionSeatMapTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(email="test@gmail.com", password="test")
+        self.client.force_authenticate(user=self.user)
+        astronomy_show = AstronomyShow.objects.create(title="Test", description="Test")
+        planetarium_dome = PlanetariumDome.objects.create(name="Test Dome", rows=5, seats_in_row=10)
+        self.show_session = ShowSession.objects.create(
+            astronomy_show=astronomy_show,
+            planetarium_dome=planetarium_dome,
+            show_time=datetime.now(),
+        )
+        self.reservation = Reservation.objects.create(user=self.user)
+        self.url = reverse("planetarium:showsession-detail", args=[self.show_session.id])
+
+    def test_seat_map_rebuilt_on_miss_and_cached(self):
+        Ticket.objects.create(row=2, seat=3, show_session=self.show_session, reservation=self.reservation)
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            seat_map = get_seat_map(self.show_session)
+        self.assertTrue(seat_map.is_taken(2, 3))
+
+        with self.assertNumQueries(0):
+            get_seat_map(self.show_session)
+
+    def test_seat_map_updated_on_ticket_create_and_delete(self):
+        get_seat_map(self.show_session)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = Ticket.objects.create(
+                row=1, seat=1, show_session=self.show_session, reservation=self.reservation
+            )
+        self.show_session.refresh_from_db()
+        self.assertTrue(get_seat_map(self.show_session).is_taken(1, 1))
+        with self.assertNumQueries(0):
+            get_seat_map(self.show_session)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+        self.show_session.refresh_from_db()
+        self.assertFalse(get_seat_map(self.show_session).is_taken(1, 1))
+
+    def test_seat_map_built_before_a_sale_is_not_served(self):
+        # a reader loads the session, a booking commits, then the reader
+        # builds and caches the map after the sale was invalidated
+        reader_copy = ShowSession.objects.get(id=self.show_session.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(row=1, seat=1, show_session=self.show_session, reservation=self.reservation)
+        stale = get_seat_map(reader_copy)
+        stale.release(1, 1)
+        cache.set(
+            "planetarium:seat_map:%d" % self.show_session.id,
+            (reader_copy.updated_at, stale.rows, stale.seats_in_row, bytes(stale.bits)),
+        )
+
+        self.show_session.refresh_from_db()
+        self.assertTrue(get_seat_map(self.show_session).is_taken(1, 1))
+
+    def test_seat_map_updated_on_reservation_create(self):
+        get_seat_map(self.show_session)
+        data = {"tickets": [{"row": 4, "seat": 7, "show_session": self.show_session.id}]}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("planetarium:reservation-list"), data, format="json")
+
+        self.assertTrue(get_seat_map(self.show_session).is_taken(4, 7))
+
+    def test_retrieve_taken_places(self):
+        for seat in (2, 1):
+            Ticket.objects.create(row=3, seat=seat, show_session=self.show_session, reservation=self.reservation)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["taken_places"],
+            [{"row": 3, "seat": 1}, {"row": 3, "seat": 2}],
+        )
+
+    def test_retrieve_taken_places_bitmap(self):
+        Ticket.objects.create(row=1, seat=2, show_session=self.show_session, reservation=self.reservation)
+
+        response = self.client.get(self.url, {"seat_map": "bitmap"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        bits = base64.b64decode(response.data["taken_places"])
+        self.assertEqual(len(bits), 7)
+        self.assertEqual(bits[0], 0b10)
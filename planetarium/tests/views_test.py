@@ -3,12 +3,14 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 from datetime import datetime
+from planetarium import response_cache
 from planetarium.models import (
     PlanetariumDome,
     ShowTheme,
     AstronomyShow,
     ShowSession,
-    Reservation
+    Reservation,
+    Ticket,
 )
 
 
@@ -28,6 +30,7 @@ class PlanetariumDomeViewSetTest(APITestCase):
     def setUp(self):
         self.client = APIClient()
         self.planetarium_dome_url = reverse('planetarium:planetariumdome-list')
+        response_cache.invalidate()
         self.admin_user = sample_admin()
         self.client.force_authenticate(user=self.admin_user)
 
@@ -56,6 +59,7 @@ class ShowThemeViewSetTest(APITestCase):
     def setUp(self):
         self.client = APIClient()
         self.show_theme_url = reverse('planetarium:showtheme-list')
+        response_cache.invalidate()
         self.admin_user = sample_admin()
         self.client.force_authenticate(user=self.admin_user)
 
@@ -84,6 +88,7 @@ class AstronomyShowViewSetTest(APITestCase):
     def setUp(self):
         self.client = APIClient()
         self.astronomy_show_url = reverse('planetarium:astronomyshow-list')
+        response_cache.invalidate()
         self.admin_user = sample_admin()
         self.client.force_authenticate(user=self.admin_user)
 
@@ -91,9 +96,30 @@ class AstronomyShowViewSetTest(APITestCase):
         response = self.client.get(self.astronomy_show_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def _search(self, text):
+        response = self.client.get(self.astronomy_show_url, {"q": text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [show["title"] for show in response.json()]
+
+    def test_search_astronomy_shows(self):
+        AstronomyShow.objects.create(title="Black Holes", description="Gravity wells")
+        AstronomyShow.objects.create(title="Nebulae", description="Where black holes are born")
+        AstronomyShow.objects.create(title="Comets", description="Dirty snowballs")
+
+        self.assertEqual(self._search("black holes"), ["Black Holes", "Nebulae"])
+        self.assertEqual(self._search("snowb"), ["Comets"])
+        self.assertEqual(self._search("Nebulea"), ["Nebulae"])
+        self.assertEqual(self._search("?!"), [])
+
+    def test_search_vector_follows_updates(self):
+        show = AstronomyShow.objects.create(title="Comets", description="Test")
+        show.title = "Pulsars"
+        show.save()
+        self.assertEqual(self._search("pulsar"), ["Pulsars"])
+
     def test_create_astronomy_show(self):
         show_theme = ShowTheme.objects.create(name="Test Theme")
-        data = {'title': 'Test Show', 'description': 'Test Description', 'show_theme': 1}
+        data = {'title': 'Test Show', 'description': 'Test Description', 'show_theme': show_theme.id}
         response = self.client.post(self.astronomy_show_url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(AstronomyShow.objects.count(), 1)
@@ -117,11 +143,42 @@ class ShowSessionViewSetTest(APITestCase):
         astronomy_show = AstronomyShow.objects.create(**astronomy_show_data)
         astronomy_show.show_theme.set([show_theme.id])
         planetarium_dome = PlanetariumDome.objects.create(seats_in_row=5, rows=5, name="Test Dome")
-        data = {'astronomy_show': '1', 'planetarium_dome': '1', "show_time": datetime.now()}
+        data = {
+            'astronomy_show': astronomy_show.id,
+            'planetarium_dome': planetarium_dome.id,
+            "show_time": datetime.now()
+        }
         response = self.client.post(self.show_session_url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(ShowSession.objects.count(), 1)
-        self.assertEqual(ShowSession.objects.get(id=1).astronomy_show.title, 'Test Show')
+        self.assertEqual(ShowSession.objects.get().astronomy_show.title, 'Test Show')
+
+    def _create_sessions_with_tickets(self, count):
+        astronomy_show = AstronomyShow.objects.create(title="Test", description="Test")
+        planetarium_dome = PlanetariumDome.objects.create(seats_in_row=5, rows=5, name="Test Dome")
+        reservation = Reservation.objects.create(user=self.admin_user)
+        for _ in range(count):
+            show_session = ShowSession.objects.create(
+                astronomy_show=astronomy_show,
+                planetarium_dome=planetarium_dome,
+                show_time=datetime.now()
+            )
+            Ticket.objects.create(row=1, seat=1, show_session=show_session, reservation=reservation)
+
+    def test_list_show_sessions_tickets_available(self):
+        self._create_sessions_with_tickets(2)
+        response = self.client.get(self.show_session_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([session["tickets_available"] for session in response.data["results"]], [24, 24])
+
+    def test_list_show_sessions_constant_queries(self):
+        self._create_sessions_with_tickets(1)
+        with self.assertNumQueries(1):
+            self.client.get(self.show_session_url)
+
+        self._create_sessions_with_tickets(10)
+        with self.assertNumQueries(1):
+            self.client.get(self.show_session_url)
 
 
 class ReservationViewSetTest(APITestCase):
@@ -145,13 +202,101 @@ class ReservationViewSetTest(APITestCase):
         response = self.client.get(self.reservation_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def _create_reservations(self, count, tickets_per_reservation):
+        seats = iter(range(Ticket.objects.count() + 1, 26))
+        for _ in range(count):
+            reservation = Reservation.objects.create(user=self.user)
+            for _ in range(tickets_per_reservation):
+                seat = next(seats)
+                Ticket.objects.create(
+                    row=(seat - 1) // 5 + 1,
+                    seat=(seat - 1) % 5 + 1,
+                    show_session=self.show_session,
+                    reservation=reservation
+                )
+
+    def test_list_reservations_tickets_show_session(self):
+        self._create_reservations(2, 2)
+        response = self.client.get(self.reservation_url)
+        show_sessions = [
+            ticket["show_session"]
+            for reservation in response.data["results"]
+            for ticket in reservation["tickets"]
+        ]
+        self.assertEqual(len(show_sessions), 4)
+        for show_session in show_sessions:
+            self.assertEqual(show_session["astronomy_show"], "Test")
+            self.assertEqual(show_session["planetarium_dome"], "Test Dome")
+            self.assertEqual(show_session["tickets_available"], 21)
+
+    def test_list_reservations_constant_queries(self):
+        self._create_reservations(1, 1)
+        with self.assertNumQueries(3):
+            self.client.get(self.reservation_url)
+
+        self._create_reservations(5, 4)
+        with self.assertNumQueries(3):
+            self.client.get(self.reservation_url)
+
     def test_create_reservation(self):
-        data = {"tickets": [{"row": 5, "seat": 5, "show_session": 1}, ]}
+        data = {"tickets": [{"row": 5, "seat": 5, "show_session": self.show_session.id}, ]}
         response = self.client.post(self.reservation_url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Reservation.objects.count(), 1)
         self.assertEqual(Reservation.objects.get().user, self.user)
 
+    def test_create_reservation_bulk_constant_queries(self):
+        data = {"tickets": [{"row": 1, "seat": 1, "show_session": self.show_session.id}]}
+        with self.assertNumQueries(14):
+            self.client.post(self.reservation_url, data, format="json")
+
+        data = {
+            "tickets": [
+                {"row": 2, "seat": seat, "show_session": self.show_session.id}
+                for seat in range(1, 6)
+            ]
+        }
+        with self.assertNumQueries(14):
+            response = self.client.post(self.reservation_url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.count(), 6)
+
+    def test_create_reservation_seat_out_of_range_fail(self):
+        data = {"tickets": [{"row": 6, "seat": 1, "show_session": self.show_session.id}]}
+        response = self.client.post(self.reservation_url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("row number must be in available range", str(response.data["tickets"][0]["row"]))
+        self.assertEqual(Reservation.objects.count(), 0)
+
+    def test_create_reservation_seat_taken_fail(self):
+        self._create_reservations(1, 1)
+        data = {
+            "tickets": [
+                {"row": 1, "seat": 2, "show_session": self.show_session.id},
+                {"row": 1, "seat": 1, "show_session": self.show_session.id},
+            ]
+        }
+        response = self.client.post(self.reservation_url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["tickets"][0], {})
+        self.assertEqual(
+            response.data["tickets"][1]["non_field_errors"],
+            ["The fields show_session, row, seat must make a unique set."]
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_create_reservation_duplicate_seat_fail(self):
+        data = {
+            "tickets": [
+                {"row": 1, "seat": 1, "show_session": self.show_session.id},
+                {"row": 1, "seat": 1, "show_session": self.show_session.id},
+            ]
+        }
+        response = self.client.post(self.reservation_url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.data["tickets"][1])
+        self.assertEqual(Ticket.objects.count(), 0)
+
     def test_create_reservation_unauthenticated_fail(self):
         client = APIClient()
         response = client.post(self.reservation_url)
@@ -1,4 +1,4 @@
-from django.urls import path, include
+from django.urls import path, include, re_path
 from rest_framework import routers
 
 from planetarium.views import (
@@ -6,19 +6,57 @@ from planetarium.views import (
     ShowThemeViewSet,
     AstronomyShowViewSet,
     ShowSessionViewSet,
-    ReservationViewSet
+    ReservationViewSet,
+    DatabasePoolStatsView,
+    ResponseCacheStatsView,
+    RowHeatmapView,
+    SalesReportView,
+    TicketExportView,
 )
+from planetarium.streams import show_session_seats_stream
 
 router = routers.DefaultRouter()
 
 router.register("planetarium-domes", PlanetariumDomeViewSet)
 router.register("show-themes", ShowThemeViewSet)
-router.register("astronomy-shows", AstronomyShowViewSet)
-router.register("show-sessions", ShowSessionViewSet)
-router.register("reservations", ReservationViewSet)
+router.register(
+    "astronomy-shows", AstronomyShowViewSet, basename="astronomyshow"
+)
+router.register("show-sessions", ShowSessionViewSet, basename="showsession")
+router.register("reservations", ReservationViewSet, basename="reservation")
 
 urlpatterns = [
-    path("", include(router.urls))
+    path("", include(router.urls)),
+    path(
+        "show-sessions/<int:pk>/seats/stream/",
+        show_session_seats_stream,
+        name="showsession-seats-stream",
+    ),
+    path(
+        "response-cache-stats/",
+        ResponseCacheStatsView.as_view(),
+        name="response-cache-stats",
+    ),
+    path(
+        "db-pool-stats/",
+        DatabasePoolStatsView.as_view(),
+        name="db-pool-stats",
+    ),
+    path(
+        "analytics/sales/",
+        SalesReportView.as_view(),
+        name="analytics-sales",
+    ),
+    path(
+        "analytics/row-heatmap/",
+        RowHeatmapView.as_view(),
+        name="analytics-row-heatmap",
+    ),
+    re_path(
+        r"^exports/tickets\.(?P<export_format>csv|ndjson)$",
+        TicketExportView.as_view(),
+        name="export-tickets",
+    ),
 ]
 
 app_name = "planetarium"
@@ -1,9 +1,24 @@
-from datetime import datetime
-
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Max, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from drf_spectacular.plumbing import build_basic_type, build_object_type
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, mixins
-from rest_framework.permissions import IsAuthenticated
-
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from config.db.base import pool_stats
 from .models import (
     PlanetariumDome,
     ShowTheme,
@@ -20,13 +35,72 @@ from .serializers import (
     ShowSessionSerializer,
     ShowSessionDetailSerializer,
     ShowSessionListSerializer,
+    ShowSessionCalendarParamsSerializer,
+    ShowSessionCalendarDaySerializer,
     ReservationSerializer,
-    ReservationListSerializer
+    BatchReservationSerializer,
+    SeatHoldSerializer,
+    AutoReserveSerializer,
+    ReservationListSerializer,
+    SalesReportParamsSerializer,
+    SalesReportSerializer,
+    RowHeatmapParamsSerializer,
+    RowHeatmapSerializer,
+    TicketExportParamsSerializer,
+    ResponseCacheStatsSerializer,
+    ScheduleImportParamsSerializer,
+    ScheduleImportRowSerializer,
+    ScheduleImportErrorSerializer,
+    ScheduleImportResultSerializer,
+)
+from .analytics import (
+    refreshed_at as analytics_refreshed_at,
+    row_heatmap,
+    sales_report,
+)
+from .async_views import AsyncReadMixin
+from .booking import release_hold
+from .conditional import ConditionalRetrieveMixin
+from . import export
+from .filters import ShowSessionFilter
+from .pagination import ShowSessionPagination, ReservationPagination
+from .parsers import CSVParser, NDJSONParser
+from .permissions import IsAdminOrIfAuthenticatedReadOnly, IsStaff
+from . import response_cache
+from .response_cache import CachedResponseMixin
+from .schedule import get_calendar
+from .schedule_import import ScheduleImportError, import_sessions
+from .seat_holds import (
+    get_seat_map_with_holds,
+    holds_version,
+    parse_hold_id,
+)
+
+# a year, the longest max-age caches are expected to honor
+CACHE_FOREVER = 365 * 24 * 60 * 60
+
+# config.db.base.pool_stats(): the stats of each pool by "alias/dbname"
+DATABASE_POOL_STATS_SCHEMA = build_object_type(
+    additionalProperties=build_object_type(
+        properties={
+            name: build_basic_type(OpenApiTypes.INT)
+            for name in (
+                "size",
+                "idle",
+                "in_use",
+                "waiting",
+                "max_size",
+                "created",
+                "recycled",
+                "timeouts",
+            )
+        }
+    )
 )
-from .permissions import IsAdminOrIfAuthenticatedReadOnly
 
 
 class PlanetariumDomeViewSet(
+    CachedResponseMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
@@ -37,6 +111,7 @@ class PlanetariumDomeViewSet(
 
 
 class ShowThemeViewSet(
+    CachedResponseMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
@@ -46,14 +121,16 @@ class ShowThemeViewSet(
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly, )
 
 
-class AstronomyShowViewSet(viewsets.ModelViewSet):
+class AstronomyShowViewSet(
+    CachedResponseMixin, AsyncReadMixin, viewsets.ModelViewSet
+):
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly, )
 
     @staticmethod
     def _params_to_ints(qs):
         return [int(str_id) for str_id in qs.split(",")]
 
-    def get_queryset(self):
+    def get_unsearched_queryset(self):
         title = self.request.query_params.get("title")
         show_themes = self.request.query_params.get("show_theme")
 
@@ -66,6 +143,24 @@ class AstronomyShowViewSet(viewsets.ModelViewSet):
             show_themes_ids = self._params_to_ints(show_themes)
             queryset = queryset.filter(show_theme__id__in=show_themes_ids)
 
+        return queryset
+
+    def get_queryset(self):
+        text = self.request.query_params.get("q")
+        queryset = self.get_unsearched_queryset()
+
+        if text:
+            queryset = queryset.search(text)
+
+        return queryset.distinct()
+
+    async def aget_queryset(self):
+        text = self.request.query_params.get("q")
+        queryset = self.get_unsearched_queryset()
+
+        if text:
+            queryset = await queryset.asearch(text)
+
         return queryset.distinct()
 
     def get_serializer_class(self):
@@ -82,7 +177,8 @@ class AstronomyShowViewSet(viewsets.ModelViewSet):
         parameters=[
             OpenApiParameter(
                 "show_themes",
-                type={"type": "list", "items": {"type": "number"}},
+                type={"type": "array", "items": {"type": "integer"}},
+                explode=False,
                 description="Filter by show theme id(ex. ?show_theme=3,5)"
             ),
             OpenApiParameter(
@@ -90,33 +186,75 @@ class AstronomyShowViewSet(viewsets.ModelViewSet):
                 type=str,
                 description="Filter by title (ex. ?title=AstronomyShow Title)",
             ),
+            OpenApiParameter(
+                "q",
+                type=str,
+                description=(
+                    "Search title and description, best matches first "
+                    "(ex. ?q=black hol)"
+                ),
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
 
-class ShowSessionViewSet(viewsets.ModelViewSet):
+class ShowSessionViewSet(
+    ConditionalRetrieveMixin, AsyncReadMixin, viewsets.ModelViewSet
+):
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly, )
+    pagination_class = ShowSessionPagination
+    filter_backends = (ShowSessionFilter, )
 
     def get_queryset(self):
-        date = self.request.query_params.get("title")
-        astronomy_show = self.request.query_params.get("show_theme")
-        planetarium_dome = self.request.query_params.get("planetarium_dome")
-
         queryset = ShowSession.objects.select_related("astronomy_show", "planetarium_dome")
 
-        if date:
-            date = datetime.strptime(date, "%Y-%m-%d").date()
-            queryset = queryset.filter(show_time__date=date)
-
-        if astronomy_show:
-            queryset = queryset.filter(astronomy_show__id=astronomy_show)
-
-        if planetarium_dome:
-            queryset = queryset.filter(planetarium_dome__id=planetarium_dome)
+        if self.action == "list":
+            queryset = queryset.with_tickets_available()
 
-        return queryset.distinct()
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related("astronomy_show__show_theme")
+
+        return queryset
+
+    async def aget_object(self):
+        show_session = await super().aget_object()
+        # the seat map cache falls back to the database
+        show_session.seat_map = await sync_to_async(get_seat_map_with_holds)(
+            show_session
+        )
+        return show_session
+
+    def version_stamps(self):
+        return (
+            self.get_queryset()
+            .prefetch_related(None)
+            .filter(pk=self.kwargs["pk"])
+            .annotate(
+                show_theme_updated_at=Max(
+                    "astronomy_show__show_theme__updated_at"
+                )
+            )
+            .values_list(
+                "updated_at",
+                "astronomy_show__updated_at",
+                "planetarium_dome__updated_at",
+                "show_theme_updated_at",
+            )
+        )
+
+    def get_version_stamps(self):
+        return self.with_holds_version(self.version_stamps().first())
+
+    async def aget_version_stamps(self):
+        return self.with_holds_version(await self.version_stamps().afirst())
+
+    def with_holds_version(self, stamps):
+        # seat holds live in the cache, not in updated_at
+        if stamps is None:
+            return None
+        return (*stamps, holds_version(self.kwargs["pk"]))
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -125,31 +263,228 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
         if self.action == "retrieve":
             return ShowSessionDetailSerializer
 
+        if self.action == "holds":
+            return SeatHoldSerializer
+
+        if self.action == "auto_reserve":
+            return AutoReserveSerializer
+
         return ShowSessionSerializer
 
+    @extend_schema(
+        description=(
+            "Hold seats of the show session for some minutes. Held seats "
+            "are shown as taken to everyone and only the holder can book "
+            "them, by creating a reservation with the hold id."
+        ),
+        responses={201: SeatHoldSerializer},
+    )
+    @action(detail=True, methods=["post"], permission_classes=(IsAuthenticated, ))
+    def holds(self, request, pk=None):
+        serializer = self.get_serializer(
+            data=request.data,
+            context={
+                **self.get_serializer_context(),
+                "show_session": self.get_object(),
+            },
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user_id=request.user.id)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        description=(
+            "Reserve the best available seats for a party: adjacent seats "
+            "as close to the center of the dome as possible, without "
+            "leaving single seats free next to them. The party is split "
+            "over several rows only when no row has enough adjacent "
+            "seats (\"together\": false)."
+        ),
+        responses={201: AutoReserveSerializer},
+    )
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="auto-reserve",
+        permission_classes=(IsAuthenticated, ),
+    )
+    def auto_reserve(self, request, pk=None):
+        serializer = self.get_serializer(
+            data=request.data,
+            context={
+                **self.get_serializer_context(),
+                "show_session": self.get_object(),
+            },
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user_id=request.user.id)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        description=(
+            "Per-day aggregates of the show sessions between two dates "
+            "(inclusive, in the server's time zone), optionally per dome. "
+            "Days without sessions are left out. Responses about past days "
+            "only may be cached for good."
+        ),
+        parameters=[ShowSessionCalendarParamsSerializer],
+        responses={200: ShowSessionCalendarDaySerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def calendar(self, request):
+        params = ShowSessionCalendarParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        days = get_calendar(
+            params["from"],
+            params["to"],
+            planetarium_dome=params.get("planetarium_dome"),
+            by_dome=params["by_dome"],
+        )
+        response = Response(
+            ShowSessionCalendarDaySerializer(days, many=True).data
+        )
+        if params["to"] < timezone.localdate():
+            patch_cache_control(
+                response, public=True, max_age=CACHE_FOREVER, immutable=True
+            )
+        return response
+
+    @extend_schema(
+        description=(
+            "Create many show sessions at once, e.g. a season's schedule, "
+            "from a JSON array, CSV or newline-delimited JSON. Sessions "
+            "name their show and dome by id or by title and name. Either "
+            "all sessions are created or, if any is invalid or overlaps "
+            "another session of its dome, none is and the errors are "
+            "listed by row."
+        ),
+        parameters=[ScheduleImportParamsSerializer],
+        request={
+            "application/json": ScheduleImportRowSerializer(many=True),
+            "text/csv": str,
+            "application/x-ndjson": str,
+        },
+        responses={
+            201: ScheduleImportResultSerializer,
+            200: ScheduleImportResultSerializer,
+            400: ScheduleImportErrorSerializer(many=True),
+        },
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        url_name="import",
+        permission_classes=(IsStaff, ),
+        parser_classes=(JSONParser, CSVParser, NDJSONParser),
+    )
+    def import_schedule(self, request):
+        params = ScheduleImportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        dry_run = params.validated_data["dry_run"]
+
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError("Expected a list of show sessions.")
+        max_rows = settings.SCHEDULE_IMPORT["MAX_ROWS"]
+        if len(rows) > max_rows:
+            raise ValidationError(
+                f"At most {max_rows} sessions can be imported at once."
+            )
+
+        try:
+            result = import_sessions(rows, dry_run=dry_run)
+        except ScheduleImportError as error:
+            return Response(error.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        seconds = result["timings"]["total"]
+        return Response(
+            ScheduleImportResultSerializer(
+                {
+                    **result,
+                    "rows_per_second": result["rows"] / seconds if seconds else 0,
+                }
+            ).data,
+            status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(request=None, responses={204: None})
+    @action(
+        detail=True,
+        methods=["delete"],
+        url_path=r"holds/(?P<hold_id>[^/]+)",
+        url_name="hold",
+        permission_classes=(IsAuthenticated, ),
+    )
+    def delete_hold(self, request, pk=None, hold_id=None):
+        """Release a seat hold before it expires."""
+        if str(parse_hold_id(hold_id)) != pk or not release_hold(
+            hold_id, request.user.id
+        ):
+            raise NotFound()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     # only for documentation
     @extend_schema(
         parameters=[
             OpenApiParameter(
                 "date",
-                type=datetime,
+                type=date,
                 description="Filter by date(ex. ?date=2012-11-03)"
             ),
+            OpenApiParameter(
+                "date_from",
+                type=date,
+                description="Sessions on or after a date (ex. ?date_from=2012-11-03)",
+            ),
+            OpenApiParameter(
+                "date_to",
+                type=date,
+                description="Sessions on or before a date (ex. ?date_to=2012-11-10)",
+            ),
             OpenApiParameter(
                 "astronomy_show",
-                type=int,
-                description="Filter by astronomy show id (ex. ?astronomy_show=1)",
+                type={"type": "array", "items": {"type": "integer"}},
+                explode=False,
+                description="Filter by astronomy show ids (ex. ?astronomy_show=1,3)",
             ),
             OpenApiParameter(
                 "planetarium_dome",
                 type=int,
                 description="Filter by planetarium dome id (ex. ?planetarium_dome=1)",
             ),
+            OpenApiParameter(
+                "has_available_seats",
+                type=bool,
+                description=(
+                    "Only sessions with (true) or without (false) free "
+                    "seats (ex. ?has_available_seats=true)"
+                ),
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    # only for documentation
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "seat_map",
+                type=str,
+                enum=["bitmap"],
+                description=(
+                    "Return taken_places as a base64 bitset with one bit "
+                    "per seat, row by row (ex. ?seat_map=bitmap)"
+                ),
+            ),
+        ]
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class ReservationViewSet(
     mixins.CreateModelMixin,
@@ -157,16 +492,181 @@ class ReservationViewSet(
     viewsets.GenericViewSet,
 ):
     permission_classes = (IsAuthenticated, )
+    pagination_class = ReservationPagination
 
     def get_queryset(self):
-        queryset = Reservation.objects.prefetch_related("tickets")
-        return queryset.filter(user=self.request.user)
+        queryset = Reservation.objects.filter(user_id=self.request.user.id)
+
+        if self.action == "list":
+            return queryset.prefetch_related(
+                "tickets",
+                Prefetch(
+                    "tickets__show_session",
+                    queryset=ShowSession.objects.select_related(
+                        "astronomy_show", "planetarium_dome"
+                    ).with_tickets_available()
+                )
+            )
+
+        return queryset.prefetch_related("tickets")
 
     def get_serializer_class(self):
         if self.action == "list":
             return ReservationListSerializer
 
+        if self.action == "batch":
+            return BatchReservationSerializer
+
         return ReservationSerializer
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # request.user is a TokenUser, not a model instance
+        serializer.save(user_id=self.request.user.id)
+
+    @extend_schema(
+        description=(
+            "Create many reservations at once, e.g. for group bookings. "
+            "In all_or_nothing mode (the default) nothing is created "
+            "unless every reservation can be; in best_effort mode the "
+            "valid ones are created and the others reported as failed. "
+            "Responds 201 when all were created, 207 when only some were."
+        )
+    )
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save(user_id=request.user.id)
+
+        created = [result for result in results if result["status"] == "created"]
+        if len(created) == len(results):
+            status_code = status.HTTP_201_CREATED
+        elif created:
+            status_code = status.HTTP_207_MULTI_STATUS
+        elif any(
+            "taken_seats" in result.get("errors", {}) for result in results
+        ):
+            status_code = status.HTTP_409_CONFLICT
+        else:
+            status_code = status.HTTP_400_BAD_REQUEST
+        return Response({"results": results}, status=status_code)
+
+
+class ResponseCacheStatsView(APIView):
+    permission_classes = (IsAdminUser, )
+
+    @extend_schema(
+        description=(
+            "Counters of the catalog response cache in the process that "
+            "serves the request. Counters that are still zero are left out."
+        ),
+        responses={200: ResponseCacheStatsSerializer},
+    )
+    def get(self, request):
+        return Response(response_cache.stats())
+
+
+class DatabasePoolStatsView(APIView):
+    permission_classes = (IsAdminUser, )
+
+    @extend_schema(
+        description=(
+            "State of the connection pools of the process that serves the "
+            "request, by \"alias/database name\". Empty when pooling is off."
+        ),
+        responses={200: DATABASE_POOL_STATS_SCHEMA},
+    )
+    def get(self, request):
+        return Response(pool_stats())
+
+
+class SalesReportView(APIView):
+    permission_classes = (IsStaff, )
+
+    @extend_schema(
+        description=(
+            "Sessions, capacity, tickets sold and fill rate of the show "
+            "sessions between two dates, per astronomy show, show theme, "
+            "planetarium dome, hour of the day or date. Read from a "
+            "rollup as of refreshed_at, see refresh_sales_rollup."
+        ),
+        parameters=[SalesReportParamsSerializer],
+        responses={200: SalesReportSerializer},
+    )
+    def get(self, request):
+        params = SalesReportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        rows = sales_report(
+            params.validated_data["by"],
+            params.validated_data.get("date_from"),
+            params.validated_data.get("date_to"),
+        )
+        return Response(
+            SalesReportSerializer(
+                {"refreshed_at": analytics_refreshed_at(), "results": rows}
+            ).data
+        )
+
+
+class RowHeatmapView(APIView):
+    permission_classes = (IsStaff, )
+
+    @extend_schema(
+        description=(
+            "Tickets sold and fill rate per row of a planetarium dome over "
+            "its sessions between two dates. Read from a rollup as of "
+            "refreshed_at, see refresh_sales_rollup."
+        ),
+        parameters=[RowHeatmapParamsSerializer],
+        responses={200: RowHeatmapSerializer},
+    )
+    def get(self, request):
+        params = RowHeatmapParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        heatmap = row_heatmap(
+            params.validated_data["planetarium_dome"],
+            params.validated_data.get("date_from"),
+            params.validated_data.get("date_to"),
+            astronomy_show=params.validated_data.get("astronomy_show"),
+        )
+        heatmap["refreshed_at"] = analytics_refreshed_at()
+        return Response(RowHeatmapSerializer(heatmap).data)
+
+
+class TicketExportView(APIView):
+    permission_classes = (IsStaff, )
+
+    def perform_content_negotiation(self, request, force=False):
+        # the export is not rendered by a renderer, only errors are
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+        description=(
+            "Stream every ticket with its reservation, user, show session, "
+            "astronomy show and dome as CSV or newline-delimited JSON, "
+            "optionally only those of a dome or of the sessions between "
+            "two dates."
+        ),
+        parameters=[TicketExportParamsSerializer],
+        responses={(200, "text/csv"): str, (200, "application/x-ndjson"): str},
+    )
+    def get(self, request, export_format):
+        params = TicketExportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = export.tickets_for_export(**params.validated_data)
+
+        # a synchronous iterator would be read whole before an ASGI
+        # server sends any of it, an async one would be under WSGI
+        if isinstance(request._request, ASGIRequest):
+            content = export.astream(queryset, export_format)
+        else:
+            content = export.stream(queryset, export_format)
+        return StreamingHttpResponse(
+            content,
+            content_type=export.FORMATS[export_format],
+            headers={
+                "Content-Disposition": (
+                    f'attachment; filename="tickets.{export_format}"'
+                )
+            },
+        )
@@ -0,0 +1,30 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication,
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from .revocation import is_revoked
+from .serializers import USER_CLAIMS
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """Authenticate with the user claims of the access token, without a query.
+
+    request.user is a TokenUser carrying the id, email and is_staff the
+    token was issued with (see TokenObtainPairSerializer). Tokens issued
+    before a user was deactivated, deleted or had their permissions or
+    password changed are rejected through user.revocation. Tokens without
+    the claims, issued before they existed, still load the user row.
+    """
+
+    def get_user(self, validated_token):
+        if is_revoked(validated_token):
+            raise AuthenticationFailed(
+                _("Token has been revoked"), code="token_revoked"
+            )
+
+        if not all(claim in validated_token for claim in USER_CLAIMS):
+            return JWTAuthentication.get_user(self, validated_token)
+        return super().get_user(validated_token)
@@ -0,0 +1,20 @@
+# Generated by Django 4.2 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_alter_user_managers_remove_user_username_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('user_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('revoked_at', models.DateTimeField()),
+            ],
+        ),
+    ]
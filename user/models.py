@@ -47,3 +47,23 @@ class User(AbstractUser):
     REQUIRED_FIELDS = []
 
     objects = UserManager()
+
+    # set while check_password() rehashes the password it just verified
+    rehashing_password = False
+
+    def check_password(self, raw_password):
+        self.rehashing_password = True
+        try:
+            return super().check_password(raw_password)
+        finally:
+            self.rehashing_password = False
+
+
+class TokenRevocation(models.Model):
+    """Tokens of the user issued at or before revoked_at are rejected.
+
+    user_id is not a foreign key, the row has to outlive a deleted user.
+    """
+
+    user_id = models.BigIntegerField(primary_key=True)
+    revoked_at = models.DateTimeField()
@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenRevocation
+
+_lock = threading.Lock()
+_local = OrderedDict()
+
+
+def revoke(user_id):
+    """Reject every token issued to the user until now.
+
+    The cutoff is stored in the database, in the caller's transaction, so
+    it reaches every process and is never evicted.
+    """
+    TokenRevocation.objects.bulk_create(
+        [TokenRevocation(user_id=user_id, revoked_at=timezone.now())],
+        update_conflicts=True,
+        unique_fields=["user_id"],
+        update_fields=["revoked_at"],
+    )
+    transaction.on_commit(lambda: _forget(user_id))
+
+
+def _forget(user_id):
+    with _lock:
+        _local.pop(user_id, None)
+
+
+def revoked_at(user_id):
+    """Return when the user's tokens were last revoked, as a timestamp.
+
+    Returns None if they never were. Answers, revoked or not, are kept in
+    process for TOKEN_REVOCATION["LOCAL_TTL"] seconds, so a revocation
+    made by another process takes up to that long to apply here.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _local.get(user_id)
+        if entry is not None and entry[1] > now:
+            _local.move_to_end(user_id)
+            return entry[0]
+
+    revoked = (
+        TokenRevocation.objects.filter(user_id=user_id)
+        .values_list("revoked_at", flat=True)
+        .first()
+    )
+    timestamp = None if revoked is None else int(revoked.timestamp())
+    with _lock:
+        _local[user_id] = (timestamp, now + settings.TOKEN_REVOCATION["LOCAL_TTL"])
+        _local.move_to_end(user_id)
+        while len(_local) > settings.TOKEN_REVOCATION["LOCAL_MAX_ENTRIES"]:
+            _local.popitem(last=False)
+    return timestamp
+
+
+def is_revoked(token):
+    timestamp = revoked_at(token[api_settings.USER_ID_CLAIM])
+    # iat has a one second resolution: a token issued in the second of the
+    # revocation may predate it
+    return timestamp is not None and token["iat"] <= timestamp
+
+
+def clear_local():
+    with _lock:
+        _local.clear()
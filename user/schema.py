@@ -0,0 +1,7 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    """Documents StatelessJWTAuthentication as the usual bearer JWT."""
+
+    target_class = "user.authentication.StatelessJWTAuthentication"
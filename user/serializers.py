@@ -1,6 +1,15 @@
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .revocation import is_revoked
+
+# copied into the tokens, for StatelessJWTAuthentication
+USER_CLAIMS = ("email", "is_staff")
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -24,3 +33,20 @@ class UserSerializer(serializers.ModelSerializer):
             user.save()
 
         return user
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if is_revoked(RefreshToken(attrs["refresh"], verify=False)):
+            raise InvalidToken(_("Token has been revoked"))
+        return data
@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .revocation import revoke
+from .serializers import USER_CLAIMS
+
+User = get_user_model()
+
+# changes that invalidate the tokens issued before them
+REVOKING_FIELDS = USER_CLAIMS + ("is_active", "is_superuser", "password")
+
+
+@receiver(pre_save, sender=User)
+def remember_user_claims(sender, instance, update_fields=None, **kwargs):
+    instance.previous_claims = None
+    if instance.pk is None or (
+        update_fields is not None and not set(update_fields) & set(REVOKING_FIELDS)
+    ):
+        return
+
+    instance.previous_claims = (
+        User.objects.filter(pk=instance.pk)
+        .values_list(*REVOKING_FIELDS)
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_user_change(sender, instance, **kwargs):
+    previous_claims = getattr(instance, "previous_claims", None)
+    if previous_claims is None:
+        return
+
+    changed = {
+        field
+        for field, previous in zip(REVOKING_FIELDS, previous_claims)
+        if getattr(instance, field) != previous
+    }
+    if instance.rehashing_password:
+        # a login upgrading the hash of the password it was given
+        changed.discard("password")
+    if changed:
+        revoke(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_user_delete(sender, instance, **kwargs):
+    revoke(instance.pk)